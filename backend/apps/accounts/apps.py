@@ -5,3 +5,11 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.accounts'
     label = 'accounts'
+
+    def ready(self):
+        from nomad_backend.metrics import register_collector
+
+        from . import signals  # noqa: F401
+        from .metrics import TokenTableCollector
+
+        register_collector(TokenTableCollector())
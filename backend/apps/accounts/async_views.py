@@ -0,0 +1,46 @@
+"""Async sign-in, used when serving over ASGI (see ``nomad_backend.asgi_urls``).
+
+The password check is awaited on the hashing pool (``apps.accounts.hashing``),
+so a burst of sign-ins holds coroutines, not threads or the event loop; only
+issuing the tokens (one insert) hops to a thread. Anything but a JSON POST
+runs the regular ``SignInView``.
+"""
+
+from __future__ import annotations
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import aauthenticate
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework_simplejwt.settings import api_settings
+
+from nomad_backend.async_api import api_view, render
+
+from .serializers import EmailTokenObtainPairSerializer, hashing_or_503
+from .views import SignInView
+
+_sync_signin = SignInView.as_view()
+
+
+@api_view
+async def signin(request):
+    if request.method != 'POST' or request.content_type != 'application/json':
+        return await sync_to_async(_sync_signin)(request)
+
+    drf_request = Request(request, parsers=[JSONParser()])
+    serializer = EmailTokenObtainPairSerializer(context={'request': drf_request})
+    # Field validation only; validate() would authenticate synchronously
+    attrs = serializer.to_internal_value(drf_request.data)
+    with hashing_or_503():
+        user = await aauthenticate(
+            request,
+            **{serializer.username_field: attrs[serializer.username_field]},
+            password=attrs['password'],
+            pooled=True,
+        )
+    if not api_settings.USER_AUTHENTICATION_RULE(user):
+        raise AuthenticationFailed(
+            serializer.error_messages['no_active_account'], 'no_active_account'
+        )
+    return render(await sync_to_async(serializer.signed_in)(user))
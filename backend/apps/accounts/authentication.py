@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def user_cache_key(user_id) -> str:
+    return f'accounts:user:{user_id}'
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that resolves the user from a short-lived cache.
+
+    Saving or deleting a user drops its entry (see ``apps.accounts.signals``);
+    entries also expire after ``AUTH_USER_CACHE_SECONDS``, which bounds how long
+    another process with its own local cache can keep serving a stale user.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE_SECONDS)
+            return user
+
+        self._check_cached_user(user, validated_token)
+        return user
+
+    async def aauthenticate(self, request):
+        """Async ``authenticate`` for the ASGI views; only a cache miss leaves the event loop."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = await cache.aget(user_cache_key(user_id)) if user_id is not None else None
+        if user is None:
+            return await sync_to_async(self.get_user)(validated_token)
+        self._check_cached_user(user, validated_token)
+        return user
+
+    def _check_cached_user(self, user, validated_token):
+        # Same checks the uncached path applies after loading the user
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code='password_changed'
+            )
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from . import hashing
+
+
+class EmailBackend(ModelBackend):
+    """``ModelBackend`` that checks passwords on the hashing pool when asked to.
+
+    The API sign-in passes ``pooled=True`` with the credentials; the hash then
+    runs on ``apps.accounts.hashing`` (never on the event loop, for the async
+    path) and may raise ``hashing.HashingBusy``. Without it, e.g. in the
+    admin, passwords are checked inline exactly as ``ModelBackend`` does.
+    """
+
+    def authenticate(self, request, username=None, password=None, pooled=False, **kwargs):
+        if not pooled:
+            return super().authenticate(request, username, password, **kwargs)
+        User = get_user_model()
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # Hash once anyway so unknown emails take as long as wrong passwords
+            hashing.hash_password(password)
+            return None
+        is_correct, must_update = hashing.check_password(password, user.password)
+        if is_correct and must_update:
+            # Same upgrade as AbstractBaseUser.check_password; not a password change
+            user.password = hashing.hash_password(password)
+            user.save(update_fields=['password'])
+        if is_correct and self.user_can_authenticate(user):
+            return user
+        return None
+
+    async def aauthenticate(self, request, username=None, password=None, pooled=False, **kwargs):
+        if not pooled:
+            return await super().aauthenticate(request, username, password, **kwargs)
+        User = get_user_model()
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await User._default_manager.aget_by_natural_key(username)
+        except User.DoesNotExist:
+            await hashing.ahash_password(password)
+            return None
+        is_correct, must_update = await hashing.acheck_password(password, user.password)
+        if is_correct and must_update:
+            user.password = await hashing.ahash_password(password)
+            await user.asave(update_fields=['password'])
+        if is_correct and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,108 @@
+"""Password hashing on a small, bounded thread pool.
+
+A password hash is deliberately slow CPU work (PBKDF2 runs for tens of
+milliseconds). Done inline, a burst of sign-ins occupies every request worker
+and the CPU, and note requests queue behind it. Here every hash runs on one
+of ``PASSWORD_HASHING_WORKERS`` threads per process (``hashlib`` releases the
+GIL, so other requests keep running), at most ``PASSWORD_HASHING_QUEUE`` more
+wait for a thread, and anything beyond that raises ``HashingBusy`` straight
+away. Async callers ``await`` the hash without blocking the event loop.
+``PASSWORD_HASHING_WORKERS=0`` hashes inline.
+
+Only the API sign-in and sign-up use the pool (``EmailBackend`` with
+``pooled=True`` and the accounts serializers), and they answer ``HashingBusy``
+with ``503`` and ``Retry-After``. ``User.set_password`` and
+``User.check_password`` keep hashing inline, so the admin, ``createsuperuser``,
+``changepassword`` and migrations never see the pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+
+from .metrics import HASHING_QUEUE_SECONDS, HASHING_REJECTIONS, HASHING_SECONDS
+
+_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+_slots: threading.BoundedSemaphore | None = None
+
+
+class HashingBusy(Exception):
+    """Every hashing thread is busy and the queue is full."""
+
+
+def _pool() -> tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = settings.PASSWORD_HASHING_WORKERS
+            _executor = ThreadPoolExecutor(workers, thread_name_prefix='password-hashing')
+            _slots = threading.BoundedSemaphore(workers + settings.PASSWORD_HASHING_QUEUE)
+        return _executor, _slots
+
+
+def shutdown() -> None:
+    """Stop the pool; the next hash starts a new one (used by tests after settings change)."""
+    global _executor, _slots
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = _slots = None
+
+
+def _timed(operation: str, function, args, queued: float):
+    started = time.perf_counter()
+    HASHING_QUEUE_SECONDS.observe(started - queued)
+    try:
+        return function(*args)
+    finally:
+        HASHING_SECONDS.labels(operation).observe(time.perf_counter() - started)
+
+
+def _submit(operation: str, function, *args) -> Future:
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        HASHING_REJECTIONS.inc()
+        raise HashingBusy()
+    try:
+        future = executor.submit(_timed, operation, function, args, time.perf_counter())
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def _run(operation: str, function, *args):
+    if not settings.PASSWORD_HASHING_WORKERS:
+        return _timed(operation, function, args, time.perf_counter())
+    return _submit(operation, function, *args).result()
+
+
+async def _arun(operation: str, function, *args):
+    if not settings.PASSWORD_HASHING_WORKERS:
+        return _timed(operation, function, args, time.perf_counter())
+    return await asyncio.wrap_future(_submit(operation, function, *args))
+
+
+def hash_password(raw_password: str) -> str:
+    return _run('make', make_password, raw_password)
+
+
+async def ahash_password(raw_password: str) -> str:
+    return await _arun('make', make_password, raw_password)
+
+
+def check_password(raw_password: str, encoded: str) -> tuple[bool, bool]:
+    """``(is_correct, must_update)``, as ``django.contrib.auth.hashers.verify_password``."""
+    return _run('check', verify_password, raw_password, encoded)
+
+
+async def acheck_password(raw_password: str, encoded: str) -> tuple[bool, bool]:
+    return await _arun('check', verify_password, raw_password, encoded)
@@ -0,0 +1,76 @@
+"""Prometheus metrics for password hashing (``hashing``) and refresh tokens (``tokens``)."""
+
+from __future__ import annotations
+
+from django.db import connection
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+
+HASHING_QUEUE_SECONDS = Histogram(
+    'nomad_password_hashing_queue_seconds',
+    'Time a password hash waited for a hashing thread.',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+HASHING_SECONDS = Histogram(
+    'nomad_password_hashing_seconds',
+    'Time spent computing a password hash.',
+    ['operation'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+HASHING_REJECTIONS = Counter(
+    'nomad_password_hashing_rejections',
+    'Sign-ins and sign-ups turned away because the hashing queue was full.',
+)
+BLACKLIST_SECONDS = Histogram(
+    'nomad_token_blacklist_seconds',
+    'Time to check, blacklist or record a refresh token.',
+    ['operation'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+BLACKLIST_REJECTIONS = Counter(
+    'nomad_token_blacklist_rejections',
+    'Reused refresh tokens, by where the reuse was detected (cache or database).',
+    ['source'],
+)
+
+
+class TokenTableCollector:
+    """Rows in the outstanding and blacklisted token tables when scraped.
+
+    PostgreSQL reports the planner's estimate, which is free, instead of a
+    ``COUNT(*)`` that has to scan tables that grow with every refresh.
+    """
+
+    def describe(self):
+        return [self._family()]
+
+    def collect(self):
+        from rest_framework_simplejwt.token_blacklist.models import (
+            BlacklistedToken,
+            OutstandingToken,
+        )
+
+        family = self._family()
+        for table, model in (('outstanding', OutstandingToken), ('blacklisted', BlacklistedToken)):
+            family.add_metric([table], self._rows(model))
+        yield family
+
+    def _rows(self, model) -> int:
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                    [model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            # -1 until the table was first analyzed
+            if row is not None and row[0] >= 0:
+                return int(row[0])
+        return model.objects.count()
+
+    def _family(self):
+        return GaugeMetricFamily(
+            'nomad_token_rows',
+            'Rows in the refresh token tables (estimated on PostgreSQL).',
+            labels=['table'],
+        )
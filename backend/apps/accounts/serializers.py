@@ -1,9 +1,33 @@
 from __future__ import annotations
 
-from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from contextlib import contextmanager
 
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import update_last_login
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException, AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from . import hashing
 from .models import User
+from .tokens import RefreshToken
+
+
+class TooManySignIns(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-ins at once, try again shortly.'
+    default_code = 'hashing_busy'
+    wait = 1  # seconds, sent as Retry-After
+
+
+@contextmanager
+def hashing_or_503():
+    """Answer a full password hashing pool (``hashing.HashingBusy``) with 503."""
+    try:
+        yield
+    except hashing.HashingBusy:
+        raise TooManySignIns() from None
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -21,17 +45,43 @@ class SignUpSerializer(serializers.ModelSerializer):
         fields = ('email', 'full_name', 'password')
 
     def create(self, validated_data):
-        password = validated_data.pop('password')
-        return User.objects.create_user(password=password, **validated_data)
+        with hashing_or_503():
+            validated_data['password'] = hashing.hash_password(validated_data['password'])
+        validated_data['email'] = User.objects.normalize_email(validated_data['email'])
+        return User.objects.create(**validated_data)
 
 
 class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
     username_field = User.USERNAME_FIELD
+    token_class = RefreshToken
 
     def validate(self, attrs):
-        data = super().validate(attrs)
-        data['user'] = UserSerializer(self.user).data
-        return data
+        credentials = {
+            self.username_field: attrs[self.username_field],
+            'password': attrs['password'],
+        }
+        with hashing_or_503():
+            self.user = authenticate(self.context.get('request'), pooled=True, **credentials)
+        if not api_settings.USER_AUTHENTICATION_RULE(self.user):
+            raise AuthenticationFailed(
+                self.error_messages['no_active_account'], 'no_active_account'
+            )
+        return self.signed_in(self.user)
+
+    def signed_in(self, user) -> dict:
+        """Tokens and profile for an authenticated ``user`` (also used by the async view)."""
+        refresh = self.get_token(user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
+        return {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+            'user': UserSerializer(user).data,
+        }
+
+
+class SessionRefreshSerializer(TokenRefreshSerializer):
+    token_class = RefreshToken
 
 
 class SignUpResponseSerializer(serializers.Serializer):
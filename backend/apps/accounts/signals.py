@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_cache_key
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance: User, **kwargs) -> None:
+    """Drop the cached copy used by CachedJWTAuthentication."""
+    cache.delete(user_cache_key(instance.pk))
@@ -0,0 +1,102 @@
+"""Refresh tokens with a cheap blacklist.
+
+simplejwt checks the blacklist with a join on every use of a refresh token,
+then blacklists it and records its rotated replacement through
+``get_or_create`` calls that each load the user again. Here:
+
+- a token is blacklisted by inserting its ``BlacklistedToken`` row. The
+  unique constraint on that row rejects a second use, so the database stays
+  the source of truth even when two refreshes race;
+- blacklisted ids are also kept in the cache until the token expires, so
+  replays are turned away without a query;
+- ``check_blacklist`` therefore only asks the cache. Every view that accepts
+  a refresh token (rotation, sign-out) blacklists it, which runs the
+  authoritative check.
+
+Expired tokens are deleted by ``prune``, which the analysis workers run
+periodically (``manage.py flushexpiredtokens`` does the same in one go).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken as _RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .metrics import BLACKLIST_REJECTIONS, BLACKLIST_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Expired tokens deleted per statement by prune()
+PRUNE_BATCH_SIZE = 1000
+# Cache entries outlive the token a little, covering leeway and clock skew
+CACHE_SLACK_SECONDS = 60
+
+
+def blacklist_cache_key(jti: str) -> str:
+    return f'accounts:blacklisted:{jti}'
+
+
+class RefreshToken(_RefreshToken):
+    def check_blacklist(self) -> None:
+        jti = self.payload[api_settings.JTI_CLAIM]
+        with BLACKLIST_SECONDS.labels('check').time():
+            blacklisted = cache.get(blacklist_cache_key(jti))
+        if blacklisted:
+            BLACKLIST_REJECTIONS.labels('cache').inc()
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self) -> BlacklistedToken:
+        """Blacklist this token; raises ``TokenError`` if it already was."""
+        jti = self.payload[api_settings.JTI_CLAIM]
+        with BLACKLIST_SECONDS.labels('blacklist').time():
+            token_id = OutstandingToken.objects.filter(jti=jti).values_list('id', flat=True).first()
+            if token_id is None:
+                token_id = self._record().id
+            try:
+                with transaction.atomic():
+                    blacklisted = BlacklistedToken.objects.create(token_id=token_id)
+            except IntegrityError:
+                blacklisted = None
+        # Remembered even if an enclosing transaction rolls back: that only retires the token early
+        timeout = self.payload['exp'] - int(time.time()) + CACHE_SLACK_SECONDS
+        cache.set(blacklist_cache_key(jti), True, max(timeout, 1))
+        if blacklisted is None:
+            BLACKLIST_REJECTIONS.labels('database').inc()
+            raise TokenError(_('Token is blacklisted'))
+        return blacklisted
+
+    def outstand(self) -> OutstandingToken:
+        with BLACKLIST_SECONDS.labels('outstand').time():
+            return self._record()
+
+    def _record(self) -> OutstandingToken:
+        # Rotated tokens get a fresh jti, so there is nothing to look up first
+        return OutstandingToken.objects.create(
+            user_id=self.payload.get(api_settings.USER_ID_CLAIM),
+            jti=self.payload[api_settings.JTI_CLAIM],
+            token=str(self),
+            created_at=self.current_time,
+            expires_at=datetime_from_epoch(self.payload['exp']),
+        )
+
+
+def prune() -> int:
+    """Delete expired refresh tokens and their blacklist entries."""
+    expired = OutstandingToken.objects.filter(expires_at__lt=timezone.now())
+    deleted = 0
+    while ids := list(expired.values_list('id', flat=True)[:PRUNE_BATCH_SIZE]):
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+    if deleted:
+        logger.info(f'Deleted {deleted} expired refresh token(s)')
+    return deleted
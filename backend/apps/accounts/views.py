@@ -4,15 +4,16 @@ from django.contrib.auth import get_user_model
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView as _TokenRefreshView
 
 from .serializers import (
     EmailTokenObtainPairSerializer,
+    SessionRefreshSerializer,
     SignUpResponseSerializer,
     SignUpSerializer,
     UserSerializer,
 )
+from .tokens import RefreshToken
 
 User = get_user_model()
 
@@ -41,6 +42,7 @@ class SignInView(TokenObtainPairView):
 
 
 class SessionRefreshView(_TokenRefreshView):
+    serializer_class = SessionRefreshSerializer
     permission_classes = (permissions.AllowAny,)
 
 
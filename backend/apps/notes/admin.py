@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Note, NoteImage
+from .models import AnalysisCacheEntry, Note, NoteImage
 
 
 @admin.register(Note)
@@ -23,3 +23,16 @@ class NoteImageAdmin(admin.ModelAdmin):
     search_fields = ('note__title', 'ocr_text')
     ordering = ('-uploaded_at',)
     readonly_fields = ('checksum', 'file_size', 'uploaded_at')
+
+
+@admin.register(AnalysisCacheEntry)
+class AnalysisCacheEntryAdmin(admin.ModelAdmin):
+    list_display = (
+        'checksum', 'provider', 'hit_count', 'miss_count', 'compute_seconds', 'last_hit_at'
+    )
+    list_filter = ('provider',)
+    search_fields = ('checksum',)
+    ordering = ('-last_hit_at',)
+    readonly_fields = (
+        'checksum', 'provider', 'hit_count', 'miss_count', 'compute_seconds', 'created_at'
+    )
@@ -0,0 +1,82 @@
+"""Reuse vision analysis results for images whose bytes were analyzed before.
+
+Entries are keyed by ``(checksum, provider identity)`` so that upgrading
+Tesseract or switching providers naturally starts from a cold cache.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import AnalysisCacheEntry, NoteImage
+from .vision import VisionResult
+
+logger = logging.getLogger(__name__)
+
+# NoteImage fields written when an analysis result is applied
+RESULT_FIELDS = [
+    'analysis_status',
+    'ocr_text',
+    'object_labels',
+    'analysis_error',
+    'analysis_lease_expires_at',
+]
+
+
+def lookup(checksum: str, provider: str) -> AnalysisCacheEntry | None:
+    """Return the cached result for an image, counting the hit."""
+    if not checksum:
+        return None
+
+    entry = AnalysisCacheEntry.objects.filter(checksum=checksum, provider=provider).first()
+    if entry is not None:
+        AnalysisCacheEntry.objects.filter(pk=entry.pk).update(
+            hit_count=F('hit_count') + 1,
+            last_hit_at=timezone.now(),
+        )
+        logger.info(f'Analysis cache hit for {checksum[:12]} ({provider})')
+    return entry
+
+
+def store(checksum: str, provider: str, result: VisionResult, compute_seconds: float) -> None:
+    """Remember a successful analysis."""
+    if not checksum or not result.success:
+        return
+
+    try:
+        with transaction.atomic():
+            AnalysisCacheEntry.objects.create(
+                checksum=checksum,
+                provider=provider,
+                ocr_text=result.ocr_text,
+                object_labels=result.object_labels,
+                compute_seconds=compute_seconds,
+            )
+    except IntegrityError:
+        # The same image was analyzed concurrently; keep the first result.
+        AnalysisCacheEntry.objects.filter(checksum=checksum, provider=provider).update(
+            miss_count=F('miss_count') + 1,
+        )
+
+
+def apply(note_image: NoteImage, entry: AnalysisCacheEntry) -> None:
+    """Copy a cached result onto ``note_image`` (without saving it)."""
+    note_image.analysis_status = NoteImage.AnalysisStatus.COMPLETED
+    note_image.ocr_text = entry.ocr_text
+    note_image.object_labels = entry.object_labels
+    note_image.analysis_error = ''
+    note_image.analysis_lease_expires_at = None
+
+
+def stats() -> dict[str, float]:
+    """Aggregate hit/miss counters and the analysis time saved by hits."""
+    totals = AnalysisCacheEntry.objects.aggregate(
+        hits=Sum('hit_count'),
+        misses=Sum('miss_count'),
+        saved_seconds=Sum(F('hit_count') * F('compute_seconds')),
+    )
+    return {key: value or 0 for key, value in totals.items()}
@@ -5,3 +5,11 @@ class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.notes'
     label = 'notes'
+
+    def ready(self):
+        from nomad_backend.metrics import register_collector
+
+        from . import signals  # noqa: F401
+        from .metrics import AnalysisQueueCollector
+
+        register_collector(AnalysisQueueCollector())
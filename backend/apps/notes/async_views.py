@@ -0,0 +1,161 @@
+"""Async list/retrieve/create for the notes API, used when serving over ASGI.
+
+``nomad_backend.asgi_urls`` routes ``/api/notes/`` and ``/api/notes/<id>/`` here
+for ASGI requests (see ``nomad_backend.middleware``). Reads go through the
+async ORM, so a slow client waiting on its response holds a coroutine rather
+than a worker thread. JSON creates validate on the event loop and only hop to
+a thread for the transactional write; every other method (and multipart image
+uploads) runs the regular ``NoteViewSet`` code in a thread.
+
+``note_events`` (the SSE stream) is routed under WSGI as well, where it degrades
+to a one-shot response.
+"""
+
+from __future__ import annotations
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import NotAuthenticated, NotFound, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+
+from apps.accounts.authentication import CachedJWTAuthentication
+from nomad_backend import metrics
+from nomad_backend.async_api import api_view, render
+
+from . import conditional, events, listing
+from .models import Note
+from .pagination import NoteCursorPagination
+from .serializers import NoteSerializer
+from .views import NoteViewSet, attach_upload
+
+_sync_list = NoteViewSet.as_view({'get': 'list', 'post': 'create'})
+_sync_detail = NoteViewSet.as_view({
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy',
+})
+
+_authenticator = CachedJWTAuthentication()
+
+
+async def _authenticate(request) -> Request:
+    drf_request = Request(request, parsers=[JSONParser()])
+    result = await _authenticator.aauthenticate(drf_request)
+    if result is None:
+        raise NotAuthenticated()
+    drf_request.user, drf_request.auth = result
+    return drf_request
+
+
+def _queryset(user):
+    return Note.objects.filter(owner=user).select_related('image')
+
+
+def _create_note(serializer: NoteSerializer, user) -> dict:
+    with transaction.atomic():
+        note = serializer.save(owner=user)
+        if 'upload_id' in serializer.validated_data:
+            attach_upload(note, serializer.validated_data['upload_id'])
+    # Serializing looks up the (missing) image relation, so it stays in the thread
+    return serializer.data
+
+
+@api_view
+async def note_list(request):
+    if request.method == 'POST' and request.content_type == 'application/json':
+        return await _create(request)
+    if request.method != 'GET':
+        return await sync_to_async(_sync_list)(request)
+
+    drf_request = await _authenticate(request)
+    validators = await conditional.alist_validators(request, drf_request.user.id)
+    not_modified = conditional.not_modified(request, validators)
+    if not_modified is not None:
+        return not_modified
+
+    queryset = _queryset(drf_request.user)
+    if NoteViewSet.fast_list:
+        queryset = listing.note_rows(queryset)
+
+    def serialize(notes):
+        with metrics.phase('serialize'):
+            if NoteViewSet.fast_list:
+                return listing.serialize_rows(notes, drf_request)
+            return NoteSerializer(notes, many=True, context={'request': drf_request}).data
+
+    paginator = NoteCursorPagination()
+    page = await paginator.apaginate_queryset(queryset, drf_request)
+    if page is not None:
+        response = render({'next': paginator.get_next_link(), 'results': serialize(page)})
+    else:
+        response = render(serialize([note async for note in queryset]))
+    return conditional.set_validators(response, validators)
+
+
+async def _create(request):
+    drf_request = await _authenticate(request)
+    serializer = NoteSerializer(data=drf_request.data, context={'request': drf_request})
+    serializer.is_valid(raise_exception=True)
+    data = await sync_to_async(_create_note)(serializer, drf_request.user)
+    return render(data, status.HTTP_201_CREATED)
+
+
+@api_view
+async def note_detail(request, pk):
+    if request.method != 'GET':
+        return await sync_to_async(_sync_detail)(request, pk=str(pk))
+
+    drf_request = await _authenticate(request)
+    validators = await conditional.anote_validators(request, drf_request.user.id, pk)
+    not_modified = conditional.not_modified(request, validators)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        note = await _queryset(drf_request.user).aget(pk=pk)
+    except Note.DoesNotExist:
+        raise NotFound('No Note matches the given query.') from None
+    with metrics.phase('serialize'):
+        data = NoteSerializer(note, context={'request': drf_request}).data
+    response = render(data)
+    return conditional.set_validators(response, validators)
+
+
+def _last_event_id(request) -> int | None:
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({'last_event_id': 'Must be an integer.'}) from None
+
+
+@api_view
+async def note_events(request):
+    """Server-Sent Events stream of the user's note changes."""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    drf_request = await _authenticate(request)
+    after_id = _last_event_id(request)
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(
+            events.stream(drf_request.user.id, after_id),
+            content_type='text/event-stream',
+        )
+    else:
+        # A WSGI worker can't be parked on an open stream: send what was missed
+        # and let the client reconnect after the advertised retry delay.
+        response = HttpResponse(
+            await events.snapshot(drf_request.user.id, after_id),
+            content_type='text/event-stream',
+        )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,137 @@
+"""Apply a batch of note create/update/delete operations in one transaction.
+
+Offline clients replay queued edits through this path. Every operation is
+validated individually with ``NoteSerializer`` and gets its own result, but the
+writes are grouped: one ``bulk_create``, one ``bulk_update`` and one queryset
+delete, so a batch costs a fixed number of queries rather than a few per note.
+Only ``title`` and ``body`` are written; operations that try to attach an image
+(``upload_id``, ``image_file``) are rejected, since attaching is per-note work
+done through the note endpoints.
+"""
+
+from __future__ import annotations
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+
+from . import search
+from .models import Note, SyncClock
+from .serializers import NoteSerializer
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+
+_WRITABLE_FIELDS = ('title', 'body')
+_IMAGE_FIELDS = ('upload_id', 'image_file')
+_IMAGE_ERROR = 'Images cannot be attached in a batch; send it to the note endpoint.'
+
+
+def _error(code: int, errors) -> dict:
+    return {'status': code, 'errors': errors}
+
+
+def _image_errors(data: dict) -> dict:
+    return {key: [_IMAGE_ERROR] for key in _IMAGE_FIELDS if key in data}
+
+
+def _ocr_text(note: Note) -> str:
+    # The image relation was loaded with select_related, so this never queries
+    return note.image.ocr_text if hasattr(note, 'image') else ''
+
+
+def apply_operations(owner, operations: list[dict], context: dict) -> list[dict]:
+    """Apply validated operation envelopes and return one result per operation."""
+    results: list[dict | None] = [None] * len(operations)
+
+    target_ids = [op['id'] for op in operations if op['op'] in (UPDATE, DELETE)]
+    targets = Note.objects.filter(owner=owner, pk__in=target_ids).select_related('image').in_bulk()
+
+    creates: list[tuple[int, Note]] = []
+    updates: list[tuple[int, Note]] = []
+    deletes: list[tuple[int, Note]] = []
+    claimed = set()
+
+    for index, op in enumerate(operations):
+        if op['op'] != DELETE and (errors := _image_errors(op['data'])):
+            results[index] = _error(status.HTTP_400_BAD_REQUEST, errors)
+            continue
+
+        if op['op'] == CREATE:
+            serializer = NoteSerializer(data=op['data'], context=context)
+            if not serializer.is_valid():
+                results[index] = _error(status.HTTP_400_BAD_REQUEST, serializer.errors)
+                continue
+            fields = {
+                key: value
+                for key, value in serializer.validated_data.items()
+                if key in _WRITABLE_FIELDS
+            }
+            creates.append((index, Note(owner=owner, **fields)))
+            continue
+
+        note = targets.get(op['id'])
+        if note is None:
+            results[index] = _error(status.HTTP_404_NOT_FOUND, {'detail': 'Not found.'})
+            continue
+        if note.pk in claimed:
+            results[index] = _error(
+                status.HTTP_400_BAD_REQUEST,
+                {'id': 'A note may appear in only one update or delete operation per batch.'},
+            )
+            continue
+        claimed.add(note.pk)
+
+        if op['op'] == DELETE:
+            deletes.append((index, note))
+            continue
+
+        serializer = NoteSerializer(note, data=op['data'], partial=True, context=context)
+        if not serializer.is_valid():
+            results[index] = _error(status.HTTP_400_BAD_REQUEST, serializer.errors)
+            continue
+        for key in _WRITABLE_FIELDS:
+            if key in serializer.validated_data:
+                setattr(note, key, serializer.validated_data[key])
+        updates.append((index, note))
+
+    with transaction.atomic():
+        written = [note for _, note in creates] + [note for _, note in updates]
+        if written:
+            # Reserve one sync revision per written note in a single clock update
+            last = SyncClock.advance(owner.pk, count=len(written))
+            for revision, note in enumerate(written, start=last - len(written) + 1):
+                note.revision = revision
+
+        now = timezone.now()
+        for _, note in updates:
+            note.updated_at = now  # bulk_update bypasses auto_now
+
+        Note.objects.bulk_create([note for _, note in creates])
+        if updates:
+            Note.objects.bulk_update(
+                [note for _, note in updates], [*_WRITABLE_FIELDS, 'updated_at', 'revision']
+            )
+        if deletes:
+            Note.objects.filter(pk__in=[note.pk for _, note in deletes]).delete()
+
+        search.write_rows(
+            [(note.pk, owner.pk, note.title, note.body, '') for _, note in creates]
+            + [(note.pk, owner.pk, note.title, note.body, _ocr_text(note)) for _, note in updates]
+        )
+
+    # Re-read written notes in one query so their images serialize without N lookups
+    fresh = (
+        Note.objects.filter(pk__in=[note.pk for note in written])
+        .select_related('image')
+        .in_bulk()
+    )
+    for code, group in ((status.HTTP_201_CREATED, creates), (status.HTTP_200_OK, updates)):
+        for index, note in group:
+            note_data = NoteSerializer(fresh[note.pk], context=context).data
+            results[index] = {'status': code, 'note': note_data}
+    for index, _ in deletes:
+        results[index] = {'status': status.HTTP_204_NO_CONTENT}
+
+    return results
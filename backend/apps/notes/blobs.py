@@ -0,0 +1,75 @@
+"""Reference counting for the content-addressed image store.
+
+``apps.notes.signals`` calls ``acquire`` when a ``NoteImage`` pointing at a
+blob is created and ``release`` when one is deleted, inside the same
+transaction, so ``MediaBlob.ref_count`` always matches the committed rows.
+Files are only removed by ``prune``, once a blob has been unreferenced for
+``MEDIA_BLOB_GRACE_SECONDS``: an upload of the same content during that time
+simply reuses the file.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import MediaBlob
+from .renditions import RENDITIONS
+from .storage import blob_storage, derived_name
+
+logger = logging.getLogger(__name__)
+
+# Blobs deleted per prune() call
+PRUNE_BATCH_SIZE = 500
+
+
+def acquire(checksum: str, name: str, size: int, count: int = 1) -> None:
+    """Add ``count`` references to the blob stored at ``name``."""
+    changes = {'ref_count': F('ref_count') + count, 'updated_at': timezone.now()}
+    if MediaBlob.objects.filter(checksum=checksum).update(**changes):
+        return
+    # A prune may have removed the file after the upload found it in place
+    if not blob_storage.exists(name):
+        raise FileNotFoundError(f'Blob {name} disappeared before it was referenced')
+    try:
+        with transaction.atomic():
+            MediaBlob.objects.create(checksum=checksum, name=name, size=size, ref_count=count)
+    except IntegrityError:
+        MediaBlob.objects.filter(checksum=checksum).update(**changes)
+
+
+def release(checksum: str) -> None:
+    """Drop one reference; the file stays until ``prune`` finds it unused."""
+    MediaBlob.objects.filter(checksum=checksum, ref_count__gt=0).update(
+        ref_count=F('ref_count') - 1, updated_at=timezone.now()
+    )
+
+
+def files(name: str) -> list[str]:
+    """The blob and the renditions stored next to it."""
+    return [name, *(derived_name(name, suffix, 'webp') for _, suffix, _ in RENDITIONS)]
+
+
+def prune() -> int:
+    """Delete blobs unreferenced for longer than ``MEDIA_BLOB_GRACE_SECONDS``."""
+    cutoff = timezone.now() - timedelta(seconds=settings.MEDIA_BLOB_GRACE_SECONDS)
+    unused = MediaBlob.objects.filter(ref_count=0, updated_at__lt=cutoff)
+    deleted = 0
+    for checksum in unused.values_list('checksum', flat=True)[:PRUNE_BATCH_SIZE]:
+        with transaction.atomic():
+            # Re-check under the row lock: an upload may have just taken a reference
+            blob = unused.select_for_update().filter(checksum=checksum).first()
+            if blob is None:
+                continue
+            for name in files(blob.name):
+                blob_storage.delete(name)
+            blob.delete()
+            deleted += 1
+    if deleted:
+        logger.info(f'Deleted {deleted} unused image blob(s)')
+    return deleted
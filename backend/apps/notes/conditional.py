@@ -0,0 +1,119 @@
+"""Conditional GET (``ETag`` / ``Last-Modified``) for note reads.
+
+The validators come from the owner's ``SyncClock``, which advances on every
+change that shows up in a note's representation (edits, deletes, analysis
+status, renditions). Checking them costs one primary-key lookup, so an
+unchanged refresh answers ``304 Not Modified`` without loading or serializing
+any note. ``If-None-Match`` is the precise check; ``If-Modified-Since`` only
+has one-second resolution, so ``Last-Modified`` is left out until the second of
+the last change is over (a later change in it would compare as unmodified).
+Image URLs in the body expire (``apps.notes.media``), so both validators also
+change whenever fresh URLs start being issued.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timedelta
+
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from . import media
+from .models import Note, SyncClock
+
+Validators = tuple[str, datetime | None]
+
+
+def _etag(request, *parts) -> str:
+    # The body also depends on the URL (query params, absolute image URLs) and
+    # the negotiated format, so they are part of the tag.
+    key = '|'.join(
+        [*map(str, parts), request.build_absolute_uri(), request.META.get('HTTP_ACCEPT', '')]
+    )
+    return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+
+def _clock(owner_id):
+    return SyncClock.objects.filter(owner_id=owner_id).values_list('value', 'updated_at')
+
+
+def _note(owner_id, note_id):
+    try:
+        return Note.objects.filter(owner_id=owner_id, pk=note_id).values_list(
+            'revision', 'owner__note_sync_clock__updated_at'
+        )
+    except ValidationError:  # not a UUID; the view answers 404
+        return Note.objects.none()
+
+
+def _validators(request, updated_at, *parts) -> Validators:
+    expires = media.url_expiry()
+    issued = media.url_window_start(expires)
+    if issued is not None and (updated_at is None or issued > updated_at):
+        updated_at = issued
+    if updated_at is not None and updated_at > timezone.now() - timedelta(seconds=1):
+        updated_at = None
+    return _etag(request, *parts, expires), updated_at
+
+
+def _list_validators(request, owner_id, clock) -> Validators:
+    value, updated_at = clock or (0, None)
+    return _validators(request, updated_at, owner_id, value)
+
+
+def _note_validators(request, owner_id, note_id, row) -> Validators | None:
+    if row is None:
+        return None
+    revision, updated_at = row
+    return _validators(request, updated_at, owner_id, note_id, revision)
+
+
+def list_validators(request, owner_id) -> Validators:
+    """Validators for the owner's note list."""
+    return _list_validators(request, owner_id, _clock(owner_id).first())
+
+
+async def alist_validators(request, owner_id) -> Validators:
+    return _list_validators(request, owner_id, await _clock(owner_id).afirst())
+
+
+def note_validators(request, owner_id, note_id) -> Validators | None:
+    """Validators for one note, or ``None`` if the owner has no such note."""
+    return _note_validators(request, owner_id, note_id, _note(owner_id, note_id).first())
+
+
+async def anote_validators(request, owner_id, note_id) -> Validators | None:
+    return _note_validators(request, owner_id, note_id, await _note(owner_id, note_id).afirst())
+
+
+def not_modified(request, validators: Validators | None) -> HttpResponse | None:
+    """Return a 304 response if the client's cached copy is still current."""
+    if validators is None:
+        return None
+    etag, last_modified = validators
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, validators)
+    return response
+
+
+def set_validators(response, validators: Validators | None):
+    """Attach validators and cache headers to a 200 or 304 response."""
+    if validators is None or response.status_code not in (200, 304):
+        return response
+    etag, last_modified = validators
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Per-user data: caches may keep it but must revalidate every time
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Accept', 'Authorization'])
+    return response
@@ -0,0 +1,197 @@
+"""Per-user Server-Sent Events stream of note changes.
+
+Publishing appends ``NoteEvent`` rows, so any process (web or analysis worker)
+can publish and every web process sees the same events. Each ASGI process runs
+one ``EventHub`` that polls the table for new rows every ``EVENTS_POLL_SECONDS``
+while it has subscribers and fans them out to the open streams of their owner,
+which costs one indexed query per interval regardless of how many clients are
+connected.
+
+Row ids are taken when a row is inserted but become visible when it commits, so
+concurrent publishers can make id 11 visible before id 10. Ids are therefore
+only treated as settled once their rows are ``EVENTS_SETTLE_SECONDS`` old: the
+hub keeps rescanning newer rows (skipping ones it already delivered), and the
+``id:`` sent with each frame is the settled cursor rather than the row id. A
+client reconnecting with ``Last-Event-ID`` gets everything after that cursor
+(within ``EVENTS_RETENTION_SECONDS``), so it may see an event twice but does
+not miss one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import weakref
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import NoteEvent, NoteImage
+
+logger = logging.getLogger(__name__)
+
+# Most missed events replayed to a reconnecting client
+BACKLOG_LIMIT = 500
+
+
+def publish_analysis(note_image_ids: Iterable) -> None:
+    """Publish the current analysis status of the given images to their owners."""
+    rows = NoteImage.objects.filter(pk__in=list(note_image_ids)).values_list(
+        'id', 'note_id', 'note__owner_id', 'analysis_status'
+    )
+    NoteEvent.objects.bulk_create([
+        NoteEvent(
+            owner_id=owner_id,
+            kind=NoteEvent.Kind.ANALYSIS,
+            payload={'note_id': str(note_id), 'image_id': str(image_id), 'analysis_status': status},
+        )
+        for image_id, note_id, owner_id, status in rows
+    ])
+
+
+def prune() -> int:
+    """Delete events older than ``EVENTS_RETENTION_SECONDS``."""
+    cutoff = timezone.now() - timedelta(seconds=settings.EVENTS_RETENTION_SECONDS)
+    count, _ = NoteEvent.objects.filter(created_at__lt=cutoff).delete()
+    return count
+
+
+def format_event(event: NoteEvent, cursor: int) -> str:
+    return f'id: {cursor}\nevent: {event.kind}\ndata: {json.dumps(event.payload)}\n\n'
+
+
+def format_cursor(cursor: int) -> str:
+    # An id-only message sets the client's Last-Event-ID without dispatching anything
+    return f'retry: {settings.EVENTS_RETRY_MILLISECONDS}\nid: {cursor}\n\n'
+
+
+def settle_cutoff():
+    return timezone.now() - timedelta(seconds=settings.EVENTS_SETTLE_SECONDS)
+
+
+async def settled_event_id() -> int:
+    """Newest id at or below which every event has committed."""
+    events = NoteEvent.objects.filter(created_at__lt=settle_cutoff()).order_by('-id')
+    event = await events.only('id').afirst()
+    return event.id if event else 0
+
+
+async def backlog(owner_id, after_id: int | None) -> tuple[list[NoteEvent], int]:
+    """The owner's events after ``after_id``, oldest first, and the cursor that follows them."""
+    cursor = await settled_event_id()
+    if after_id is None:
+        return [], cursor
+    events = NoteEvent.objects.filter(owner_id=owner_id, id__gt=after_id).order_by('id')
+    missed = [event async for event in events[:BACKLOG_LIMIT]]
+    cursor = max(cursor, after_id)
+    if len(missed) == BACKLOG_LIMIT:
+        # Truncated: resume after the last event sent, not past the ones left out
+        cursor = min(cursor, missed[-1].id)
+    return missed, cursor
+
+
+class EventHub:
+    """Polls ``NoteEvent`` for one event loop and hands rows to subscriber queues."""
+
+    def __init__(self):
+        self.subscribers: dict[object, set[asyncio.Queue]] = defaultdict(set)
+        # Settled cursor; ``delivered`` holds the ids above it already handed out
+        self.last_id = 0
+        self.delivered: set[int] = set()
+        self.task: asyncio.Task | None = None
+        self.lock = asyncio.Lock()
+
+    async def subscribe(self, owner_id) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        async with self.lock:
+            if self.task is None or self.task.done():
+                # Nobody was listening: start after the events that exist now
+                self.last_id = await settled_event_id()
+                recent = NoteEvent.objects.filter(id__gt=self.last_id).values_list('id', flat=True)
+                self.delivered = {event_id async for event_id in recent}
+                self.task = asyncio.create_task(self._poll())
+            self.subscribers[owner_id].add(queue)
+        return queue
+
+    def unsubscribe(self, owner_id, queue: asyncio.Queue) -> None:
+        queues = self.subscribers.get(owner_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[owner_id]
+
+    async def _poll(self) -> None:
+        while self.subscribers:
+            await asyncio.sleep(settings.EVENTS_POLL_SECONDS)
+            try:
+                await self._deliver_new()
+            except Exception:
+                logger.exception('Polling note events failed')
+
+    async def _deliver_new(self) -> None:
+        # Rows above the settled cursor are read again on every poll: one that
+        # committed late, with a lower id than rows already seen, still turns up
+        cutoff = settle_cutoff()
+        settled = self.last_id
+        async for event in NoteEvent.objects.filter(id__gt=self.last_id).order_by('id'):
+            if event.created_at < cutoff:
+                settled = event.id
+            if event.id in self.delivered:
+                continue
+            self.delivered.add(event.id)
+            for queue in self.subscribers.get(event.owner_id, ()):
+                queue.put_nowait((event, self.last_id))
+        self.last_id = settled
+        self.delivered = {event_id for event_id in self.delivered if event_id > settled}
+
+
+_hubs: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, EventHub] = weakref.WeakKeyDictionary()
+
+
+def get_hub() -> EventHub:
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = EventHub()
+    return hub
+
+
+async def stream(owner_id, after_id: int | None) -> AsyncIterator[str]:
+    """Yield SSE frames for ``owner_id`` until the client disconnects.
+
+    Starts with the events after ``after_id`` (if given) and then follows new
+    ones, sending a comment every ``EVENTS_KEEPALIVE_SECONDS`` to keep proxies
+    from closing an idle connection.
+    """
+    hub = get_hub()
+    queue = await hub.subscribe(owner_id)
+    try:
+        missed, cursor = await backlog(owner_id, after_id)
+        for event in missed:
+            yield format_event(event, cursor)
+        yield format_cursor(cursor)
+
+        replayed = {event.id for event in missed}
+        while True:
+            try:
+                event, settled = await asyncio.wait_for(
+                    queue.get(), timeout=settings.EVENTS_KEEPALIVE_SECONDS
+                )
+            except TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if event.id not in replayed:
+                cursor = max(cursor, settled)
+                yield format_event(event, cursor)
+    finally:
+        hub.unsubscribe(owner_id, queue)
+
+
+async def snapshot(owner_id, after_id: int | None) -> str:
+    """Missed events plus a cursor, for servers that cannot hold the stream open."""
+    missed, cursor = await backlog(owner_id, after_id)
+    return ''.join(format_event(event, cursor) for event in missed) + format_cursor(cursor)
@@ -0,0 +1,23 @@
+"""Render missing thumbnails and previews for existing note images."""
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.notes.models import Note, NoteImage
+from apps.notes.renditions import ensure_renditions
+
+
+class Command(BaseCommand):
+    help = 'Render missing WebP thumbnails and previews for existing note images.'
+
+    def handle(self, *args, **options):
+        missing = NoteImage.objects.filter(Q(thumbnail='') | Q(preview=''))
+        rendered = 0
+        for note_image in missing.iterator(chunk_size=200):
+            ensure_renditions(note_image)
+            # New rendition URLs change the note's representation
+            Note.bump_revision(note_image.note_id)
+            rendered += 1
+        self.stdout.write(self.style.SUCCESS(f'Processed {rendered} image(s)'))
@@ -0,0 +1,112 @@
+"""Move note images stored per note (notes/<id>/...) into the blob store."""
+
+from __future__ import annotations
+
+import os
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.notes import blobs
+from apps.notes.models import MediaBlob, Note, NoteImage
+from apps.notes.renditions import RENDITIONS
+from apps.notes.storage import BLOB_PREFIX, blob_name, blob_storage, derived_name
+
+
+def _move(source: str, target: str) -> None:
+    """Rename ``source`` to ``target``, or drop it when ``target`` holds the same content."""
+    source_path, target_path = blob_storage.path(source), blob_storage.path(target)
+    if os.path.exists(target_path):
+        if os.path.exists(source_path):
+            os.unlink(source_path)
+        return
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    os.replace(source_path, target_path)
+
+
+class Command(BaseCommand):
+    help = 'Move note images stored per note into the content-addressed blob store.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--dry-run', action='store_true', help='Only count the images that would move'
+        )
+
+    def handle(self, *args, **options):
+        legacy = NoteImage.objects.exclude(image__startswith=BLOB_PREFIX).exclude(image='')
+        if options['dry_run']:
+            self.stdout.write(f'{legacy.count()} image(s) to move')
+            return
+
+        moved = missing = 0
+        shared = set()
+        pending = legacy.select_related('note').order_by('pk')
+        while batch := list(pending[: options['batch_size']]):
+            # Images whose file is missing stay behind, so page by primary key
+            pending = pending.filter(pk__gt=batch[-1].pk)
+            for note_image in batch:
+                if not note_image.checksum and blob_storage.exists(note_image.image.name):
+                    note_image.checksum = note_image.calculate_checksum()
+            names = dict(
+                MediaBlob.objects.filter(
+                    checksum__in={note_image.checksum for note_image in batch}
+                ).values_list('checksum', 'name')
+            )
+            references = Counter()
+            directories = set()
+            migrated = []
+            for note_image in batch:
+                source = note_image.image.name
+                found = blob_storage.exists(source)
+                checksum = note_image.checksum
+                target = names.get(checksum) or blob_name(checksum, source)
+                # An earlier run may have moved the file before it could update the row
+                if not checksum or not (found or blob_storage.exists(target)):
+                    self.stderr.write(f'Missing file {source} (image {note_image.id})')
+                    missing += 1
+                    continue
+                if checksum in names:
+                    shared.add(checksum)
+                names[checksum] = target
+                _move(source, target)
+                note_image.image = target
+                for field, suffix, _ in RENDITIONS:
+                    rendition = getattr(note_image, field).name
+                    shared_name = derived_name(target, suffix, 'webp')
+                    if rendition and blob_storage.exists(rendition):
+                        _move(rendition, shared_name)
+                    if blob_storage.exists(shared_name):
+                        setattr(note_image, field, shared_name)
+                    else:
+                        setattr(note_image, field, '')  # left to generate_renditions
+                references[checksum] += 1
+                directories.add(os.path.dirname(blob_storage.path(source)))
+                migrated.append(note_image)
+
+            # Files first, then rows: a rerun after a crash finds the blobs and skips the move
+            with transaction.atomic():
+                NoteImage.objects.bulk_update(
+                    migrated, ['image', 'thumbnail', 'preview', 'checksum']
+                )
+                for checksum, count in references.items():
+                    size = blob_storage.size(names[checksum])
+                    blobs.acquire(checksum, names[checksum], size, count=count)
+                # Image URLs changed, so syncing clients must refetch these notes
+                for note_image in migrated:
+                    Note.bump_revision(note_image.note_id, note_image.note.owner_id)
+            moved += len(migrated)
+
+            for directory in directories:
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    pass  # still holds other files
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Moved {moved} image(s); {len(shared)} blob(s) shared by duplicates, '
+                f'{missing} missing file(s) skipped'
+            )
+        )
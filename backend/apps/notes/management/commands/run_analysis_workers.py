@@ -0,0 +1,127 @@
+"""Run the image analysis worker pool."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from apps.accounts import tokens
+from apps.notes import blobs, events, queue, uploads
+from apps.notes.worker import init_worker, run_job
+
+logger = logging.getLogger(__name__)
+
+# How often the runner deletes expired note events, upload sessions, refresh tokens and
+# unused blobs
+PRUNE_EVENTS_EVERY = 60.0
+
+
+class Command(BaseCommand):
+    help = (
+        'Process pending note image analyses with a bounded pool of worker processes. '
+        'Jobs are leased from the database, so several runners can share one queue.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.ANALYSIS_WORKER_CONCURRENCY,
+            help='Number of worker processes (default: ANALYSIS_WORKER_CONCURRENCY).',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.ANALYSIS_POLL_SECONDS,
+            help='Seconds to wait between queue polls when idle.',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once the queue is drained instead of polling forever.',
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(options['concurrency'], 1)
+        poll_interval = options['poll_interval']
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        # Never hand an open connection across a process boundary.
+        connections.close_all()
+
+        self.stdout.write(f'Starting {concurrency} analysis worker(s)')
+        while not self._stopping:
+            try:
+                with self._make_pool(concurrency) as pool:
+                    self._run(pool, concurrency, poll_interval, options['burst'])
+                break
+            except BrokenProcessPool:
+                # A worker died mid-job (e.g. OOM). Its rows keep their lease,
+                # which expires and lets the queue hand them out again.
+                logger.exception('Analysis worker pool broke; restarting it')
+
+        self.stdout.write('Analysis workers stopped')
+
+    def _make_pool(self, concurrency: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=concurrency,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            initargs=(concurrency,),
+        )
+
+    def _run(self, pool: ProcessPoolExecutor, concurrency: int, poll_interval: float, burst: bool):
+        in_flight: dict[Future, str] = {}
+        heartbeat_every = settings.ANALYSIS_LEASE_SECONDS / 3
+        last_heartbeat = time.monotonic()
+        last_prune = 0.0
+
+        while True:
+            close_old_connections()
+
+            if time.monotonic() - last_prune >= PRUNE_EVENTS_EVERY:
+                events.prune()
+                uploads.prune()
+                blobs.prune()
+                tokens.prune()
+                last_prune = time.monotonic()
+
+            if not self._stopping:
+                queue.fail_exhausted()
+                for note_image_id in queue.claim(concurrency - len(in_flight)):
+                    in_flight[pool.submit(run_job, note_image_id)] = note_image_id
+
+            if not in_flight:
+                if burst or self._stopping:
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            done, _ = wait(in_flight, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                note_image_id = in_flight.pop(future)
+                try:
+                    future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception:
+                    # The lease runs out and the job is retried by a later claim.
+                    logger.exception(f'Analysis job {note_image_id} crashed')
+
+            if in_flight and time.monotonic() - last_heartbeat >= heartbeat_every:
+                queue.heartbeat(in_flight.values())
+                last_heartbeat = time.monotonic()
+
+    def _request_stop(self, signum, frame):
+        logger.info('Stop requested; finishing in-flight analyses')
+        self._stopping = True
@@ -0,0 +1,219 @@
+"""Owner-checked serving of note images.
+
+Every image URL handed out by the API points at ``MEDIA_URL`` and carries the
+first characters of the image's checksum, the note id, an expiry time and a
+signature over all of them (``?v=...&n=...&e=...&sig=...``). Only the owner
+of a note ever receives its URLs, so the signature is what lets clients that
+cannot add an ``Authorization`` header (Flutter's ``Image.network``, ``<img>``
+tags) load images; a request with a bearer token is checked against the
+note's owner directly. The checksum in the URL changes whenever the image
+does, so responses are cached for a year.
+
+Blobs (``apps.notes.storage``) are shared by every note with the same content,
+so a signed URL is only honoured while its note still uses the file, and
+until its expiry: the end of the ``MEDIA_URL_EXPIRY_SECONDS`` window after the
+one it was issued in. URLs issued within one window are identical, which
+keeps clients' HTTP caches useful. A bearer token gets the file if any of the
+requester's notes uses it.
+
+``MEDIA_SENDFILE`` picks how the bytes leave:
+
+- ``x-accel-redirect``: nginx serves ``MEDIA_ACCEL_REDIRECT_PREFIX`` + name
+  from an ``internal`` location (Range and sendfile handled by nginx);
+- ``x-sendfile``: Apache/lighttpd serve the absolute path;
+- empty (the default): a ``FileResponse``, which WSGI servers such as
+  gunicorn send with ``sendfile(2)``. Single byte ranges are answered here.
+"""
+
+from __future__ import annotations
+
+import mimetypes
+import re
+import time
+from datetime import UTC, datetime
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils.crypto import constant_time_compare
+from django.utils.encoding import filepath_to_uri
+from django.utils.http import parse_etags, urlencode
+from rest_framework.exceptions import AuthenticationFailed
+
+from apps.accounts.authentication import CachedJWTAuthentication
+
+from .models import NoteImage
+from .storage import blob_checksum
+
+# Checksum characters embedded in URLs; enough to never collide for one note
+VERSION_LENGTH = 16
+FILE_FIELDS = ('image', 'thumbnail', 'preview')
+
+_signer = signing.Signer(salt='apps.notes.media')
+_authenticator = CachedJWTAuthentication()
+_note_path = re.compile(r'^notes/(?P<note_id>[0-9a-f-]{36})/[^/]+$')
+_range = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _signature(name: str, version: str, note_id: str, expires: str) -> str:
+    return _signer.signature(f'{name}:{version}:{note_id}:{expires}')
+
+
+def url_expiry() -> int:
+    """Expiry of URLs issued now (0: never, with ``MEDIA_URL_EXPIRY_SECONDS=0``)."""
+    window = settings.MEDIA_URL_EXPIRY_SECONDS
+    if not window:
+        return 0
+    return (int(time.time()) // window + 2) * window
+
+
+def url_window_start(expires: int) -> datetime | None:
+    """When URLs expiring at ``expires`` were first issued (responses embedding them changed)."""
+    if not expires:
+        return None
+    return datetime.fromtimestamp(expires - 2 * settings.MEDIA_URL_EXPIRY_SECONDS, tz=UTC)
+
+
+def url_query(name: str, checksum: str, note_id, expires: int | None = None) -> str:
+    """Query string that authorizes and versions the URL of ``name`` in note ``note_id``."""
+    version = checksum[:VERSION_LENGTH]
+    note_id = str(note_id)
+    expires = str(url_expiry() if expires is None else expires)
+    signature = _signature(name, version, note_id, expires)
+    return '?' + urlencode({'v': version, 'n': note_id, 'e': expires, 'sig': signature})
+
+
+def file_url(field_file, checksum: str, note_id) -> str:
+    return field_file.url + url_query(field_file.name, checksum, note_id)
+
+
+def _signed_note(request, name: str) -> str | None:
+    """Note id of a valid, unexpired signed URL for ``name``."""
+    query = request.GET
+    note_id, expires = query.get('n', ''), query.get('e', '')
+    signature = _signature(name, query.get('v', ''), note_id, expires)
+    if not constant_time_compare(query.get('sig', ''), signature):
+        return None
+    if expires == '0':
+        return None if settings.MEDIA_URL_EXPIRY_SECONDS else note_id
+    return note_id if int(expires) >= time.time() else None
+
+
+class _RangeFile:
+    """Reads at most ``length`` bytes from ``start``; keeps ``fileno`` for sendfile."""
+
+    def __init__(self, file, start: int, length: int):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _byte_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """``(start, end)`` of a single satisfiable range; raises ValueError if unsatisfiable."""
+    match = _range.match(header or '')
+    if match is None:
+        return None  # absent, malformed or several ranges: send the whole file
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), (min(int(last), size - 1) if last else size - 1)
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _images(name: str):
+    """Images that currently use the file ``name`` (replaced files are never served)."""
+    checksum = blob_checksum(name)
+    if checksum:
+        images = NoteImage.objects.filter(checksum=checksum)
+    else:
+        match = _note_path.match(name)
+        if match is None:
+            raise Http404()
+        images = NoteImage.objects.filter(note_id=match['note_id'])
+    return images.filter(Q(image=name) | Q(thumbnail=name) | Q(preview=name))
+
+
+def serve(request, name: str):
+    """Send a note image file to its owner."""
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    images = _images(name)
+    note_id = _signed_note(request, name)
+    if note_id is not None:
+        images = images.filter(note_id=note_id)
+    else:
+        try:
+            result = _authenticator.authenticate(request)
+        except AuthenticationFailed:
+            return HttpResponse(status=401)
+        if result is None:
+            raise Http404()
+        images = images.filter(note__owner_id=result[0].pk)
+    image = images.values(*FILE_FIELDS, 'checksum').first()
+    if image is None:
+        raise Http404()
+
+    checksum = image['checksum']
+    field = next(field for field in FILE_FIELDS if image[field] == name)
+    etag = f'"{checksum}"' if field == 'image' else f'"{checksum}-{field}"'
+    headers = {'ETag': etag, 'Vary': 'Authorization'}
+    if request.GET.get('v') == checksum[:VERSION_LENGTH]:
+        headers['Cache-Control'] = f'private, max-age={settings.MEDIA_CACHE_SECONDS}, immutable'
+    else:
+        headers['Cache-Control'] = 'private, no-cache'
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        return HttpResponse(status=304, headers=headers)
+
+    storage = NoteImage._meta.get_field(field).storage
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        headers['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + filepath_to_uri(name)
+        return HttpResponse(headers=headers, content_type=content_type)
+    if settings.MEDIA_SENDFILE == 'x-sendfile':
+        headers['X-Sendfile'] = storage.path(name)
+        return HttpResponse(headers=headers, content_type=content_type)
+
+    try:
+        file = storage.open(name, 'rb')
+    except FileNotFoundError:
+        raise Http404() from None
+    size = storage.size(name)
+    headers['Accept-Ranges'] = 'bytes'
+    # A stale If-Range validator asks for the whole (changed) file instead of a range
+    if_range = request.headers.get('If-Range')
+    range_header = None if if_range and if_range != etag else request.headers.get('Range')
+    try:
+        byte_range = _byte_range(range_header, size)
+    except ValueError:
+        file.close()
+        return HttpResponse(status=416, headers={**headers, 'Content-Range': f'bytes */{size}'})
+
+    start, end = byte_range or (0, size - 1)
+    response = FileResponse(
+        _RangeFile(file, start, end - start + 1), headers=headers, content_type=content_type
+    )
+    response['Content-Length'] = str(end - start + 1)
+    if byte_range is not None:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -0,0 +1,61 @@
+"""Prometheus metrics for the image analysis pipeline.
+
+Importable without configuring Django, like ``vision`` and ``preprocessing``
+which record into it.
+"""
+
+from __future__ import annotations
+
+from django.db.models import Count
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+
+PROVIDER_SECONDS = Histogram(
+    'nomad_analysis_provider_seconds',
+    'Time a vision provider took to analyze one image.',
+    ['provider'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+PROVIDER_FAILURES = Counter(
+    'nomad_analysis_provider_failures',
+    'Analysis attempts that a vision provider failed or raised on.',
+    ['provider'],
+)
+OCR_STAGE_SECONDS = Histogram(
+    'nomad_ocr_stage_seconds',
+    'Time spent in each step of OCR: image preprocessing stages and recognition.',
+    ['stage'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+# Statuses reported by the queue gauge; completed and failed only ever grow
+QUEUE_STATUSES = ('pending', 'processing')
+
+
+class AnalysisQueueCollector:
+    """Counts queued and in-flight images when scraped (one indexed query)."""
+
+    def describe(self):
+        # Registering a collector calls this instead of collect(), so no query runs at import
+        return [self._family()]
+
+    def collect(self):
+        from .models import NoteImage
+
+        counts = dict(
+            NoteImage.objects.filter(analysis_status__in=QUEUE_STATUSES)
+            .order_by()
+            .values_list('analysis_status')
+            .annotate(Count('id'))
+        )
+        family = self._family()
+        for status in QUEUE_STATUSES:
+            family.add_metric([status], counts.get(status, 0))
+        yield family
+
+    def _family(self):
+        return GaugeMetricFamily(
+            'nomad_analysis_images',
+            'Note images waiting for or undergoing analysis.',
+            labels=['status'],
+        )
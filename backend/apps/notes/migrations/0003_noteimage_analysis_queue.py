@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_noteimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='noteimage',
+            name='analysis_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='noteimage',
+            name='analysis_available_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time a worker may pick up the analysis'),
+        ),
+        migrations.AddField(
+            model_name='noteimage',
+            name='analysis_lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text='Worker lease; an expired lease marks the job as abandoned', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='noteimage',
+            index=models.Index(fields=['analysis_status', 'analysis_available_at'], name='notes_image_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_noteimage_analysis_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checksum', models.CharField(help_text='SHA256 hash of the analyzed image', max_length=64)),
+                ('provider', models.CharField(help_text='Provider identity, including its version', max_length=200)),
+                ('ocr_text', models.TextField(blank=True)),
+                ('object_labels', models.JSONField(default=list)),
+                ('compute_seconds', models.FloatField(default=0, help_text='Wall time of the analysis that produced this result')),
+                ('hit_count', models.PositiveIntegerField(default=0, help_text='Analyses skipped thanks to this entry')),
+                ('miss_count', models.PositiveIntegerField(default=1, help_text='Analyses that ran for this image')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('checksum', 'provider'), name='notes_analysis_cache_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_analysiscacheentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['owner', '-updated_at', '-id'], name='notes_note_owner_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_revisions(apps, schema_editor):
+    """Give existing notes distinct revisions so the first delta sync sees them."""
+    Note = apps.get_model('notes', 'Note')
+    SyncClock = apps.get_model('notes', 'SyncClock')
+
+    owner_ids = Note.objects.order_by().values_list('owner_id', flat=True).distinct()
+    for owner_id in owner_ids:
+        notes = list(Note.objects.filter(owner_id=owner_id).order_by('updated_at', 'id').only('id'))
+        for revision, note in enumerate(notes, start=1):
+            note.revision = revision
+        Note.objects.bulk_update(notes, ['revision'], batch_size=500)
+        SyncClock.objects.create(owner_id=owner_id, value=len(notes))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('notes', '0005_note_owner_updated_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteTombstone',
+            fields=[
+                ('note_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('revision', models.PositiveBigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SyncClock',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='note_sync_clock', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('value', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='Sync clock value of the latest change to this note'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['owner', 'revision'], name='notes_note_owner_revision_idx'),
+        ),
+        migrations.AddField(
+            model_name='notetombstone',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='note_tombstones', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='notetombstone',
+            index=models.Index(fields=['owner', 'revision'], name='notes_tombstone_revision_idx'),
+        ),
+        migrations.RunPython(backfill_revisions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+from apps.notes import search
+
+
+def create_search_index(apps, schema_editor):
+    search.create_index(schema_editor)
+
+    Note = apps.get_model('notes', 'Note')
+    rows = Note.objects.order_by().values_list('id', 'owner_id', 'title', 'body', 'image__ocr_text')
+    batch = []
+    for row in rows.iterator(chunk_size=1000):
+        batch.append(row)
+        if len(batch) == 1000:
+            search.write_rows(batch, schema_editor.connection)
+            batch = []
+    search.write_rows(batch, schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    search.drop_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0006_note_sync'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
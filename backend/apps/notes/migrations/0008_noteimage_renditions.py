@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:39
+
+import apps.notes.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0007_note_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='noteimage',
+            name='preview',
+            field=models.ImageField(blank=True, help_text='Medium WebP rendition for detail views', upload_to=apps.notes.models.note_image_upload_path),
+        ),
+        migrations.AddField(
+            model_name='noteimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, help_text='Small WebP rendition for list views', upload_to=apps.notes.models.note_image_upload_path),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:36
+
+import apps.notes.models
+import apps.notes.storage
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0010_imageupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('checksum', models.CharField(help_text='SHA256 of the content', max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(help_text='Storage name of the file', max_length=255, unique=True)),
+                ('size', models.PositiveIntegerField(help_text='File size in bytes')),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Last reference change; unreferenced blobs are kept for a grace period')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='noteimage',
+            name='image',
+            field=models.ImageField(storage=apps.notes.storage.ContentAddressedStorage(), upload_to=apps.notes.models.note_image_upload_path),
+        ),
+        migrations.AlterField(
+            model_name='noteimage',
+            name='preview',
+            field=models.ImageField(blank=True, help_text='Medium WebP rendition for detail views', storage=apps.notes.storage.ContentAddressedStorage(), upload_to=apps.notes.models.note_rendition_upload_path),
+        ),
+        migrations.AlterField(
+            model_name='noteimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, help_text='Small WebP rendition for list views', storage=apps.notes.storage.ContentAddressedStorage(), upload_to=apps.notes.models.note_rendition_upload_path),
+        ),
+        migrations.AddIndex(
+            model_name='noteimage',
+            index=models.Index(fields=['checksum'], name='notes_image_checksum_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mediablob',
+            index=models.Index(fields=['ref_count', 'updated_at'], name='notes_blob_unused_idx'),
+        ),
+    ]
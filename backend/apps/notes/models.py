@@ -2,15 +2,81 @@ from __future__ import annotations
 
 import hashlib
 import uuid
+from pathlib import PurePosixPath
 
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.utils import timezone
 
+from . import search
+from .storage import blob_name, blob_storage
+
 
 def note_image_upload_path(instance: NoteImage, filename: str) -> str:
-    """Generate upload path: notes/<note_id>/<filename>"""
-    return f'notes/{instance.note.id}/{filename}'
+    """Content-addressed blob name (see ``apps.notes.storage``).
+
+    Content stored before keeps its existing blob name, whatever this upload's
+    extension. Without a checksum the file goes to notes/<note_id>/<filename>.
+    """
+    if not instance.checksum:
+        return f'notes/{instance.note_id}/{filename}'
+    existing = MediaBlob.objects.filter(checksum=instance.checksum).values_list('name', flat=True)
+    return existing.first() or blob_name(instance.checksum, filename)
+
+
+def note_rendition_upload_path(instance: NoteImage, filename: str) -> str:
+    """Renditions live next to their original (shared along with it)."""
+    return str(PurePosixPath(instance.image.name).parent / filename)
+
+
+class SyncClock(models.Model):
+    """Per-owner counter that stamps every note change with a monotonic revision.
+
+    ``advance`` must run in the same transaction as the write it stamps: the
+    row lock it takes serializes an owner's writers, so revisions become
+    visible in order and a client never skips past an uncommitted change.
+    """
+
+    owner = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='note_sync_clock',
+    )
+    value = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def advance(cls, owner_id, count: int = 1) -> int:
+        """Reserve ``count`` revisions for ``owner_id`` and return the highest one."""
+        changes = {'value': F('value') + count, 'updated_at': timezone.now()}
+        if not cls.objects.filter(owner_id=owner_id).update(**changes):
+            try:
+                with transaction.atomic():
+                    cls.objects.create(owner_id=owner_id, value=count)
+                return count
+            except IntegrityError:
+                cls.objects.filter(owner_id=owner_id).update(**changes)
+        return cls.current(owner_id)
+
+    @classmethod
+    def current(cls, owner_id) -> int:
+        """Latest revision issued for ``owner_id`` (0 before the first change)."""
+        return cls.objects.filter(owner_id=owner_id).values_list('value', flat=True).first() or 0
+
+
+class NoteQuerySet(models.QuerySet):
+    def delete(self):
+        # Leave tombstones behind so syncing clients learn about the deletion.
+        with transaction.atomic():
+            deleted = list(self.values_list('id', 'owner_id'))
+            NoteTombstone.record(deleted)
+            search.remove_notes(note_id for note_id, _ in deleted)
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
 
 
 class Note(models.Model):
@@ -24,13 +90,90 @@ class Note(models.Model):
     body = models.TextField(blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+    revision = models.PositiveBigIntegerField(
+        default=0,
+        editable=False,
+        help_text='Sync clock value of the latest change to this note',
+    )
+
+    objects = NoteQuerySet.as_manager()
 
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # Serves the owner's note list and its keyset pagination
+            models.Index(
+                fields=['owner', '-updated_at', '-id'], name='notes_note_owner_updated_idx'
+            ),
+            # Serves delta sync (notes changed since a revision)
+            models.Index(fields=['owner', 'revision'], name='notes_note_owner_revision_idx'),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - debug representation
         return self.title
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            self.revision = SyncClock.advance(self.owner_id)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'revision'}
+            super().save(*args, **kwargs)
+            search.index_notes([self.pk])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            NoteTombstone.record([(self.pk, self.owner_id)])
+            search.remove_notes([self.pk])
+            return super().delete(*args, **kwargs)
+
+    @classmethod
+    def bump_revision(cls, note_id, owner_id=None) -> None:
+        """Mark a note as changed for sync without touching its content.
+
+        Pass ``owner_id`` when it is already known to save a lookup.
+        """
+        with transaction.atomic():
+            if owner_id is None:
+                owner_id = cls.objects.filter(pk=note_id).values_list('owner_id', flat=True).first()
+            if owner_id is not None:
+                cls.objects.filter(pk=note_id).update(revision=SyncClock.advance(owner_id))
+
+
+class NoteTombstone(models.Model):
+    """Records a deleted note so that syncing clients can drop their copy."""
+
+    note_id = models.UUIDField(primary_key=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='note_tombstones',
+    )
+    revision = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'revision'], name='notes_tombstone_revision_idx'),
+        ]
+
+    @classmethod
+    def record(cls, notes) -> None:
+        """Create tombstones for ``(note_id, owner_id)`` pairs about to be deleted."""
+        by_owner: dict = {}
+        for note_id, owner_id in notes:
+            by_owner.setdefault(owner_id, []).append(note_id)
+
+        tombstones = []
+        for owner_id, note_ids in by_owner.items():
+            last = SyncClock.advance(owner_id, count=len(note_ids))
+            first = last - len(note_ids) + 1
+            tombstones.extend(
+                cls(note_id=note_id, owner_id=owner_id, revision=revision)
+                for revision, note_id in enumerate(note_ids, start=first)
+            )
+        cls.objects.bulk_create(tombstones)
+
 
 class NoteImage(models.Model):
     """Stores image attachment for a note with OCR and object detection results."""
@@ -47,7 +190,19 @@ class NoteImage(models.Model):
         on_delete=models.CASCADE,
         related_name='image',
     )
-    image = models.ImageField(upload_to=note_image_upload_path)
+    image = models.ImageField(upload_to=note_image_upload_path, storage=blob_storage)
+    thumbnail = models.ImageField(
+        upload_to=note_rendition_upload_path,
+        storage=blob_storage,
+        blank=True,
+        help_text='Small WebP rendition for list views',
+    )
+    preview = models.ImageField(
+        upload_to=note_rendition_upload_path,
+        storage=blob_storage,
+        blank=True,
+        help_text='Medium WebP rendition for detail views',
+    )
     file_size = models.PositiveIntegerField(help_text='File size in bytes')
     checksum = models.CharField(max_length=64, help_text='SHA256 hash of the image')
 
@@ -64,10 +219,30 @@ class NoteImage(models.Model):
     )
     analysis_error = models.TextField(blank=True, help_text='Error message if analysis failed')
 
+    # Analysis queue bookkeeping (see apps.notes.queue)
+    analysis_attempts = models.PositiveSmallIntegerField(default=0)
+    analysis_available_at = models.DateTimeField(
+        default=timezone.now,
+        help_text='Earliest time a worker may pick up the analysis',
+    )
+    analysis_lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='Worker lease; an expired lease marks the job as abandoned',
+    )
+
     uploaded_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(
+                fields=['analysis_status', 'analysis_available_at'],
+                name='notes_image_queue_idx',
+            ),
+            # Finds the notes sharing a blob (apps.notes.media)
+            models.Index(fields=['checksum'], name='notes_image_checksum_idx'),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - debug representation
         return f'Image for {self.note.title}'
@@ -78,3 +253,123 @@ class NoteImage(models.Model):
         for chunk in self.image.chunks():
             sha256.update(chunk)
         return sha256.hexdigest()
+
+
+class AnalysisCacheEntry(models.Model):
+    """Vision analysis result keyed by image content and provider identity."""
+
+    checksum = models.CharField(max_length=64, help_text='SHA256 hash of the analyzed image')
+    provider = models.CharField(
+        max_length=200, help_text='Provider identity, including its version'
+    )
+    ocr_text = models.TextField(blank=True)
+    object_labels = models.JSONField(default=list)
+    compute_seconds = models.FloatField(
+        default=0,
+        help_text='Wall time of the analysis that produced this result',
+    )
+    hit_count = models.PositiveIntegerField(
+        default=0, help_text='Analyses skipped thanks to this entry'
+    )
+    miss_count = models.PositiveIntegerField(
+        default=1, help_text='Analyses that ran for this image'
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    last_hit_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['checksum', 'provider'], name='notes_analysis_cache_key'
+            ),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - debug representation
+        return f'{self.provider} {self.checksum[:12]}'
+
+
+class NoteEvent(models.Model):
+    """Short-lived log of changes pushed to clients over the event stream.
+
+    Rows are written by whichever process made the change (usually an analysis
+    worker) and read by the web processes serving ``/api/notes/events/``; the
+    auto-increment id doubles as the SSE event id. See ``apps.notes.events``.
+    """
+
+    class Kind(models.TextChoices):
+        ANALYSIS = 'analysis', 'Analysis status'
+
+    id = models.BigAutoField(primary_key=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='note_events',
+    )
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'id'], name='notes_event_owner_idx'),
+        ]
+
+
+class ImageUpload(models.Model):
+    """Resumable upload session for a note image (see ``apps.notes.uploads``).
+
+    Chunks are appended to ``part_name`` in media storage; once ``offset``
+    reaches ``length`` the file can be attached to a note.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='image_uploads',
+    )
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    length = models.PositiveIntegerField(help_text='Declared file size in bytes')
+    offset = models.PositiveIntegerField(default=0, help_text='Bytes received so far')
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True, help_text='Pushed back by every chunk')
+
+    def __str__(self) -> str:  # pragma: no cover - debug representation
+        return f'{self.filename} ({self.offset}/{self.length})'
+
+    @property
+    def part_name(self) -> str:
+        """Storage name of the partially received file."""
+        return f'uploads/{self.id}.part'
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == self.length
+
+
+class MediaBlob(models.Model):
+    """Reference count of a content-addressed image file (see ``apps.notes.blobs``).
+
+    One row per distinct image content; ``ref_count`` is the number of
+    ``NoteImage`` rows pointing at ``name``. Blobs that stay unreferenced for
+    ``MEDIA_BLOB_GRACE_SECONDS`` are deleted together with their renditions.
+    """
+
+    checksum = models.CharField(max_length=64, primary_key=True, help_text='SHA256 of the content')
+    name = models.CharField(max_length=255, unique=True, help_text='Storage name of the file')
+    size = models.PositiveIntegerField(help_text='File size in bytes')
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(
+        default=timezone.now,
+        help_text='Last reference change; unreferenced blobs are kept for a grace period',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at'], name='notes_blob_unused_idx'),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - debug representation
+        return f'{self.name} ({self.ref_count} refs)'
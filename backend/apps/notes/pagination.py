@@ -0,0 +1,139 @@
+"""Keyset pagination for note listings."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import uuid
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class NoteCursorPagination(BasePagination):
+    """Cursor pagination on ``(updated_at, id)``, newest first.
+
+    Each page is a range scan on the ``(owner, -updated_at, -id)`` index that
+    starts right after the previous page's last row, so deep pages cost the
+    same as the first one. Pagination is opt-in: clients that send ``cursor``
+    or ``page_size`` get ``{"next": ..., "results": [...]}``, everybody else
+    keeps receiving the plain list.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 200
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = self._page_queryset(queryset, request)
+        if page is None:
+            return None
+        return self._finish_page(list(page))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async variant of ``paginate_queryset`` for the ASGI views."""
+        page = self._page_queryset(queryset, request)
+        if page is None:
+            return None
+        return self._finish_page([note async for note in page])
+
+    def _page_queryset(self, queryset, request):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by('-updated_at', '-id')
+        position = self.decode_cursor(request)
+        if position is not None:
+            updated_at, pk = position
+            queryset = queryset.filter(
+                Q(updated_at__lt=updated_at) | Q(updated_at=updated_at, id__lt=pk),
+                updated_at__lte=updated_at,  # lets the planner bound the index scan
+            )
+        return queryset[:self.page_size + 1]
+
+    def _finish_page(self, results):
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.next_position = None
+        if self.has_next:
+            last = results[-1]
+            # Pages hold model instances or, for the fast listing, .values() rows
+            if isinstance(last, dict):
+                self.next_position = (last['updated_at'], last['id'])
+            else:
+                self.next_position = (last.updated_at, last.id)
+        return results
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request) -> tuple[datetime, uuid.UUID] | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            decoded = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            updated_at, pk = decoded.split('|')
+            return datetime.fromisoformat(updated_at), uuid.UUID(pk)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message) from None
+
+    def encode_cursor(self, position: tuple[datetime, uuid.UUID]) -> str:
+        updated_at, pk = position
+        raw = f'{updated_at.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def get_next_link(self) -> str | None:
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        cursor = self.encode_cursor(self.next_position)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Opaque cursor taken from the previous page\'s `next` link.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': (
+                    f'Page size (max {self.max_page_size}); enables paginated responses.'
+                ),
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -0,0 +1,134 @@
+"""Image preparation ahead of OCR.
+
+Phone photos arrive as multi-megapixel colour JPEGs, often stored sideways
+with an EXIF orientation tag. Tesseract only needs a grayscale page at around
+300 DPI, and its run time grows with the pixel count, so ``Preprocessor``
+decodes, rotates and shrinks the image first. Each stage can be switched off
+and is timed into ``nomad_ocr_stage_seconds``.
+
+Like ``vision``, this module does not need Django to be configured.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from .metrics import OCR_STAGE_SECONDS
+
+# Resolution metadata below this is a screen default (phones write 72), not a scan
+MIN_TRUSTED_DPI = 150
+
+
+@contextmanager
+def _stage(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        OCR_STAGE_SECONDS.labels(name).observe(time.perf_counter() - started)
+
+
+@dataclass
+class Preprocessor:
+    """Configurable preprocessing stages, applied in declaration order."""
+
+    #: Let JPEG decode at a reduced scale (1/2, 1/4, 1/8) when that still fits
+    draft: bool = True
+    grayscale: bool = True
+    #: Scale down to this resolution; ``None`` keeps the full size
+    target_dpi: int | None = 300
+    #: Longest edge of the page assumed when the image carries no usable DPI (A4)
+    page_inches: float = 11.7
+    #: Rotate/flip according to the EXIF orientation tag (after shrinking: fewer pixels to move)
+    exif_transpose: bool = True
+    #: Threshold to black and white (Otsu); helps uneven photos, can hurt clean scans
+    binarize: bool = False
+
+    def max_edge(self, image: Image.Image) -> int | None:
+        """Longest edge, in pixels, that still gives ``target_dpi``."""
+        if not self.target_dpi:
+            return None
+        dpi = source_dpi(image)
+        if dpi is not None:
+            return round(max(image.size) * min(self.target_dpi / dpi, 1))
+        return round(self.page_inches * self.target_dpi)
+
+    def run(self, image_path: str | Path) -> tuple[Image.Image, int | None]:
+        """Return the image to OCR and its resolution in DPI (if known)."""
+        with _stage('decode'), Image.open(image_path) as source:
+            edge = self.max_edge(source)
+            dpi = source_dpi(source)
+            original_edge = max(source.size)
+            if self.draft and edge and source.format == 'JPEG':
+                source.draft('L' if self.grayscale else source.mode, (edge, edge))
+            source.load()
+            image = source
+
+        if self.grayscale and image.mode != 'L':
+            with _stage('grayscale'):
+                if 'A' in image.getbands() or 'transparency' in image.info:
+                    # Transparent pixels would turn black; put the page on white paper
+                    background = Image.new('RGBA', image.size, 'white')
+                    image = Image.alpha_composite(background, image.convert('RGBA'))
+                image = image.convert('L')
+
+        if edge and max(image.size) > edge:
+            with _stage('downscale'):
+                # Bilinear is antialiased when shrinking and plenty for text
+                image.thumbnail((edge, edge), Image.BILINEAR)
+
+        if self.exif_transpose:
+            with _stage('exif_transpose'):
+                image = ImageOps.exif_transpose(image)
+
+        if self.binarize:
+            with _stage('binarize'):
+                image = binarize(image if image.mode == 'L' else image.convert('L'))
+
+        if dpi is None and self.target_dpi:
+            dpi = max(image.size) / self.page_inches
+        elif dpi is not None:
+            dpi *= max(image.size) / original_edge
+        return image, round(dpi) if dpi else None
+
+
+def source_dpi(image: Image.Image) -> float | None:
+    """Horizontal resolution from the file's metadata, if it looks like a real one."""
+    dpi = image.info.get('dpi')
+    if not dpi:
+        return None
+    dpi = float(dpi[0])
+    return dpi if dpi >= MIN_TRUSTED_DPI else None
+
+
+def otsu_threshold(histogram: list[int]) -> int:
+    """Gray level that best separates a 256-bin histogram into two classes."""
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background = background_sum = 0
+    best_level, best_variance = 0, -1.0
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        background_sum += level * count
+        mean_background = background_sum / background
+        mean_foreground = (weighted_total - background_sum) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+
+def binarize(image: Image.Image) -> Image.Image:
+    """Black and white version of a grayscale image, thresholded with Otsu's method."""
+    threshold = otsu_threshold(image.histogram())
+    return image.point(lambda value: 255 if value > threshold else 0)
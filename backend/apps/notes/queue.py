@@ -0,0 +1,138 @@
+"""Database-backed job queue for note image analysis.
+
+``NoteImage`` rows double as queue entries. A ``pending`` row is ready once
+``analysis_available_at`` has passed; a ``processing`` row carries a lease that
+the worker pool renews with heartbeats. A ``processing`` row whose lease ran out
+belonged to a worker that died, so it is claimed again like a pending one.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Note, NoteImage
+
+logger = logging.getLogger(__name__)
+
+Status = NoteImage.AnalysisStatus
+
+
+def _claimable(now) -> Q:
+    """Rows that are ready to run or were abandoned by a dead worker."""
+    ready = Q(analysis_status=Status.PENDING, analysis_available_at__lte=now)
+    abandoned = Q(analysis_status=Status.PROCESSING) & (
+        Q(analysis_lease_expires_at__isnull=True) | Q(analysis_lease_expires_at__lt=now)
+    )
+    return ready | abandoned
+
+
+def lease_deadline(now=None):
+    """Return the lease expiry for a job started (or renewed) at ``now``."""
+    now = now or timezone.now()
+    return now + timedelta(seconds=settings.ANALYSIS_LEASE_SECONDS)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff: base, 2x base, 4x base, ... after each failed attempt."""
+    exponent = max(attempts - 1, 0)
+    return timedelta(seconds=settings.ANALYSIS_RETRY_BACKOFF_SECONDS * (2 ** exponent))
+
+
+def claim(limit: int) -> list[str]:
+    """Lease up to ``limit`` runnable jobs and return their ids.
+
+    Each candidate is taken with a conditional ``UPDATE`` so that two workers
+    racing for the same row cannot both win it, on SQLite as well as Postgres.
+    """
+    if limit <= 0:
+        return []
+
+    now = timezone.now()
+    candidates = list(
+        NoteImage.objects.filter(
+            _claimable(now), analysis_attempts__lt=settings.ANALYSIS_MAX_ATTEMPTS
+        )
+        .order_by('analysis_available_at')
+        .values_list('id', flat=True)[:limit]
+    )
+
+    claimed = []
+    for note_image_id in candidates:
+        won = (
+            NoteImage.objects.filter(_claimable(now), pk=note_image_id)
+            .update(
+                analysis_status=Status.PROCESSING,
+                analysis_lease_expires_at=lease_deadline(now),
+            )
+        )
+        if won:
+            claimed.append(str(note_image_id))
+    return claimed
+
+
+def heartbeat(note_image_ids: Iterable[str]) -> int:
+    """Extend the lease of jobs that are still running."""
+    ids = list(note_image_ids)
+    if not ids:
+        return 0
+    return NoteImage.objects.filter(pk__in=ids, analysis_status=Status.PROCESSING).update(
+        analysis_lease_expires_at=lease_deadline(),
+    )
+
+
+def record_failure(note_image: NoteImage, error: str) -> bool:
+    """Schedule a retry with backoff, or mark the image failed once attempts run out.
+
+    Returns ``True`` when another attempt was scheduled.
+    """
+    note_image.analysis_error = error
+    note_image.analysis_lease_expires_at = None
+
+    if note_image.analysis_attempts < settings.ANALYSIS_MAX_ATTEMPTS:
+        note_image.analysis_status = Status.PENDING
+        delay = retry_delay(note_image.analysis_attempts)
+        note_image.analysis_available_at = timezone.now() + delay
+        retried = True
+    else:
+        note_image.analysis_status = Status.FAILED
+        retried = False
+
+    note_image.save(update_fields=[
+        'analysis_status',
+        'analysis_error',
+        'analysis_available_at',
+        'analysis_lease_expires_at',
+    ])
+    Note.bump_revision(note_image.note_id)
+    return retried
+
+
+def fail_exhausted() -> int:
+    """Mark abandoned jobs that already used every attempt as failed."""
+    from . import events
+
+    now = timezone.now()
+    exhausted = NoteImage.objects.filter(
+        _claimable(now),
+        analysis_attempts__gte=settings.ANALYSIS_MAX_ATTEMPTS,
+    )
+    abandoned = dict(exhausted.values_list('pk', 'note_id'))
+    if not abandoned:
+        return 0
+    count = exhausted.filter(pk__in=abandoned).update(
+        analysis_status=Status.FAILED,
+        analysis_lease_expires_at=None,
+        analysis_error=f'Analysis abandoned after {settings.ANALYSIS_MAX_ATTEMPTS} attempts',
+    )
+    if count:
+        logger.warning(f'Marked {count} abandoned image analyses as failed')
+        for note_id in abandoned.values():
+            Note.bump_revision(note_id)
+        events.publish_analysis(abandoned)
+    return count
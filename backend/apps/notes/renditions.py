@@ -0,0 +1,77 @@
+"""Downscaled WebP renditions of note images.
+
+List views only need a small preview, so every upload gets a thumbnail and a
+medium preview stored next to the original. Both are produced from a single
+decode: the preview is scaled from the original and the thumbnail from the
+preview.
+
+Renditions of a content-addressed blob are shared by every note using it, so
+they are only rendered for the first of them.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import NoteImage
+from .storage import blob_checksum, derived_name
+
+logger = logging.getLogger(__name__)
+
+# Rendition field -> (file suffix, settings key holding the bounding box edge)
+RENDITIONS = (
+    ('preview', 'preview', 'RENDITION_PREVIEW_SIZE'),
+    ('thumbnail', 'thumb', 'RENDITION_THUMBNAIL_SIZE'),
+)
+
+
+def _encode(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format='WEBP', quality=settings.RENDITION_WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def generate_renditions(note_image: NoteImage) -> None:
+    """Create the preview and thumbnail files and save their names on ``note_image``."""
+    name = note_image.image.name
+    fields = [field for field, _, _ in RENDITIONS]
+    if blob_checksum(name):
+        shared = {field: derived_name(name, suffix, 'webp') for field, suffix, _ in RENDITIONS}
+        storage = note_image.image.storage
+        if all(storage.exists(rendition) for rendition in shared.values()):
+            for field, rendition in shared.items():
+                setattr(note_image, field, rendition)
+            note_image.save(update_fields=fields)
+            return
+
+    largest = max(getattr(settings, key) for _, _, key in RENDITIONS)
+
+    with Image.open(note_image.image.path) as source:
+        # JPEG can decode straight at a reduced scale, skipping most of the work
+        source.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(source)
+        transparent = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if transparent else 'RGB')
+
+    for field, suffix, key in RENDITIONS:
+        edge = getattr(settings, key)
+        image.thumbnail((edge, edge), Image.LANCZOS, reducing_gap=3.0)
+        filename = derived_name(name, suffix, 'webp').rsplit('/', 1)[-1]
+        getattr(note_image, field).save(filename, ContentFile(_encode(image)), save=False)
+
+    note_image.save(update_fields=fields)
+
+
+def ensure_renditions(note_image: NoteImage) -> None:
+    """Generate renditions if missing; failures are logged, never raised."""
+    if note_image.thumbnail and note_image.preview:
+        return
+    try:
+        generate_renditions(note_image)
+    except Exception as e:
+        logger.warning(f'Could not render previews for image {note_image.id}: {e}')
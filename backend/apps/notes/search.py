@@ -0,0 +1,209 @@
+"""Full-text search over note titles, bodies and OCR text.
+
+The index lives in a shadow table, ``notes_search``, that is kept up to date
+from Python whenever a note is saved or deleted and whenever image analysis
+finishes:
+
+* PostgreSQL: a weighted ``tsvector`` column with a GIN index, ranked by ``ts_rank``.
+* SQLite: an FTS5 virtual table, ranked by ``bm25``.
+
+Other databases have no shadow table and fall back to an unranked ``icontains`` scan.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q, UUIDField
+
+TABLE = 'notes_search'
+
+# Relative weight of title, body and OCR text matches
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 4.0
+OCR_WEIGHT = 1.0
+
+
+class _PostgresIndex:
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE {TABLE} ('
+            ' note_id uuid PRIMARY KEY REFERENCES notes_note (id) ON DELETE CASCADE'
+            ' DEFERRABLE INITIALLY DEFERRED,'
+            ' owner_id uuid NOT NULL,'
+            ' document tsvector NOT NULL'
+            ')'
+        )
+        cursor.execute(f'CREATE INDEX {TABLE}_document_idx ON {TABLE} USING gin (document)')
+        cursor.execute(f'CREATE INDEX {TABLE}_owner_idx ON {TABLE} (owner_id)')
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def upsert(self, cursor, rows):
+        config = settings.SEARCH_LANGUAGE
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (note_id, owner_id, document) VALUES (%s, %s,'
+            " setweight(to_tsvector(%s::regconfig, %s), 'A') ||"
+            " setweight(to_tsvector(%s::regconfig, %s), 'B') ||"
+            " setweight(to_tsvector(%s::regconfig, %s), 'C'))"
+            ' ON CONFLICT (note_id) DO UPDATE'
+            ' SET owner_id = EXCLUDED.owner_id, document = EXCLUDED.document',
+            [
+                (note_id, owner_id, config, title, config, body, config, ocr_text)
+                for note_id, owner_id, title, body, ocr_text in rows
+            ],
+        )
+
+    def delete(self, cursor, note_ids):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE note_id = ANY(%s)', [list(note_ids)])
+
+    def search(self, cursor, owner_id, query, limit):
+        # ts_rank takes weights for the D, C, B and A labels, in that order
+        weights = f'{{0,{OCR_WEIGHT / TITLE_WEIGHT},{BODY_WEIGHT / TITLE_WEIGHT},1}}'
+        cursor.execute(
+            f'SELECT note_id FROM {TABLE}, websearch_to_tsquery(%s::regconfig, %s) query'
+            ' WHERE owner_id = %s AND document @@ query'
+            ' ORDER BY ts_rank(%s::float4[], document, query) DESC'
+            ' LIMIT %s',
+            [settings.SEARCH_LANGUAGE, query, owner_id, weights, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class _SqliteIndex:
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE {TABLE} USING fts5('
+            ' note_id UNINDEXED, owner_id UNINDEXED, title, body, ocr_text,'
+            " tokenize = 'porter unicode61'"
+            ')'
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def upsert(self, cursor, rows):
+        rows = list(rows)
+        self.delete(cursor, [row[0] for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (note_id, owner_id, title, body, ocr_text)'
+            ' VALUES (%s, %s, %s, %s, %s)',
+            rows,
+        )
+
+    def delete(self, cursor, note_ids):
+        note_ids = list(note_ids)
+        if note_ids:
+            placeholders = ', '.join(['%s'] * len(note_ids))
+            cursor.execute(f'DELETE FROM {TABLE} WHERE note_id IN ({placeholders})', note_ids)
+
+    def search(self, cursor, owner_id, query, limit):
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return []
+        # Quote every term so user input can't inject FTS5 syntax; the last
+        # term is a prefix match to support search-as-you-type.
+        match = ' '.join(f'"{term}"' for term in terms) + '*'
+        cursor.execute(
+            f'SELECT note_id FROM {TABLE}'
+            f' WHERE {TABLE} MATCH %s AND owner_id = %s'
+            f' ORDER BY bm25({TABLE}, 0, 0, %s, %s, %s)'
+            ' LIMIT %s',
+            [match, owner_id, TITLE_WEIGHT, BODY_WEIGHT, OCR_WEIGHT, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+_INDEXES = {
+    'postgresql': _PostgresIndex(),
+    'sqlite': _SqliteIndex(),
+}
+
+
+def _index_for(conn):
+    return _INDEXES.get(conn.vendor)
+
+
+_UUID_FIELD = UUIDField()
+
+
+def _db_uuid(value, conn):
+    # UUIDs are stored differently per backend (native uuid vs. hex text)
+    return _UUID_FIELD.get_db_prep_value(value, conn)
+
+
+def create_index(schema_editor) -> None:
+    """Create the shadow table (used by migrations)."""
+    index = _index_for(schema_editor.connection)
+    if index is not None:
+        with schema_editor.connection.cursor() as cursor:
+            index.create(cursor)
+
+
+def drop_index(schema_editor) -> None:
+    """Drop the shadow table (used by migrations)."""
+    index = _index_for(schema_editor.connection)
+    if index is not None:
+        with schema_editor.connection.cursor() as cursor:
+            index.drop(cursor)
+
+
+def write_rows(rows: Iterable[tuple], conn=None) -> None:
+    """Index ``(note_id, owner_id, title, body, ocr_text)`` rows."""
+    conn = conn or connection
+    index = _index_for(conn)
+    if index is None:
+        return
+    rows = [
+        (_db_uuid(note_id, conn), _db_uuid(owner_id, conn), title, body, ocr_text or '')
+        for note_id, owner_id, title, body, ocr_text in rows
+    ]
+    if rows:
+        with conn.cursor() as cursor:
+            index.upsert(cursor, rows)
+
+
+def index_notes(note_ids: Iterable) -> None:
+    """(Re)index the given notes from their current title, body and OCR text."""
+    from .models import Note
+
+    note_ids = list(note_ids)
+    if not note_ids or _index_for(connection) is None:
+        return
+    write_rows(
+        Note.objects.filter(pk__in=note_ids)
+        .order_by()
+        .values_list('id', 'owner_id', 'title', 'body', 'image__ocr_text')
+    )
+
+
+def remove_notes(note_ids: Iterable) -> None:
+    """Drop deleted notes from the index."""
+    index = _index_for(connection)
+    note_ids = [_db_uuid(note_id, connection) for note_id in note_ids]
+    if index is not None and note_ids:
+        with connection.cursor() as cursor:
+            index.delete(cursor, note_ids)
+
+
+def search(owner_id, query: str, limit: int = 50) -> list:
+    """Return ids of the owner's notes matching ``query``, best match first."""
+    from .models import Note
+
+    index = _index_for(connection)
+    if index is None:
+        matches = Note.objects.filter(
+            Q(title__icontains=query)
+            | Q(body__icontains=query)
+            | Q(image__ocr_text__icontains=query),
+            owner_id=owner_id,
+        )
+        return list(matches.values_list('id', flat=True)[:limit])
+
+    with connection.cursor() as cursor:
+        note_ids = index.search(cursor, _db_uuid(owner_id, connection), query, limit)
+    return [Note._meta.pk.to_python(note_id) for note_id in note_ids]
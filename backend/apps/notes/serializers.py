@@ -2,19 +2,24 @@ from __future__ import annotations
 
 from rest_framework import serializers
 
-from .models import Note, NoteImage
+from . import media
+from .models import ImageUpload, Note, NoteImage
 
 
 class NoteImageSerializer(serializers.ModelSerializer):
     """Serializer for NoteImage model."""
 
     image_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
 
     class Meta:
         model = NoteImage
         fields = (
             'id',
             'image_url',
+            'thumbnail_url',
+            'preview_url',
             'file_size',
             'checksum',
             'analysis_status',
@@ -31,33 +36,110 @@ class NoteImageSerializer(serializers.ModelSerializer):
             'uploaded_at',
         )
 
-    def get_image_url(self, obj: NoteImage) -> str | None:
-        """Return full URL for the image."""
-        if obj.image:
+    def _file_url(self, field_file, obj: NoteImage) -> str | None:
+        if field_file:
+            # Signed and versioned: see apps.notes.media
+            url = media.file_url(field_file, obj.checksum, obj.note_id)
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
+                return request.build_absolute_uri(url)
+            return url
         return None
 
+    def get_image_url(self, obj: NoteImage) -> str | None:
+        """Return full URL for the image."""
+        return self._file_url(obj.image, obj)
+
+    def get_thumbnail_url(self, obj: NoteImage) -> str | None:
+        """Return full URL for the small WebP thumbnail, once rendered."""
+        return self._file_url(obj.thumbnail, obj)
+
+    def get_preview_url(self, obj: NoteImage) -> str | None:
+        """Return full URL for the medium WebP preview, once rendered."""
+        return self._file_url(obj.preview, obj)
+
 
 class NoteSerializer(serializers.ModelSerializer):
     """Serializer for Note model with optional image support."""
 
     image = NoteImageSerializer(read_only=True)
     image_file = serializers.ImageField(write_only=True, required=False)
+    upload_id = serializers.UUIDField(
+        write_only=True,
+        required=False,
+        help_text='Completed resumable upload to attach instead of image_file',
+    )
 
     class Meta:
         model = Note
-        fields = ('id', 'title', 'body', 'created_at', 'updated_at', 'image', 'image_file')
+        fields = (
+            'id', 'title', 'body', 'created_at', 'updated_at', 'image', 'image_file', 'upload_id'
+        )
         read_only_fields = ('id', 'created_at', 'updated_at', 'image')
 
+    def validate(self, attrs):
+        if 'image_file' in attrs and 'upload_id' in attrs:
+            raise serializers.ValidationError({'upload_id': 'Send either image_file or upload_id.'})
+        return attrs
+
     def create(self, validated_data):
-        # Remove image_file from validated_data before creating Note
+        # Remove image fields from validated_data before creating Note
         validated_data.pop('image_file', None)
+        validated_data.pop('upload_id', None)
         return super().create(validated_data)
 
     def update(self, instance, validated_data):
-        # Remove image_file from validated_data before updating Note
+        # Remove image fields from validated_data before updating Note
         validated_data.pop('image_file', None)
+        validated_data.pop('upload_id', None)
         return super().update(instance, validated_data)
+
+
+class ImageUploadSerializer(serializers.ModelSerializer):
+    """Resumable upload session; ``offset`` is where the next chunk starts."""
+
+    class Meta:
+        model = ImageUpload
+        fields = ('id', 'filename', 'content_type', 'length', 'offset', 'expires_at')
+        read_only_fields = ('id', 'offset', 'expires_at')
+        extra_kwargs = {'length': {'min_value': 1}}
+
+
+class NoteChangesSerializer(serializers.Serializer):
+    """Delta sync payload: notes changed and notes deleted since a cursor."""
+
+    cursor = serializers.IntegerField(help_text='Pass as `since` on the next sync')
+    has_more = serializers.BooleanField(help_text='More changes are waiting; sync again right away')
+    notes = NoteSerializer(many=True)
+    deleted = serializers.ListField(child=serializers.UUIDField())
+
+
+class NoteOperationSerializer(serializers.Serializer):
+    """One queued client edit inside a batch request."""
+
+    op = serializers.ChoiceField(choices=('create', 'update', 'delete'))
+    id = serializers.UUIDField(required=False, help_text='Target note (update and delete only)')
+    data = serializers.DictField(
+        required=False, default=dict, help_text='title and body (create and update only)'
+    )
+
+    def validate(self, attrs):
+        if attrs['op'] != 'create' and 'id' not in attrs:
+            raise serializers.ValidationError({'id': f'Required for {attrs["op"]} operations.'})
+        return attrs
+
+
+class NoteBatchSerializer(serializers.Serializer):
+    operations = NoteOperationSerializer(many=True, allow_empty=False, max_length=100)
+
+
+class NoteOperationResultSerializer(serializers.Serializer):
+    status = serializers.IntegerField(
+        help_text='HTTP status the single request would have returned'
+    )
+    note = NoteSerializer(required=False)
+    errors = serializers.DictField(required=False)
+
+
+class NoteBatchResultSerializer(serializers.Serializer):
+    results = NoteOperationResultSerializer(many=True)
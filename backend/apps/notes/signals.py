@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import blobs
+from .models import NoteImage
+from .storage import blob_checksum
+
+
+@receiver(post_save, sender=NoteImage)
+def reference_blob(sender, instance: NoteImage, created: bool, raw: bool = False, **kwargs) -> None:
+    """Count a new image against its blob (files stored per note are not counted)."""
+    checksum = blob_checksum(instance.image.name)
+    if created and not raw and checksum:
+        blobs.acquire(checksum, instance.image.name, instance.file_size)
+
+
+@receiver(post_delete, sender=NoteImage)
+def release_blob(sender, instance: NoteImage, **kwargs) -> None:
+    checksum = blob_checksum(instance.image.name)
+    if checksum:
+        blobs.release(checksum)
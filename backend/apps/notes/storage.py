@@ -0,0 +1,87 @@
+"""Content-addressed file storage for note images.
+
+Images are stored once per content at ``blobs/<ab>/<cd>/<sha256><ext>``: the
+first two byte pairs of the checksum shard the files over 65,536 directories,
+so no directory grows with the number of notes. Saving a blob that already
+exists writes nothing, which is how duplicate uploads end up sharing a file;
+``apps.notes.blobs`` counts the references and deletes unused blobs.
+
+Names outside ``blobs/`` (images stored per note before the blob store
+existed) keep the usual ``FileSystemStorage`` behaviour.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+from pathlib import PurePosixPath
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = 'blobs/'
+
+# One spelling per format, so equal bytes get equal names
+_EXTENSIONS = {'.jpeg': '.jpg', '.jpe': '.jpg', '.tif': '.tiff'}
+_blob = re.compile(r'^blobs/[0-9a-f]{2}/[0-9a-f]{2}/(?P<checksum>[0-9a-f]{64})(?:\.[a-z0-9.]+)?$')
+
+
+def blob_name(checksum: str, filename: str = '') -> str:
+    """Storage name for content with ``checksum``, keeping the file type's extension."""
+    suffix = PurePosixPath(filename).suffix.lower()
+    suffix = _EXTENSIONS.get(suffix, suffix) if re.fullmatch(r'\.[a-z0-9]{1,5}', suffix) else ''
+    return f'{BLOB_PREFIX}{checksum[:2]}/{checksum[2:4]}/{checksum}{suffix}'
+
+
+def blob_checksum(name: str) -> str | None:
+    """Checksum a blob (or one of its renditions) is stored under; ``None`` for legacy names."""
+    match = _blob.match(name or '')
+    return match['checksum'] if match else None
+
+
+def derived_name(name: str, suffix: str, extension: str) -> str:
+    """Name of a file derived from ``name`` (a rendition), stored next to it."""
+    path = PurePosixPath(name)
+    return str(path.with_name(f'{path.stem}.{suffix}.{extension}'))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """``FileSystemStorage`` that never renames or rewrites blobs."""
+
+    def get_available_name(self, name, max_length=None):
+        if blob_checksum(name):
+            return name
+        return super().get_available_name(name, max_length)
+
+    def _save(self, name, content):
+        if not blob_checksum(name):
+            return super()._save(name, content)
+
+        path = self.path(name)
+        if os.path.exists(path):
+            return name  # same checksum, same bytes: nothing to write
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        if hasattr(content, 'temporary_file_path'):
+            # Spooled uploads are renamed into place, not copied
+            file_move_safe(content.temporary_file_path(), path, allow_overwrite=True)
+        else:
+            # Write beside the target and rename, so a concurrent duplicate never sees half a file
+            fd, temporary = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    for chunk in content.chunks():
+                        file.write(chunk)
+                os.replace(temporary, path)
+            except BaseException:
+                os.unlink(temporary)
+                raise
+        if self.file_permissions_mode is not None:
+            os.chmod(path, self.file_permissions_mode)
+        return name
+
+
+blob_storage = ContentAddressedStorage()
@@ -3,26 +3,57 @@
 from __future__ import annotations
 
 import logging
-import threading
+import time
 
-from .models import NoteImage
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from . import analysis_cache, events, queue, renditions, search
+from .models import Note, NoteImage
 from .vision import get_vision_provider
 
 logger = logging.getLogger(__name__)
 
 
 def analyze_note_image(note_image_id: str) -> None:
-    """Analyze a note image using the configured vision provider."""
+    """Analyze a note image using the configured vision provider.
+
+    Failed attempts are handed back to the queue, which retries them with
+    backoff until ``ANALYSIS_MAX_ATTEMPTS`` is reached.
+    """
     try:
-        note_image = NoteImage.objects.get(id=note_image_id)
+        # Update status to processing and count the attempt
+        updated = NoteImage.objects.filter(id=note_image_id).update(
+            analysis_status=NoteImage.AnalysisStatus.PROCESSING,
+            analysis_attempts=F('analysis_attempts') + 1,
+            analysis_lease_expires_at=queue.lease_deadline(),
+        )
+        if not updated:
+            raise NoteImage.DoesNotExist
+        note_image = NoteImage.objects.select_related('note').get(id=note_image_id)
+        owner_id = note_image.note.owner_id
 
-        # Update status to processing
-        note_image.analysis_status = NoteImage.AnalysisStatus.PROCESSING
-        note_image.save(update_fields=['analysis_status'])
+        # Renditions are cheap next to OCR; make them first so previews show up early
+        renditions.ensure_renditions(note_image)
+        # The note now reads as "processing" (and may have previews): a new version
+        Note.bump_revision(note_image.note_id, owner_id)
 
-        # Get vision provider and analyze
+        # Identical bytes may have been analyzed since this image was queued
         provider = get_vision_provider()
+        cached = analysis_cache.lookup(note_image.checksum, provider.identity)
+        if cached is not None:
+            analysis_cache.apply(note_image, cached)
+            note_image.save(update_fields=analysis_cache.RESULT_FIELDS)
+            Note.bump_revision(note_image.note_id, owner_id)
+            search.index_notes([note_image.note_id])
+            events.publish_analysis([note_image.id])
+            logger.info(f'Reused cached analysis for image {note_image_id}')
+            return
+
+        started = time.perf_counter()
         result = provider.analyze(note_image.image.path)
+        elapsed = time.perf_counter() - started
 
         # Update note image with results
         if result.success:
@@ -30,13 +61,20 @@ def analyze_note_image(note_image_id: str) -> None:
             note_image.ocr_text = result.ocr_text
             note_image.object_labels = result.object_labels
             note_image.analysis_error = ''
+            note_image.analysis_lease_expires_at = None
+            note_image.save(update_fields=analysis_cache.RESULT_FIELDS)
+            if not result.partial:  # a provider that timed out may do better next time
+                analysis_cache.store(note_image.checksum, provider.identity, result, elapsed)
+            Note.bump_revision(note_image.note_id, owner_id)
+            search.index_notes([note_image.note_id])
             logger.info(f'Successfully analyzed image {note_image_id}')
+        elif queue.record_failure(note_image, result.error):
+            logger.warning(
+                f'Analysis of image {note_image_id} failed, retry scheduled: {result.error}'
+            )
         else:
-            note_image.analysis_status = NoteImage.AnalysisStatus.FAILED
-            note_image.analysis_error = result.error
             logger.error(f'Failed to analyze image {note_image_id}: {result.error}')
-
-        note_image.save(update_fields=['analysis_status', 'ocr_text', 'object_labels', 'analysis_error'])
+        events.publish_analysis([note_image.id])
 
     except NoteImage.DoesNotExist:
         logger.error(f'NoteImage {note_image_id} not found')
@@ -44,19 +82,21 @@ def analyze_note_image(note_image_id: str) -> None:
         logger.exception(f'Unexpected error analyzing image {note_image_id}: {e}')
         try:
             note_image = NoteImage.objects.get(id=note_image_id)
-            note_image.analysis_status = NoteImage.AnalysisStatus.FAILED
-            note_image.analysis_error = str(e)
-            note_image.save(update_fields=['analysis_status', 'analysis_error'])
+            queue.record_failure(note_image, str(e))
+            events.publish_analysis([note_image.id])
         except Exception:
             pass
 
 
 def analyze_note_image_async(note_image_id: str) -> None:
-    """Launch image analysis in a background thread."""
-    thread = threading.Thread(
-        target=analyze_note_image,
-        args=(note_image_id,),
-        daemon=True,
-    )
-    thread.start()
-    logger.info(f'Started background analysis for image {note_image_id}')
+    """Schedule analysis of a freshly uploaded image.
+
+    New ``NoteImage`` rows start out ``pending``, which is all the worker pool
+    (``manage.py run_analysis_workers``) needs to pick them up. With
+    ``ANALYSIS_EAGER`` enabled the analysis instead runs in-process as soon as
+    the upload is committed, which is handy for tests and single-process setups.
+    """
+    if settings.ANALYSIS_EAGER:
+        transaction.on_commit(lambda: analyze_note_image(note_image_id))
+        return
+    logger.info(f'Queued analysis for image {note_image_id}')
@@ -0,0 +1,203 @@
+"""Parallel OCR of large images, one horizontal band per process.
+
+Tesseract uses a single core per call, so a big page keeps one core busy for
+seconds while the others idle. ``TiledOcr`` cuts images above a pixel
+threshold into full-width bands that overlap vertically, recognizes the bands
+in a process pool and stitches the lines back together top to bottom.
+
+Each band owns the part of the page between the middles of its overlaps with
+its neighbours; of the lines it recognizes it keeps only those whose centre
+lies in that part. A line cut by a band edge is therefore dropped by that
+band and read whole by the neighbour, and lines inside an overlap are not
+duplicated, as long as ``overlap`` is at least twice the line height. Bands
+span the full width, so lines are never split sideways; multi-column layouts
+come out column by column per band.
+
+Like ``vision``, this module does not need Django to be configured.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+from PIL import Image
+
+# Set in each pool process by _init_worker
+_engine = None
+_options: dict = {}
+
+
+@dataclass(frozen=True)
+class Band:
+    top: int
+    bottom: int
+    #: Lines whose centre falls in [own_top, own_bottom) belong to this band
+    own_top: int
+    own_bottom: int
+
+
+def split_bands(height: int, band_height: int, overlap: int) -> list[Band]:
+    """Overlapping bands covering ``height`` rows, top to bottom."""
+    step = max(band_height - overlap, 1)
+    tops = list(range(0, max(height - overlap, 1), step))
+    bands = []
+    for index, top in enumerate(tops):
+        bottom = min(top + band_height, height)
+        own_top = 0 if index == 0 else top + overlap // 2
+        own_bottom = height if index == len(tops) - 1 else tops[index + 1] + overlap // 2
+        bands.append(Band(top, bottom, own_top, own_bottom))
+    return bands
+
+
+def _init_worker(lang: str, timeout: float | None) -> None:
+    global _engine
+    _options.update(lang=lang, timeout=timeout)
+    try:
+        import tesserocr
+
+        _engine = tesserocr.PyTessBaseAPI(lang=lang)
+    except Exception:  # no tesserocr: every band runs a tesseract subprocess
+        _engine = None
+
+
+def _lines_tesserocr(image: Image.Image, dpi: int | None) -> list[tuple[int, int, str]]:
+    import tesserocr
+
+    _engine.SetImage(image)
+    if dpi:
+        _engine.SetSourceResolution(dpi)
+    timeout = _options['timeout']
+    if not _engine.Recognize(timeout=int(timeout * 1000) if timeout else 0):
+        raise TimeoutError(f'Tesseract timed out after {timeout}s')
+    lines = []
+    level = tesserocr.RIL.TEXTLINE
+    iterator = _engine.GetIterator()
+    if iterator is None:
+        return lines
+    while True:
+        box = iterator.BoundingBox(level)
+        text = iterator.GetUTF8Text(level)
+        if box and text and text.strip():
+            lines.append((box[1], box[3], text.strip()))
+        if not iterator.Next(level):
+            return lines
+
+
+def _lines_pytesseract(image: Image.Image, dpi: int | None) -> list[tuple[int, int, str]]:
+    import pytesseract
+
+    data = pytesseract.image_to_data(
+        image,
+        lang=_options['lang'],
+        config=f'--dpi {dpi}' if dpi else '',
+        timeout=_options['timeout'] or 0,
+        output_type=pytesseract.Output.DICT,
+    )
+    lines: dict[tuple, list] = {}
+    for index, word in enumerate(data['text']):
+        if not word.strip():
+            continue
+        key = (data['block_num'][index], data['par_num'][index], data['line_num'][index])
+        top, height = data['top'][index], data['height'][index]
+        line = lines.setdefault(key, [top, top + height, []])
+        line[0], line[1] = min(line[0], top), max(line[1], top + height)
+        line[2].append(word)
+    return [(top, bottom, ' '.join(words)) for top, bottom, words in lines.values()]
+
+
+def _recognize_band(mode: str, size: tuple[int, int], pixels: bytes, dpi: int | None):
+    """Pool entry point: text lines of one band as ``(top, bottom, text)``."""
+    image = Image.frombytes(mode, size, pixels)
+    try:
+        if _engine is not None:
+            return _lines_tesserocr(image, dpi)
+        return _lines_pytesseract(image, dpi)
+    except TimeoutError:
+        raise
+    except Exception as e:
+        # Some pytesseract errors cannot be unpickled and would break the whole pool
+        raise RuntimeError(f'{type(e).__name__}: {e}') from None
+
+
+class TiledOcr:
+    """Splits large images into bands and OCRs them in a process pool."""
+
+    def __init__(
+        self,
+        lang: str = 'eng',
+        timeout: float | None = None,
+        min_pixels: int | None = 8_000_000,
+        band_height: int = 1200,
+        overlap: int = 160,
+        workers: int | None = None,
+    ):
+        self.lang = lang
+        self.timeout = timeout
+        #: Images with fewer pixels keep the single-call path; ``None`` disables tiling
+        self.min_pixels = min_pixels
+        self.band_height = band_height
+        self.overlap = overlap
+        self.workers = workers or os.cpu_count() or 1
+        self._pool: ProcessPoolExecutor | None = None
+        # Providers run in threads (see vision.CompositeVisionProvider)
+        self._pool_lock = threading.Lock()
+
+    def wants(self, image: Image.Image) -> bool:
+        return (
+            self.min_pixels is not None
+            and self.workers > 1
+            and image.width * image.height >= self.min_pixels
+            and image.height > self.band_height
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # Forking would copy a process already running provider and
+                    # database pool threads (and any locks they hold)
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.lang, self.timeout),
+                )
+            return self._pool
+
+    def recognize(self, image: Image.Image, dpi: int | None = None) -> str:
+        """Text of ``image`` in reading order, one line per line of text."""
+        if image.mode not in ('L', 'RGB'):
+            image = image.convert('L')
+        bands = split_bands(image.height, self.band_height, self.overlap)
+        pool = self._get_pool()
+        futures = []
+        for band in bands:
+            tile = image.crop((0, band.top, image.width, band.bottom))
+            futures.append(pool.submit(_recognize_band, tile.mode, tile.size, tile.tobytes(), dpi))
+
+        text = []
+        try:
+            for band, future in zip(bands, futures, strict=True):
+                for top, bottom, line in future.result():
+                    centre = band.top + (top + bottom) / 2
+                    if band.own_top <= centre < band.own_bottom:
+                        text.append(line)
+        except BrokenProcessPool:
+            self.close()  # a worker died; start a fresh pool next time
+            raise
+        except BaseException:
+            # The page failed: don't leave its other bands queued for the pool
+            for future in futures:
+                future.cancel()
+            raise
+        return '\n'.join(text)
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
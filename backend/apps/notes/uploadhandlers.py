@@ -0,0 +1,53 @@
+"""Upload handlers that hash files while Django streams them in.
+
+Django hands every uploaded chunk to the handlers exactly once, so hashing here
+gives the SHA256 and size of an upload without reading the stored file back.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+
+class _HashingMixin:
+    """Attach ``sha256`` (hex digest) to the uploaded file object."""
+
+    def new_file(self, *args, **kwargs):
+        self._sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        # The memory handler passes chunks through untouched when the upload is
+        # too large for it; only the handler that keeps the data should hash it.
+        if getattr(self, 'activated', True):
+            self._sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self._sha256.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(_HashingMixin, MemoryFileUploadHandler):
+    """In-memory uploads (up to ``FILE_UPLOAD_MAX_MEMORY_SIZE``) with a checksum."""
+
+
+class HashingTemporaryFileUploadHandler(_HashingMixin, TemporaryFileUploadHandler):
+    """Uploads spooled to a temporary file, with a checksum."""
+
+
+def uploaded_file_checksum(uploaded_file) -> str:
+    """Return the SHA256 of an upload, hashing it only if no handler did."""
+    checksum = getattr(uploaded_file, 'sha256', None)
+    if checksum:
+        return checksum
+
+    sha256 = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        sha256.update(chunk)
+    uploaded_file.seek(0)
+    return sha256.hexdigest()
@@ -0,0 +1,218 @@
+"""Resumable chunked image uploads, modelled on the tus protocol.
+
+A client creates an ``ImageUpload`` session with the file's size and type,
+sends the bytes in one or more ``PATCH`` requests that each carry the offset
+they start at, and finally passes the session id as ``upload_id`` when
+creating or updating a note. After a dropped connection it asks for the
+current offset and continues from there instead of starting over.
+
+Chunks are streamed straight into ``<MEDIA_ROOT>/uploads/<id>.part`` and
+hashed on the way in; attaching renames that file into place, so the image is
+never copied or read back. SHA256 state cannot be stored in the database, so
+each process keeps the hashers of recent sessions in memory; a chunk landing
+on a process that has not seen the previous ones first hashes the part of the
+file it missed. Writers of one session are serialized with an exclusive lock
+on the part file, which requires the web processes to share one filesystem
+(as ``FileSystemStorage`` already does).
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.parsers import BaseParser
+
+from .models import ImageUpload, NoteImage
+from .storage import blob_checksum
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the request per write
+CHUNK_READ_SIZE = 64 * 1024
+# Sessions whose hashers each process keeps
+MAX_CACHED_HASHERS = 256
+
+_hashers: OrderedDict[str, tuple[int, hashlib._Hash]] = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+class OffsetConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Upload-Offset does not match the bytes received so far.'
+    default_code = 'offset_conflict'
+
+
+class ChunkParser(BaseParser):
+    """Hands the raw request stream of a chunk to the view, unread."""
+
+    media_type = 'application/offset+octet-stream'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream
+
+
+def create(owner, filename: str, content_type: str, length: int) -> ImageUpload:
+    """Start a session and its (empty) part file."""
+    upload = ImageUpload.objects.create(
+        owner=owner,
+        filename=filename,
+        content_type=content_type,
+        length=length,
+        expires_at=_expiry(),
+    )
+    path = default_storage.path(upload.part_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return upload
+
+
+def _expiry():
+    return timezone.now() + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+
+
+def _hasher(upload: ImageUpload, file) -> hashlib._Hash:
+    """SHA256 of the first ``upload.offset`` bytes, reusing this process's state."""
+    with _hashers_lock:
+        hashed, sha256 = _hashers.pop(str(upload.id), (0, None))
+    if sha256 is None or hashed > upload.offset:
+        hashed, sha256 = 0, hashlib.sha256()
+    if hashed < upload.offset:
+        # Earlier chunks went to another process (or this one restarted)
+        file.seek(hashed)
+        remaining = upload.offset - hashed
+        while remaining:
+            data = file.read(min(CHUNK_READ_SIZE, remaining))
+            if not data:
+                raise OSError(f'Part file of upload {upload.id} is shorter than its offset')
+            sha256.update(data)
+            remaining -= len(data)
+    return sha256
+
+
+def _remember(upload: ImageUpload, sha256: hashlib._Hash) -> None:
+    with _hashers_lock:
+        _hashers[str(upload.id)] = (upload.offset, sha256)
+        while len(_hashers) > MAX_CACHED_HASHERS:
+            _hashers.popitem(last=False)
+
+
+def write_chunk(upload: ImageUpload, offset: int, stream, size: int) -> int:
+    """Append ``size`` bytes from ``stream`` at ``offset``; return the new offset.
+
+    Bytes that arrive before the client disconnects are kept, so the next
+    attempt resumes after them.
+    """
+    with open(default_storage.path(upload.part_name), 'r+b') as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        upload.refresh_from_db(fields=['offset', 'length'])
+        if offset != upload.offset:
+            raise OffsetConflict()
+        if offset + size > upload.length:
+            raise serializers.ValidationError(
+                {'detail': f'Chunk ends past the declared length of {upload.length} bytes.'}
+            )
+
+        sha256 = _hasher(upload, file)
+        # Drop bytes past the offset left by a write that died before recording them
+        file.seek(offset)
+        file.truncate()
+        try:
+            remaining = size
+            while remaining:
+                data = stream.read(min(CHUNK_READ_SIZE, remaining))
+                if not data:
+                    break
+                file.write(data)
+                sha256.update(data)
+                upload.offset += len(data)
+                remaining -= len(data)
+        finally:
+            file.flush()
+            upload.expires_at = _expiry()
+            upload.save(update_fields=['offset', 'expires_at'])
+            _remember(upload, sha256)
+    return upload.offset
+
+
+def get_complete(owner, upload_id) -> ImageUpload:
+    """The owner's fully received upload, or a validation error for ``upload_id``.
+
+    Call it inside the note's write transaction: the row lock makes a second
+    attempt to attach the same upload wait, then find it gone.
+    """
+    upload = (
+        ImageUpload.objects.select_for_update()
+        .filter(pk=upload_id, owner=owner, expires_at__gt=timezone.now())
+        .first()
+    )
+    if upload is None:
+        raise serializers.ValidationError({'upload_id': 'Unknown or expired upload.'})
+    if not upload.complete:
+        received = f'{upload.offset} of {upload.length} bytes received'
+        raise serializers.ValidationError({'upload_id': f'Upload is incomplete ({received}).'})
+    return upload
+
+
+def build_note_image(note, upload: ImageUpload) -> NoteImage:
+    """Move a complete upload into the note's storage and return its unsaved NoteImage."""
+    part_path = default_storage.path(upload.part_name)
+    with open(part_path, 'rb') as file:
+        fcntl.flock(file, fcntl.LOCK_SH)
+        checksum = _hasher(upload, file).hexdigest()
+        file.seek(0)
+        try:
+            # The same check serializers.ImageField runs on multipart uploads
+            with Image.open(file) as image:
+                image.verify()
+        except Exception:
+            raise serializers.ValidationError(
+                {'upload_id': serializers.ImageField.default_error_messages['invalid_image']}
+            ) from None
+
+    note_image = NoteImage(note_id=note.pk, file_size=upload.length, checksum=checksum)
+    field = NoteImage._meta.get_field('image')
+    name = field.storage.get_available_name(field.generate_filename(note_image, upload.filename))
+    path = field.storage.path(name)
+    if os.path.exists(path) and blob_checksum(name):
+        os.unlink(part_path)  # the same content is stored already
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(part_path, path)
+        if settings.FILE_UPLOAD_PERMISSIONS is not None:
+            os.chmod(path, settings.FILE_UPLOAD_PERMISSIONS)
+    note_image.image.name = name
+
+    with _hashers_lock:
+        _hashers.pop(str(upload.id), None)
+    upload.delete()
+    return note_image
+
+
+def discard(upload: ImageUpload) -> None:
+    """Delete a session and whatever it received."""
+    with _hashers_lock:
+        _hashers.pop(str(upload.id), None)
+    default_storage.delete(upload.part_name)
+    upload.delete()
+
+
+def prune() -> int:
+    """Delete sessions that received nothing for ``UPLOAD_SESSION_TTL_SECONDS``."""
+    expired = list(ImageUpload.objects.filter(expires_at__lte=timezone.now()))
+    for upload in expired:
+        discard(upload)
+    if expired:
+        logger.info(f'Pruned {len(expired)} expired image upload(s)')
+    return len(expired)
@@ -1,10 +1,17 @@
+from django.urls import path
 from rest_framework.routers import SimpleRouter
 
-from .views import NoteViewSet
+from .async_views import note_events
+from .views import ImageUploadViewSet, NoteViewSet
 
 app_name = 'notes'
 
 router = SimpleRouter()
+# Before the notes, whose detail route would otherwise match uploads/
+router.register(r'uploads', ImageUploadViewSet, basename='image-upload')
 router.register(r'', NoteViewSet, basename='note')
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('events/', note_events, name='note-events'),
+    *router.urls,
+]
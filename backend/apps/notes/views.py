@@ -1,62 +1,172 @@
 from __future__ import annotations
 
-from rest_framework import permissions, serializers as drf_serializers, status, viewsets
+import heapq
+from itertools import islice
+from operator import itemgetter
+
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework import serializers as drf_serializers
+from rest_framework.decorators import action
+from rest_framework.exceptions import UnsupportedMediaType
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
-from .models import Note, NoteImage
-from .serializers import NoteSerializer
+from nomad_backend import metrics
+from nomad_backend.renderers import ORJSONRenderer
 
+from . import analysis_cache, batch, conditional, listing, renditions, search, uploads
+from .models import ImageUpload, Note, NoteImage, NoteTombstone, SyncClock
+from .pagination import NoteCursorPagination
+from .serializers import (
+    ImageUploadSerializer,
+    NoteBatchResultSerializer,
+    NoteBatchSerializer,
+    NoteChangesSerializer,
+    NoteSerializer,
+)
+from .uploadhandlers import uploaded_file_checksum
+from .vision import get_vision_provider
 
 # Image validation constants (10 MB limit as per spec)
 MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10 MB in bytes
 ALLOWED_IMAGE_TYPES = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/webp']
 
+# Search result limits
+SEARCH_PAGE_SIZE = 50
+SEARCH_MAX_PAGE_SIZE = 200
+
+# Delta sync page sizes
+SYNC_PAGE_SIZE = 200
+SYNC_MAX_PAGE_SIZE = 1000
+
+
+def validate_image(
+    size: int, content_type: str, size_field: str = 'image_file', type_field: str = 'image_file'
+):
+    """Validate image file size and type."""
+    # Check file size
+    if size > MAX_IMAGE_SIZE:
+        limit = MAX_IMAGE_SIZE // (1024 * 1024)
+        raise drf_serializers.ValidationError({
+            size_field: f'Image file too large. Maximum size is {limit} MB.'
+        })
+
+    # Check content type
+    if content_type not in ALLOWED_IMAGE_TYPES:
+        raise drf_serializers.ValidationError({
+            type_field: f'Invalid image type. Allowed types: {", ".join(ALLOWED_IMAGE_TYPES)}.'
+        })
+
+
+def attach_image(note: Note, note_image: NoteImage) -> NoteImage:
+    """Save ``note_image`` (built with ``note_id``) as the note's image and start its analysis."""
+    # Delete existing image if present (enforce one-image-per-note rule)
+    if hasattr(note, 'image'):
+        note.image.delete()
+    note_image.note = note
+
+    # Identical bytes analyzed before: reuse the result instead of queueing OCR
+    cached = analysis_cache.lookup(note_image.checksum, get_vision_provider().identity)
+    if cached is not None:
+        analysis_cache.apply(note_image, cached)
+        note_image.save()
+        # No worker job will run for this image, so render its previews here and
+        # do what the worker does with a result: new revision, OCR text searchable
+        renditions.ensure_renditions(note_image)
+        Note.bump_revision(note.pk, note.owner_id)
+        search.index_notes([note.pk])
+        return note_image
+
+    note_image.save()
+
+    # Trigger async analysis
+    from .tasks import analyze_note_image_async
+    analyze_note_image_async(str(note_image.id))
+
+    return note_image
+
+
+def attach_upload(note: Note, upload_id) -> NoteImage:
+    """Attach a completed resumable upload to the note (inside its write transaction)."""
+    upload = uploads.get_complete(note.owner_id, upload_id)
+    return attach_image(note, uploads.build_note_image(note, upload))
+
 
 class NoteViewSet(viewsets.ModelViewSet):
     serializer_class = NoteSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = NoteCursorPagination
+    renderer_classes = (ORJSONRenderer, BrowsableAPIRenderer)
+    # Build list responses from .values() rows (see apps.notes.listing) instead
+    # of NoteSerializer; the output is identical.
+    fast_list = True
 
     def get_queryset(self):
         return Note.objects.filter(owner=self.request.user).select_related('image')
 
+    def list(self, request, *args, **kwargs):
+        validators = conditional.list_validators(request, request.user.id)
+        response = conditional.not_modified(request, validators)
+        if response is None:
+            response = conditional.set_validators(self._list(request, *args, **kwargs), validators)
+        return response
+
+    def _list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.fast_list:
+            queryset = listing.note_rows(queryset)
+        page = self.paginate_queryset(queryset)
+        # Query first, so the serialize phase is serializer work only
+        notes = list(queryset) if page is None else page
+        with metrics.phase('serialize'):
+            if self.fast_list:
+                data = listing.serialize_rows(notes, request)
+            else:
+                data = self.get_serializer(notes, many=True).data
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = conditional.note_validators(request, request.user.id, kwargs['pk'])
+        response = conditional.not_modified(request, validators)
+        if response is None:
+            note = self.get_object()
+            with metrics.phase('serialize'):
+                data = self.get_serializer(note).data
+            response = conditional.set_validators(Response(data), validators)
+        return response
+
     def _validate_image(self, image_file):
-        """Validate image file size and type."""
-        # Check file size
-        if image_file.size > MAX_IMAGE_SIZE:
-            raise drf_serializers.ValidationError({
-                'image_file': f'Image file too large. Maximum size is {MAX_IMAGE_SIZE // (1024 * 1024)} MB.'
-            })
-
-        # Check content type
-        content_type = image_file.content_type
-        if content_type not in ALLOWED_IMAGE_TYPES:
-            raise drf_serializers.ValidationError({
-                'image_file': f'Invalid image type. Allowed types: {", ".join(ALLOWED_IMAGE_TYPES)}.'
-            })
+        validate_image(image_file.size, image_file.content_type)
 
     def _handle_image_upload(self, note: Note, image_file):
         """Create or update NoteImage for the given note."""
-        # Delete existing image if present (enforce one-image-per-note rule)
-        if hasattr(note, 'image'):
-            note.image.delete()
-
-        # Create new NoteImage
+        # The checksum was computed while the upload streamed in
         note_image = NoteImage(
-            note=note,
+            note_id=note.pk,
             image=image_file,
             file_size=image_file.size,
+            checksum=uploaded_file_checksum(image_file),
         )
-        note_image.save()
-
-        # Calculate and save checksum
-        note_image.checksum = note_image.calculate_checksum()
-        note_image.save(update_fields=['checksum'])
-
-        # Trigger async analysis
-        from .tasks import analyze_note_image_async
-        analyze_note_image_async(str(note_image.id))
+        return attach_image(note, note_image)
 
-        return note_image
+    def _query_int(self, name: str, default: int | None) -> int | None:
+        value = self.request.query_params.get(name)
+        if value is None:
+            return default
+        try:
+            number = int(value)
+        except ValueError:
+            number = -1
+        if number < 0:
+            raise drf_serializers.ValidationError({name: 'Must be a non-negative integer.'})
+        return number
 
     def perform_create(self, serializer):
         image_file = self.request.data.get('image_file')
@@ -64,10 +174,14 @@ class NoteViewSet(viewsets.ModelViewSet):
         if image_file:
             self._validate_image(image_file)
 
-        note = serializer.save(owner=self.request.user)
+        # Note and image commit together so a sync never sees one without the other
+        with transaction.atomic():
+            note = serializer.save(owner=self.request.user)
 
-        if image_file:
-            self._handle_image_upload(note, image_file)
+            if image_file:
+                self._handle_image_upload(note, image_file)
+            elif 'upload_id' in serializer.validated_data:
+                attach_upload(note, serializer.validated_data['upload_id'])
 
     def perform_update(self, serializer):
         image_file = self.request.data.get('image_file')
@@ -75,7 +189,178 @@ class NoteViewSet(viewsets.ModelViewSet):
         if image_file:
             self._validate_image(image_file)
 
-        note = serializer.save()
+        with transaction.atomic():
+            note = serializer.save()
 
-        if image_file:
-            self._handle_image_upload(note, image_file)
+            if image_file:
+                self._handle_image_upload(note, image_file)
+            elif 'upload_id' in serializer.validated_data:
+                attach_upload(note, serializer.validated_data['upload_id'])
+
+    @extend_schema(request=NoteBatchSerializer, responses=NoteBatchResultSerializer)
+    @action(detail=False, methods=['post'], pagination_class=None)
+    def batch(self, request):
+        """Apply many create/update/delete operations in one transaction."""
+        envelope = NoteBatchSerializer(data=request.data)
+        envelope.is_valid(raise_exception=True)
+        results = batch.apply_operations(
+            request.user,
+            envelope.validated_data['operations'],
+            self.get_serializer_context(),
+        )
+        return Response({'results': results})
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'q', str, required=True, description='Words to look for in title, body and OCR text'
+            ),
+            OpenApiParameter(
+                'limit', int, description=f'Maximum results (max {SEARCH_MAX_PAGE_SIZE})'
+            ),
+        ],
+        responses=NoteSerializer(many=True),
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def search(self, request):
+        """Full-text search over the user's notes, best match first."""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise drf_serializers.ValidationError({'q': 'This parameter is required.'})
+        limit = self._query_int('limit', default=SEARCH_PAGE_SIZE)
+        limit = min(limit, SEARCH_MAX_PAGE_SIZE) or SEARCH_PAGE_SIZE
+
+        note_ids = search.search(request.user.id, query, limit)
+        notes = self.get_queryset().in_bulk(note_ids)
+        ranked = [notes[note_id] for note_id in note_ids if note_id in notes]
+        return Response(self.get_serializer(ranked, many=True).data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'since', int, description='Cursor from the previous sync; omit for a full sync'
+            ),
+            OpenApiParameter(
+                'limit', int,
+                description=f'Maximum changes per response (max {SYNC_MAX_PAGE_SIZE})',
+            ),
+        ],
+        responses=NoteChangesSerializer,
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def changes(self, request):
+        """Return notes changed and deleted since the ``since`` cursor."""
+        since = self._query_int('since', default=None)
+        limit = self._query_int('limit', default=SYNC_PAGE_SIZE)
+        limit = min(limit, SYNC_MAX_PAGE_SIZE) or SYNC_PAGE_SIZE
+
+        # Read the clock first: every revision up to it is already committed.
+        cursor = SyncClock.current(request.user.id)
+        notes = self.get_queryset().filter(revision__lte=cursor).order_by('revision')
+        tombstones = NoteTombstone.objects.none()
+        if since is not None:
+            notes = notes.filter(revision__gt=since)
+            tombstones = NoteTombstone.objects.filter(
+                owner=request.user,
+                revision__gt=since,
+                revision__lte=cursor,
+            ).order_by('revision').values_list('revision', 'note_id')
+
+        changes = heapq.merge(
+            ((note.revision, note) for note in notes[:limit + 1]),
+            tombstones[:limit + 1],
+            key=itemgetter(0),
+        )
+        page = list(islice(changes, limit + 1))
+        has_more = len(page) > limit
+        page = page[:limit]
+        if has_more:
+            cursor = page[-1][0]
+
+        payload = {
+            'cursor': cursor,
+            'has_more': has_more,
+            'notes': [item for _, item in page if isinstance(item, Note)],
+            'deleted': [item for _, item in page if not isinstance(item, Note)],
+        }
+        return Response(NoteChangesSerializer(payload, context=self.get_serializer_context()).data)
+
+
+class ImageUploadViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Resumable image uploads (see ``apps.notes.uploads``).
+
+    ``POST`` starts a session, ``PATCH`` with an ``Upload-Offset`` header and an
+    ``application/offset+octet-stream`` body appends a chunk, ``GET``/``HEAD``
+    report the offset to resume from and ``DELETE`` aborts.
+    """
+
+    serializer_class = ImageUploadSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+    parser_classes = (JSONParser, uploads.ChunkParser)
+    renderer_classes = (ORJSONRenderer, BrowsableAPIRenderer)
+
+    def get_queryset(self):
+        return ImageUpload.objects.filter(owner=self.request.user, expires_at__gt=timezone.now())
+
+    def _offset_headers(self, upload: ImageUpload) -> dict:
+        return {
+            'Upload-Offset': str(upload.offset),
+            'Upload-Length': str(upload.length),
+            'Cache-Control': 'no-store',
+        }
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        validate_image(
+            data['length'], data['content_type'], size_field='length', type_field='content_type'
+        )
+        serializer.instance = uploads.create(self.request.user, **data)
+
+    def get_success_headers(self, data):
+        location = reverse('notes:image-upload-detail', args=[data['id']])
+        return {'Location': self.request.build_absolute_uri(location)}
+
+    def retrieve(self, request, *args, **kwargs):
+        upload = self.get_object()
+        return Response(self.get_serializer(upload).data, headers=self._offset_headers(upload))
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('Upload-Offset', int, OpenApiParameter.HEADER, required=True,
+                             description='Byte offset this chunk starts at'),
+        ],
+        request={uploads.ChunkParser.media_type: bytes},
+        responses={204: None},
+    )
+    def partial_update(self, request, *args, **kwargs):
+        """Append the request body to the upload at ``Upload-Offset``."""
+        upload = self.get_object()
+        if request.content_type.split(';')[0].strip() != uploads.ChunkParser.media_type:
+            raise UnsupportedMediaType(request.content_type)
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            size = int(request.headers.get('Content-Length') or 0)
+        except ValueError:
+            offset = size = -1
+        if offset < 0 or size < 0:
+            raise drf_serializers.ValidationError(
+                {'Upload-Offset': 'Must be a non-negative integer.'}
+            )
+
+        try:
+            uploads.write_chunk(upload, offset, request.data if size else None, size)
+        except uploads.OffsetConflict as exc:
+            return Response(
+                {'detail': exc.detail, 'offset': upload.offset},
+                status=exc.status_code,
+                headers=self._offset_headers(upload),
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=self._offset_headers(upload))
+
+    def perform_destroy(self, instance):
+        uploads.discard(instance)
@@ -2,12 +2,21 @@
 
 from __future__ import annotations
 
+import functools
 import logging
+import math
+import threading
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Protocol
 
+from .metrics import OCR_STAGE_SECONDS, PROVIDER_FAILURES, PROVIDER_SECONDS
+from .preprocessing import Preprocessor
+from .tiling import TiledOcr
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,6 +28,8 @@ class VisionResult:
     object_labels: list[str] = None
     success: bool = True
     error: str = ''
+    #: Succeeded with some providers missing; such results are not cached
+    partial: bool = False
 
     def __post_init__(self):
         if self.object_labels is None:
@@ -28,6 +39,9 @@ class VisionResult:
 class VisionProvider(Protocol):
     """Protocol for vision analysis providers."""
 
+    #: Stable name + version of the provider; cached results are keyed on it.
+    identity: str
+
     def analyze(self, image_path: str | Path) -> VisionResult:
         """Analyze an image and return OCR text and object labels."""
         ...
@@ -36,6 +50,8 @@ class VisionProvider(Protocol):
 class DummyVisionProvider:
     """Dummy vision provider for testing (returns placeholder results)."""
 
+    identity = 'dummy'
+
     def analyze(self, image_path: str | Path) -> VisionResult:
         """Return dummy analysis results."""
         logger.info(f'DummyVisionProvider analyzing {image_path}')
@@ -46,34 +62,155 @@ class DummyVisionProvider:
         )
 
 
+@functools.cache
+def _tesseract_version() -> str:
+    """Version of the installed tesseract binary (queried once per process)."""
+    try:
+        import pytesseract
+
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return 'unknown'
+
+
 class TesseractVisionProvider:
-    """Vision provider using Tesseract OCR for text extraction."""
+    """Vision provider using Tesseract OCR for text extraction.
+
+    With ``tesserocr`` installed, the provider keeps one Tesseract engine loaded
+    for its whole lifetime, so language data is read once per worker process
+    rather than once per image. The engine starts on the first analysis, so
+    processes that only need ``identity`` (web workers looking up cached
+    results) never load it. Without ``tesserocr``, each image is OCR'd by a
+    fresh ``tesseract`` subprocess through pytesseract.
+
+    ``timeout`` (seconds) makes Tesseract give up on an image that takes
+    longer; the subprocess is killed or the engine's recognition stopped.
+    ``preprocessing`` holds ``preprocessing.Preprocessor`` options and
+    ``tiling`` the ``tiling.TiledOcr`` ones: images above its size threshold
+    are OCR'd in parallel bands by a process pool instead of in one call.
+    """
+
+    def __init__(
+        self,
+        lang: str = 'eng',
+        persistent: bool = True,
+        timeout: float | None = None,
+        preprocessing: dict | None = None,
+        tiling: dict | None = None,
+    ):
+        self.lang = lang
+        self.timeout = timeout
+        self.preprocessor = Preprocessor(**(preprocessing or {}))
+        self.tiler = TiledOcr(lang=lang, timeout=timeout, **(tiling or {}))
+        self._tesserocr = None
+        self._engine = None
+        self._engine_version = None
+        self._engine_lock = threading.Lock()
+        self.pytesseract = None
 
-    def __init__(self):
         try:
-            import pytesseract
             from PIL import Image
 
-            self.pytesseract = pytesseract
             self.Image = Image
-            self._available = True
         except ImportError:
+            self.Image = None
+
+        if persistent:
+            try:
+                import tesserocr
+
+                self._engine_version = tesserocr.tesseract_version().split()[1]
+                self._tesserocr = tesserocr
+            except ImportError:
+                logger.info('tesserocr not installed; running one tesseract subprocess per image')
+            except Exception as e:
+                logger.warning(f'Could not query the tesserocr library: {e}')
+
+        try:
+            import pytesseract
+
+            self.pytesseract = pytesseract
+        except ImportError:
+            pass
+
+        self._available = self.Image is not None and (
+            self._tesserocr is not None or self.pytesseract is not None
+        )
+        if not self._available:
             logger.warning('pytesseract or Pillow not installed. OCR will not be available.')
-            self._available = False
+
+    @property
+    def identity(self) -> str:
+        if not self._available:
+            return 'tesseract:unavailable'
+        return f'tesseract:{self._engine_version or _tesseract_version()}:{self.lang}'
+
+    @property
+    def persistent(self) -> bool:
+        return self._tesserocr is not None
+
+    def close(self) -> None:
+        """Release the persistent engine and the tiling pool, if any."""
+        self.tiler.close()
+        if self._engine is not None:
+            self._engine.End()
+            self._engine = None
+
+    def _start_engine(self) -> None:
+        """Load the persistent engine on first use (called with the engine lock held)."""
+        if self._engine is not None or self._tesserocr is None:
+            return
+        try:
+            self._engine = self._tesserocr.PyTessBaseAPI(lang=self.lang)
+        except Exception as e:
+            logger.warning(f'Could not start a persistent Tesseract engine: {e}')
+            self._tesserocr = None
+            self._engine_version = None
+            self._available = self.Image is not None and self.pytesseract is not None
 
     def analyze(self, image_path: str | Path) -> VisionResult:
         """Extract text using Tesseract OCR."""
-        if not self._available:
-            return VisionResult(
-                ocr_text='',
-                object_labels=[],
-                success=False,
-                error='Tesseract not available - install pytesseract and Pillow',
-            )
+        return self.analyze_batch([image_path])[0]
 
+    def analyze_batch(self, image_paths: list[str | Path]) -> list[VisionResult]:
+        """Extract text from several images in one call, reusing the loaded engine."""
+        # A Tesseract engine handles one image at a time
+        with self._engine_lock:
+            if self._available:
+                self._start_engine()
+            if not self._available:
+                return [
+                    VisionResult(
+                        ocr_text='',
+                        object_labels=[],
+                        success=False,
+                        error='Tesseract not available - install pytesseract and Pillow',
+                    )
+                    for _ in image_paths
+                ]
+            return [self._analyze_one(image_path) for image_path in image_paths]
+
+    def _ocr(self, image, dpi: int | None = None) -> str:
+        if self._engine is not None:
+            self._engine.SetImage(image)
+            if dpi:
+                self._engine.SetSourceResolution(dpi)
+            if self.timeout and not self._engine.Recognize(timeout=int(self.timeout * 1000)):
+                raise TimeoutError(f'Tesseract timed out after {self.timeout}s')
+            return self._engine.GetUTF8Text()
+        return self.pytesseract.image_to_string(
+            image, lang=self.lang, config=f'--dpi {dpi}' if dpi else '', timeout=self.timeout or 0
+        )
+
+    def _analyze_one(self, image_path: str | Path) -> VisionResult:
         try:
-            image = self.Image.open(image_path)
-            ocr_text = self.pytesseract.image_to_string(image).strip()
+            image, dpi = self.preprocessor.run(image_path)
+            started = time.perf_counter()
+            if self.tiler.wants(image):
+                ocr_text = self.tiler.recognize(image, dpi).strip()
+            else:
+                ocr_text = self._ocr(image, dpi).strip()
+            OCR_STAGE_SECONDS.labels('recognize').observe(time.perf_counter() - started)
 
             logger.info(f'Tesseract OCR extracted {len(ocr_text)} characters from {image_path}')
 
@@ -93,10 +230,107 @@ class TesseractVisionProvider:
 
 
 class CompositeVisionProvider:
-    """Combines multiple vision providers for comprehensive analysis."""
+    """Runs several vision providers concurrently and merges their results.
 
-    def __init__(self, providers: list[VisionProvider] | None = None):
+    Each provider gets a dedicated thread, started on first use and kept for
+    the composite's lifetime, and an optional timeout in seconds. Results that
+    arrive in time are merged; a provider that times out is abandoned (its
+    call cannot be interrupted, so give it its own timeout option where it has
+    one) and the merged result is marked ``partial``.
+    """
+
+    def __init__(
+        self,
+        providers: list[VisionProvider] | None = None,
+        timeouts: list[float | None] | None = None,
+    ):
         self.providers = providers or [TesseractVisionProvider()]
+        self.timeouts = timeouts or [None] * len(self.providers)
+        self._executors: list[ThreadPoolExecutor] | None = None
+        self._executors_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> CompositeVisionProvider:
+        """Build the providers listed in ``settings.VISION_PROVIDERS``."""
+        from django.conf import settings
+        from django.utils.module_loading import import_string
+
+        providers, timeouts = [], []
+        for config in settings.VISION_PROVIDERS:
+            providers.append(import_string(config['BACKEND'])(**config.get('OPTIONS', {})))
+            timeouts.append(config.get('TIMEOUT'))
+        return cls(providers, timeouts)
+
+    @property
+    def identity(self) -> str:
+        return '+'.join(provider.identity for provider in self.providers)
+
+    def close(self) -> None:
+        """Stop the provider threads and release the providers' resources."""
+        with self._executors_lock:
+            executors, self._executors = self._executors, None
+        for executor in executors or ():
+            executor.shutdown(wait=False, cancel_futures=True)
+        for provider in self.providers:
+            if hasattr(provider, 'close'):
+                provider.close()
+
+    def _get_executors(self) -> list[ThreadPoolExecutor]:
+        with self._executors_lock:
+            if self._executors is None:
+                self._executors = [
+                    ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'vision-{index}')
+                    for index in range(len(self.providers))
+                ]
+            return self._executors
+
+    @staticmethod
+    def _run(provider: VisionProvider, image_path: str | Path) -> VisionResult:
+        started = time.perf_counter()
+        try:
+            result = provider.analyze(image_path)
+        except Exception as e:
+            logger.exception(f'{provider.identity} raised while analyzing {image_path}')
+            result = VisionResult(success=False, error=str(e))
+        PROVIDER_SECONDS.labels(provider.identity).observe(time.perf_counter() - started)
+        if not result.success:
+            PROVIDER_FAILURES.labels(provider.identity).inc()
+        return result
+
+    def _gather(self, image_path: str | Path) -> list[VisionResult]:
+        started = time.monotonic()
+        executors = self._get_executors()
+        futures = {
+            executors[index].submit(self._run, provider, image_path): index
+            for index, provider in enumerate(self.providers)
+        }
+        deadlines = {
+            future: math.inf if self.timeouts[index] is None else started + self.timeouts[index]
+            for future, index in futures.items()
+        }
+        results: list[VisionResult | None] = [None] * len(self.providers)
+
+        pending = set(futures)
+        while pending:
+            next_deadline = min(deadlines[future] for future in pending)
+            timeout = None
+            if next_deadline != math.inf:
+                timeout = max(next_deadline - time.monotonic(), 0)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+
+            now = time.monotonic()
+            for future in [future for future in pending if deadlines[future] <= now]:
+                pending.discard(future)
+                future.cancel()  # only helps if the call has not started yet
+                index = futures[future]
+                identity = self.providers[index].identity
+                error = f'timed out after {self.timeouts[index]}s'
+                logger.warning(f'{identity} {error} on {image_path}')
+                PROVIDER_FAILURES.labels(identity).inc()
+                results[index] = VisionResult(success=False, error=error)
+        return results
 
     def analyze(self, image_path: str | Path) -> VisionResult:
         """Run all providers and merge results."""
@@ -104,8 +338,7 @@ class CompositeVisionProvider:
         all_labels = set()
         errors = []
 
-        for provider in self.providers:
-            result = provider.analyze(image_path)
+        for provider, result in zip(self.providers, self._gather(image_path), strict=True):
             if result.success:
                 if result.ocr_text:
                     all_ocr_text.append(result.ocr_text)
@@ -118,11 +351,15 @@ class CompositeVisionProvider:
             object_labels=sorted(list(all_labels)),
             success=len(errors) < len(self.providers),  # Success if at least one provider worked
             error='; '.join(errors) if errors else '',
+            partial=bool(errors),
         )
 
 
+@functools.cache
 def get_vision_provider() -> VisionProvider:
-    """Factory function to get the configured vision provider."""
-    # For now, use Tesseract. In production, this could be configured via settings
-    # to use cloud providers like Google Vision API, AWS Rekognition, etc.
-    return TesseractVisionProvider()
+    """Factory function to get the configured vision provider.
+
+    The providers in ``settings.VISION_PROVIDERS`` are built once per process
+    and reused, so worker processes keep their OCR engines loaded between jobs.
+    """
+    return CompositeVisionProvider.from_settings()
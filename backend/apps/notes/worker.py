@@ -0,0 +1,38 @@
+"""Entry points executed inside analysis worker processes.
+
+This module must stay importable before Django is configured: worker processes
+are spawned fresh and unpickle ``init_worker`` before any app module can load.
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+
+
+def init_worker(concurrency: int | None = None) -> None:
+    """Configure Django once per spawned worker process."""
+    # Shutdown is coordinated by the parent, which lets in-flight jobs finish.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'nomad_backend.settings')
+    if concurrency is not None:
+        # Settings derived from the worker count (the OCR band pool) follow --concurrency
+        os.environ['ANALYSIS_WORKER_CONCURRENCY'] = str(concurrency)
+
+    import django
+
+    django.setup()
+
+
+def run_job(note_image_id: str) -> str:
+    """Analyze one claimed image and return its id."""
+    from django.db import close_old_connections
+
+    from .tasks import analyze_note_image
+
+    close_old_connections()
+    try:
+        analyze_note_image(note_image_id)
+    finally:
+        close_old_connections()
+    return note_image_id
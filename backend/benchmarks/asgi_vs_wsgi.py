@@ -0,0 +1,158 @@
+"""Concurrent-connection throughput of the notes list: gunicorn (WSGI) vs uvicorn (ASGI).
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.asgi_vs_wsgi --connections 64 --client-delay 0.2
+
+Both servers get the same number of worker processes and a fresh SQLite
+database seeded with one user's notes. Every simulated client trickles its
+request headers over ``--client-delay`` seconds, like a phone on a poor
+connection, then reads the whole response. Needs the ``asgi`` extra and
+gunicorn.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import shutil
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+
+from benchmarks.common import BACKEND_DIR, django_env, setup_django
+
+SERVERS = {
+    'wsgi': [
+        'gunicorn', 'nomad_backend.wsgi:application', '--workers', '{workers}',
+        '--bind', '127.0.0.1:{port}',
+    ],
+    'asgi': [
+        'uvicorn', 'nomad_backend.asgi:application', '--workers', '{workers}', '--port', '{port}',
+        '--log-level', 'warning',
+    ],
+}
+
+
+def seed(env: dict[str, str], notes: int) -> str:
+    """Migrate the benchmark database, create its notes and return an access token."""
+    setup_django(env)
+
+    from django.contrib.auth import get_user_model
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from apps.notes.models import Note
+
+    user = get_user_model().objects.create_user(email='bench@example.com', password='benchmark123')
+    body = 'Lorem ipsum dolor sit amet. ' * 8
+    for index in range(notes):
+        Note.objects.create(owner=user, title=f'Note {index}', body=body)
+    return str(AccessToken.for_user(user))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_listening(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+async def client(
+    port: int, token: str, delay: float, stop_at: float, latencies: list[float], errors: list[str]
+):
+    head = f'GET /api/notes/ HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n'.encode()
+    tail = f'Authorization: Bearer {token}\r\nConnection: close\r\n\r\n'.encode()
+    while time.monotonic() < stop_at:
+        started = time.monotonic()
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(head)
+            await writer.drain()
+            await asyncio.sleep(delay)
+            writer.write(tail)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+        except OSError as e:
+            errors.append(str(e))
+            continue
+        if response.startswith(b'HTTP/1.1 200'):
+            latencies.append(time.monotonic() - started)
+        else:
+            errors.append(response[:40].decode(errors='replace'))
+
+
+async def load(port: int, token: str, connections: int, delay: float, duration: float):
+    latencies: list[float] = []
+    errors: list[str] = []
+    stop_at = time.monotonic() + duration
+    await asyncio.gather(*(
+        client(port, token, delay, stop_at, latencies, errors) for _ in range(connections)
+    ))
+    return latencies, errors
+
+
+def run(name: str, env: dict[str, str], token: str, args) -> None:
+    if shutil.which(SERVERS[name][0]) is None:
+        print(f'{name:<5} skipped ({SERVERS[name][0]} is not installed)')
+        return
+
+    port = free_port()
+    command = [part.format(workers=args.workers, port=port) for part in SERVERS[name]]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+    try:
+        wait_until_listening(port)
+        latencies, errors = asyncio.run(
+            load(port, token, args.connections, args.client_delay, args.duration)
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+    if not latencies:
+        print(f'{name:<5} no successful requests ({len(errors)} errors)')
+        return
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+    print(
+        f'{name:<5} {len(latencies) / args.duration:8.1f} req/s'
+        f'  p50 {statistics.median(latencies) * 1000:7.1f} ms'
+        f'  p95 {p95 * 1000:7.1f} ms  ({len(errors)} errors)'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument(
+        '--client-delay', type=float, default=0.2, help='seconds spent sending each request'
+    )
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--notes', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = django_env(tmp)
+        token = seed(env, args.notes)
+        print(
+            f'{args.connections} connections, {args.client_delay:.2f}s per request upload,'
+            f' {args.workers} workers, {args.duration:.0f}s each'
+        )
+        for name in SERVERS:
+            run(name, env, token, args)
+
+
+if __name__ == '__main__':
+    main()
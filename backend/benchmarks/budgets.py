@@ -0,0 +1,33 @@
+"""Most database queries one request (or one analysis job) may run.
+
+``tests/test_query_budgets.py`` enforces these in CI and ``benchmarks.suite``
+reports against them. Transaction control (``BEGIN``, ``SAVEPOINT``, ...) is
+not counted, since it differs between a test transaction and autocommit. Lower
+a budget when a change saves queries; raising one should be a reviewed decision.
+"""
+
+TRANSACTION_CONTROL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+def count_queries(captured_queries: list[dict]) -> int:
+    """Number of statements in ``CaptureQueriesContext.captured_queries`` that do work."""
+    return sum(1 for query in captured_queries if not query['sql'].startswith(TRANSACTION_CONTROL))
+
+
+QUERY_BUDGETS = {
+    # user lookup + outstanding refresh token
+    'signin': 2,
+    # user lookup, blacklist the used token (find it, insert), record its replacement
+    'token_refresh': 4,
+    # sync clock (ETag) + one page of notes with their images
+    'note_list': 2,
+    'note_detail': 2,
+    # sync clock, note insert, search index
+    'note_create': 7,
+    # + blob name lookup and reference count (one query less for duplicate content)
+    'note_upload': 12,
+    'note_changes': 3,
+    'note_search': 2,
+    # one analyze_note_image run, renditions and events included
+    'analysis': 17,
+}
@@ -0,0 +1,34 @@
+"""Helpers shared by the benchmarks: a throwaway database and Django setup."""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def django_env(directory: str | Path) -> dict[str, str]:
+    """Environment for a production-like settings module backed by SQLite in ``directory``."""
+    return {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': 'nomad_backend.settings',
+        'DJANGO_DEBUG': 'False',
+        'DJANGO_SECRET_KEY': 'benchmark-secret-key-that-is-long-enough-for-hs256',
+        'ALLOWED_HOSTS': '127.0.0.1,testserver',
+        'DATABASE_URL': f'sqlite:///{directory}/bench.sqlite3',
+    }
+
+
+def setup_django(env: dict[str, str]) -> None:
+    """Configure Django in this process and migrate the benchmark database."""
+    os.environ.update(env)
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('migrate', verbosity=0)
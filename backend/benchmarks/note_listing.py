@@ -0,0 +1,99 @@
+"""Note list rendering: NoteSerializer + JSONRenderer vs .values() rows + ORJSONRenderer.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.note_listing --notes 200 --rounds 50
+
+Seeds one user with notes (half of them with analyzed images) in a throwaway
+SQLite database and times building the list response body both ways, query
+included. Also checks the two bodies are byte-identical.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+
+from benchmarks.common import django_env, setup_django
+
+
+def seed(notes: int):
+    from django.contrib.auth import get_user_model
+
+    from apps.notes.models import Note, NoteImage
+
+    user = get_user_model().objects.create_user(email='bench@example.com', password='benchmark123')
+    body = 'Lorem ipsum dolor sit amet. ' * 8
+    for index in range(notes):
+        note = Note.objects.create(owner=user, title=f'Note {index}', body=body)
+        if index % 2:
+            NoteImage.objects.create(
+                note=note,
+                image=f'notes/{note.id}/scan {index}.png',
+                thumbnail=f'notes/{note.id}/scan {index}.thumb.webp',
+                preview=f'notes/{note.id}/scan {index}.preview.webp',
+                file_size=123456,
+                checksum='0' * 64,
+                analysis_status=NoteImage.AnalysisStatus.COMPLETED,
+                ocr_text='Meeting notes for the quarterly planning session\n' * 4,
+                object_labels=['document', 'text'],
+            )
+    return user
+
+
+def time_rounds(render, rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        render()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(django_env(tmp))
+
+        from rest_framework.renderers import JSONRenderer
+        from rest_framework.test import APIRequestFactory
+
+        from apps.notes import listing
+        from apps.notes.models import Note
+        from apps.notes.serializers import NoteSerializer
+        from nomad_backend.renderers import ORJSONRenderer
+
+        user = seed(args.notes)
+        request = APIRequestFactory().get('/api/notes/')
+        notes = Note.objects.filter(owner=user).select_related('image')
+
+        def serializer_body():
+            data = NoteSerializer(notes.all(), many=True, context={'request': request}).data
+            return JSONRenderer().render(data)
+
+        def rows_body():
+            rows = listing.note_rows(notes.all())
+            return ORJSONRenderer().render(listing.serialize_rows(rows, request))
+
+        if serializer_body() != rows_body():
+            raise SystemExit('Bodies differ: the fast listing is out of step with NoteSerializer')
+
+        print(f'{args.notes} notes, {args.rounds} rounds')
+        baseline = None
+        for label, render in (('serializer', serializer_body), ('values+orjson', rows_body)):
+            median = statistics.median(time_rounds(render, args.rounds))
+            baseline = baseline or median
+            print(
+                f'{label:<14} {median * 1000:8.2f} ms/list  {args.notes / median:10.0f} notes/s'
+                f'  ({baseline / median:.1f}x)'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Compare OCR throughput: one tesseract subprocess per image vs. a persistent engine.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.ocr_engine --images 50
+
+The persistent run needs the ``ocr`` extra (``tesserocr``); both runs need the
+``tesseract`` binary and English language data.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from apps.notes.vision import TesseractVisionProvider, _tesseract_version
+
+SAMPLE_LINES = [
+    'Meeting notes for the quarterly planning session',
+    'Buy milk, eggs, coffee and fresh bread',
+    'Flight NX 204 departs at 09:45 from gate 12',
+    'Remember to renew the passport before March',
+]
+
+
+def make_images(directory: Path, count: int) -> list[Path]:
+    paths = []
+    for i in range(count):
+        image = Image.new('L', (900, 220), 'white')
+        draw = ImageDraw.Draw(image)
+        for row, line in enumerate(SAMPLE_LINES):
+            draw.text((20, 20 + row * 45), f'{i:03d} {line}', fill='black')
+        path = directory / f'sample-{i:03d}.png'
+        image.save(path)
+        paths.append(path)
+    return paths
+
+
+def run(label: str, provider: TesseractVisionProvider, paths: list[Path]) -> None:
+    started = time.perf_counter()
+    results = provider.analyze_batch(paths)
+    elapsed = time.perf_counter() - started
+    failures = sum(not result.success for result in results)
+    rate = len(paths) / elapsed
+    print(f'{label:<12} {rate:8.1f} images/sec  ({elapsed:.2f}s, {failures} failed)')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--images', type=int, default=25)
+    args = parser.parse_args()
+
+    subprocess_provider = TesseractVisionProvider(persistent=False)
+    persistent_provider = TesseractVisionProvider()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_images(Path(tmp), args.images)
+
+        if not subprocess_provider._available or _tesseract_version() == 'unknown':
+            print('subprocess   skipped (pytesseract or the tesseract binary is missing)')
+        else:
+            run('subprocess', subprocess_provider, paths)
+
+        if not persistent_provider.persistent:
+            print('persistent   skipped (install the "ocr" extra to enable tesserocr)')
+        else:
+            run('persistent', persistent_provider, paths)
+            persistent_provider.close()
+
+
+if __name__ == '__main__':
+    main()
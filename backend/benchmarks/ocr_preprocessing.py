@@ -0,0 +1,94 @@
+"""OCR of phone-sized photos with and without the preprocessing stage.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.ocr_preprocessing --images 5
+
+Draws text onto 12-megapixel colour JPEGs (stored sideways with an EXIF
+orientation tag, like a phone would), then reports the time spent in each
+preprocessing stage and, if the ``tesseract`` binary is installed, the OCR
+time with preprocessing off and on.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+from apps.notes.metrics import OCR_STAGE_SECONDS
+from apps.notes.preprocessing import Preprocessor
+from apps.notes.vision import TesseractVisionProvider, _tesseract_version
+from benchmarks.ocr_engine import SAMPLE_LINES
+
+# Everything off: what the provider did before the preprocessing stage existed
+RAW = {'draft': False, 'exif_transpose': False, 'grayscale': False, 'target_dpi': None}
+
+
+def make_photos(directory: Path, count: int) -> list[Path]:
+    font = ImageFont.load_default(size=96)
+    paths = []
+    for i in range(count):
+        page = Image.new('RGB', (3024, 4032), (235, 230, 220))
+        draw = ImageDraw.Draw(page)
+        for row, line in enumerate(SAMPLE_LINES * 6):
+            draw.text((150, 200 + row * 150), f'{i:03d} {line}', fill=(30, 30, 40), font=font)
+        photo = page.rotate(90, expand=True)  # the sensor's landscape orientation
+        exif = photo.getexif()
+        exif[0x0112] = 6
+        path = directory / f'photo-{i:03d}.jpg'
+        photo.save(path, quality=90, exif=exif)
+        paths.append(path)
+    return paths
+
+
+def stage_totals() -> dict[str, float]:
+    totals = {}
+    for metric in OCR_STAGE_SECONDS.collect():
+        for sample in metric.samples:
+            if sample.name.endswith('_sum'):
+                totals[sample.labels['stage']] = sample.value
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--images', type=int, default=5)
+    parser.add_argument('--binarize', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_photos(Path(tmp), args.images)
+
+        for label, options in (('raw', RAW), ('preprocessed', {'binarize': args.binarize})):
+            before = stage_totals()
+            preprocessor = Preprocessor(**options)
+            started = time.perf_counter()
+            sizes = {preprocessor.run(path)[0].size for path in paths}
+            elapsed = time.perf_counter() - started
+            stages = {
+                stage: (total - before.get(stage, 0)) / len(paths)
+                for stage, total in stage_totals().items()
+                if total > before.get(stage, 0)
+            }
+            breakdown = '  '.join(f'{name} {secs * 1000:.1f}' for name, secs in stages.items())
+            per_image = elapsed / len(paths) * 1000
+            print(f'{label:<13} {per_image:7.1f} ms/image  -> {sizes}  ({breakdown} ms)')
+
+        if _tesseract_version() == 'unknown':
+            print('OCR comparison skipped (the tesseract binary is missing)')
+            return
+        for label, options in (('raw', RAW), ('preprocessed', {'binarize': args.binarize})):
+            provider = TesseractVisionProvider(persistent=False, preprocessing=options)
+            started = time.perf_counter()
+            results = provider.analyze_batch(paths)
+            elapsed = time.perf_counter() - started
+            characters = sum(len(result.ocr_text) for result in results)
+            print(f'OCR {label:<13} {elapsed / len(paths):6.2f} s/image  ({characters} characters)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""OCR of large pages in one Tesseract call versus in parallel bands.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.ocr_tiling --images 3 --workers 4
+
+Draws text onto A3 pages at 300 DPI (about 17 megapixels, the size a large
+scan keeps after preprocessing), OCRs them once with tiling off and once with
+it on, and reports seconds per page, the number of lines recognized and how
+many of the tiled lines differ from the single-call ones. Needs the
+``tesseract`` binary.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+from apps.notes.tiling import split_bands
+from apps.notes.vision import TesseractVisionProvider, _tesseract_version
+from benchmarks.ocr_engine import SAMPLE_LINES
+
+A3_PIXELS = (3508, 4961)
+
+
+def make_pages(directory: Path, count: int) -> list[Path]:
+    font = ImageFont.load_default(size=42)
+    paths = []
+    for i in range(count):
+        page = Image.new('L', A3_PIXELS, 255)
+        draw = ImageDraw.Draw(page)
+        for row, line in enumerate(SAMPLE_LINES * 12):
+            draw.text((200, 200 + row * 70), f'{i:03d} {row:03d} {line}', fill=0, font=font)
+        path = directory / f'page-{i:03d}.png'
+        page.save(path, dpi=(300, 300))
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--images', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--band-height', type=int, default=1200)
+    parser.add_argument('--overlap', type=int, default=160)
+    args = parser.parse_args()
+
+    bands = split_bands(A3_PIXELS[1], args.band_height, args.overlap)
+    print(f'{A3_PIXELS[0]}x{A3_PIXELS[1]} pages -> {len(bands)} bands, {args.workers} workers')
+    if _tesseract_version() == 'unknown':
+        print('OCR comparison skipped (the tesseract binary is missing)')
+        return
+
+    tiling = {'band_height': args.band_height, 'overlap': args.overlap, 'workers': args.workers}
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_pages(Path(tmp), args.images)
+        texts = {}
+        for label, options in (('single call', {'min_pixels': None}), ('tiled', tiling)):
+            provider = TesseractVisionProvider(tiling=options)
+            provider.analyze(paths[0])  # starts the pool, loads language data
+            started = time.perf_counter()
+            results = provider.analyze_batch(paths)
+            elapsed = time.perf_counter() - started
+            provider.close()
+            texts[label] = [
+                line for result in results for line in result.ocr_text.splitlines() if line.strip()
+            ]
+            print(f'{label:<12} {elapsed / len(paths):6.2f} s/page  ({len(texts[label])} lines)')
+
+    single, tiled = set(texts['single call']), texts['tiled']
+    print(f'tiled lines not in the single-call output: {sum(line not in single for line in tiled)}')
+
+
+if __name__ == '__main__':
+    main()
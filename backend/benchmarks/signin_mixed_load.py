@@ -0,0 +1,140 @@
+"""Sign-in throughput next to note-list latency, with password hashing inline or on its pool.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.signin_mixed_load --signin-clients 32 --list-clients 8
+
+Starts gunicorn (threaded workers) on a fresh SQLite database twice: once with
+``PASSWORD_HASHING_WORKERS=0`` (hashing on the request thread, as before) and
+once with the hashing pool. Each time, ``--signin-clients`` clients sign in
+back to back while ``--list-clients`` clients fetch the notes list, and the
+report shows sign-ins per second (and 503s turned away) next to the notes
+list latency. Pass ``--server asgi`` to run uvicorn and the async sign-in view
+instead. Needs gunicorn (or the ``asgi`` extra).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from benchmarks.asgi_vs_wsgi import free_port, seed, wait_until_listening
+from benchmarks.common import BACKEND_DIR, django_env
+
+SERVERS = {
+    'wsgi': [
+        'gunicorn', 'nomad_backend.wsgi:application', '--workers', '{workers}',
+        '--threads', '{threads}', '--bind', '127.0.0.1:{port}',
+    ],
+    'asgi': [
+        'uvicorn', 'nomad_backend.asgi:application', '--workers', '{workers}',
+        '--port', '{port}', '--log-level', 'warning',
+    ],
+}
+CREDENTIALS = json.dumps({'email': 'bench@example.com', 'password': 'benchmark123'})
+
+
+async def request(port: int, raw: bytes) -> tuple[int, float]:
+    started = time.monotonic()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response[9:12]), time.monotonic() - started
+
+
+async def client(port: int, raw: bytes, stop_at: float, results: list[tuple[int, float]]):
+    while time.monotonic() < stop_at:
+        try:
+            results.append(await request(port, raw))
+        except (OSError, ValueError):
+            results.append((0, 0.0))
+
+
+async def load(port: int, token: str, args) -> tuple[list, list]:
+    signin = (
+        f'POST /api/auth/signin/ HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n'
+        f'Content-Type: application/json\r\nContent-Length: {len(CREDENTIALS)}\r\n'
+        f'Connection: close\r\n\r\n{CREDENTIALS}'
+    ).encode()
+    notes = (
+        f'GET /api/notes/ HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n'
+        f'Authorization: Bearer {token}\r\nConnection: close\r\n\r\n'
+    ).encode()
+    signins: list[tuple[int, float]] = []
+    lists: list[tuple[int, float]] = []
+    stop_at = time.monotonic() + args.duration
+    await asyncio.gather(
+        *(client(port, signin, stop_at, signins) for _ in range(args.signin_clients)),
+        *(client(port, notes, stop_at, lists) for _ in range(args.list_clients)),
+    )
+    return signins, lists
+
+
+def run(label: str, env: dict[str, str], token: str, args) -> None:
+    port = free_port()
+    command = [
+        part.format(workers=args.workers, threads=args.threads, port=port)
+        for part in SERVERS[args.server]
+    ]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+    try:
+        wait_until_listening(port)
+        signins, lists = asyncio.run(load(port, token, args))
+    finally:
+        server.terminate()
+        server.wait()
+
+    accepted = sum(1 for code, _ in signins if code == 200)
+    rejected = sum(1 for code, _ in signins if code == 503)
+    latencies = sorted(seconds for code, seconds in lists if code == 200)
+    if not latencies:
+        print(f'{label:<7} no successful note list requests')
+        return
+    p99 = statistics.quantiles(latencies, n=100)[-1] if len(latencies) > 1 else latencies[0]
+    print(
+        f'{label:<7} sign-in {accepted / args.duration:6.1f}/s ({rejected} x 503)'
+        f'  notes list {len(latencies) / args.duration:7.1f} req/s'
+        f'  p50 {statistics.median(latencies) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--server', choices=SERVERS, default='wsgi')
+    parser.add_argument('--signin-clients', type=int, default=32)
+    parser.add_argument('--list-clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--hashing-workers', type=int, default=2)
+    parser.add_argument('--hashing-queue', type=int, default=4)
+    parser.add_argument('--notes', type=int, default=50)
+    args = parser.parse_args()
+    if shutil.which(SERVERS[args.server][0]) is None:
+        raise SystemExit(f'{SERVERS[args.server][0]} is not installed')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = django_env(tmp)
+        token = seed(env, args.notes)
+        print(
+            f'{args.server}: {args.signin_clients} sign-in + {args.list_clients} notes list'
+            f' clients, {args.workers} workers, {args.duration:.0f}s each'
+        )
+        pool = {
+            'PASSWORD_HASHING_WORKERS': str(args.hashing_workers),
+            'PASSWORD_HASHING_QUEUE': str(args.hashing_queue),
+        }
+        for label, settings in (('inline', {'PASSWORD_HASHING_WORKERS': '0'}), ('pool', pool)):
+            run(label, {**env, **settings}, token, args)
+
+
+if __name__ == '__main__':
+    main()
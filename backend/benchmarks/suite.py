@@ -0,0 +1,323 @@
+"""Latency, throughput and query counts of the main API paths on seeded data.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.suite --users 10 --notes 50 --requests 200 --output report.json
+    python -m benchmarks.suite --compare report.json
+
+Seeds ``--users`` users with ``--notes`` notes each (every other one with an
+analyzed image) in a throwaway SQLite database, using the dummy vision
+provider so no OCR engine is needed. Each scenario then sends ``--requests``
+requests through Django's test client, in process and one at a time, and
+records p50/p90/p99 latency, throughput and the most queries any request ran.
+Nothing external is needed.
+
+The JSON report has stable keys so two of them can be diffed, and
+``--compare`` prints the change against an earlier one. The exit status is 1
+if a scenario went over its budget in ``benchmarks.budgets``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import itertools
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from benchmarks.budgets import QUERY_BUDGETS, count_queries
+from benchmarks.common import BACKEND_DIR, django_env, setup_django
+
+PASSWORD = 'benchmark123'
+SCENARIOS = (
+    'signin',
+    'token_refresh',
+    'note_list',
+    'note_detail',
+    'note_create',
+    'note_upload',
+    'note_changes',
+    'note_search',
+    'analysis',
+)
+# Report fields compared by --compare, and whether a higher value is better
+COMPARED = {'p50_ms': False, 'p99_ms': False, 'throughput_rps': True, 'max_queries': False}
+
+_colors = itertools.count(1)
+
+
+def make_png() -> tuple[str, bytes]:
+    """A small PNG with unique bytes, so the analysis cache never answers for it."""
+    from PIL import Image
+
+    value = next(_colors)
+    buffer = io.BytesIO()
+    color = (value % 256, value // 256 % 256, value // 65536 % 256)
+    Image.new('RGB', (64, 64), color).save(buffer, format='PNG')
+    return f'scan{value}.png', buffer.getvalue()
+
+
+def seed(users: int, notes: int) -> list:
+    from django.contrib.auth import get_user_model
+    from django.core.files.base import ContentFile
+
+    from apps.notes.models import Note, NoteImage
+    from apps.notes.tasks import analyze_note_image
+
+    seeded = []
+    for user_index in range(users):
+        user = get_user_model().objects.create_user(
+            email=f'bench{user_index}@example.com', password=PASSWORD
+        )
+        for index in range(notes):
+            note = Note.objects.create(
+                owner=user,
+                title=f'Meeting {index}',
+                body='Quarterly planning notes and action items. ' * 4,
+            )
+            if index % 2:
+                name, data = make_png()
+                image = NoteImage.objects.create(
+                    note=note,
+                    image=ContentFile(data, name=name),
+                    file_size=len(data),
+                    checksum=hashlib.sha256(data).hexdigest(),
+                )
+                analyze_note_image(str(image.id))
+        seeded.append(user)
+    return seeded
+
+
+def percentile(timings: list[float], pct: int) -> float:
+    if len(timings) == 1:
+        return timings[0]
+    return statistics.quantiles(timings, n=100, method='inclusive')[pct - 1]
+
+
+class Runner:
+    """Sends the scenario requests and collects timings and query counts."""
+
+    def __init__(self, users: list):
+        from django.test import Client
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from apps.accounts.tokens import RefreshToken
+
+        self.users = users
+        # Rotated on every token_refresh step, like a client would
+        self.refresh_tokens = [str(RefreshToken.for_user(user)) for user in users]
+        self.clients = []
+        for user in users:
+            client = Client()
+            client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(user)}'
+            client.get('/api/auth/me/')  # measure with the user cache warm, as in steady state
+            client.note_ids = [note['id'] for note in client.get('/api/notes/').json()]
+            self.clients.append(client)
+        self.pending = []  # images uploaded by note_upload, analyzed by the analysis scenario
+
+    def measure(self, name: str, count: int) -> dict:
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        step = getattr(self, f'step_{name}')
+        prepare = getattr(self, f'prepare_{name}', None)
+        if prepare is not None:
+            prepare(count)
+        timings, queries = [], []
+        for index in range(count):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                step(index)
+                timings.append(time.perf_counter() - started)
+            queries.append(count_queries(captured.captured_queries))
+
+        total = sum(timings)
+        return {
+            'requests': count,
+            'p50_ms': round(percentile(timings, 50) * 1000, 3),
+            'p90_ms': round(percentile(timings, 90) * 1000, 3),
+            'p99_ms': round(percentile(timings, 99) * 1000, 3),
+            'throughput_rps': round(count / total, 1) if total else None,
+            'max_queries': max(queries),
+            'query_budget': QUERY_BUDGETS[name],
+        }
+
+    def client(self, index: int):
+        return self.clients[index % len(self.clients)]
+
+    def expect(self, response, status: int = 200):
+        if response.status_code != status:
+            path = response.request['PATH_INFO']
+            raise RuntimeError(f'{path} answered {response.status_code}: {response.content[:200]}')
+        return response
+
+    def step_signin(self, index):
+        from django.test import Client
+
+        user = self.users[index % len(self.users)]
+        credentials = {'email': user.email, 'password': PASSWORD}
+        self.expect(
+            Client().post('/api/auth/signin/', credentials, content_type='application/json')
+        )
+
+    def step_token_refresh(self, index):
+        from django.test import Client
+
+        slot = index % len(self.users)
+        response = self.expect(
+            Client().post(
+                '/api/auth/refresh/',
+                {'refresh': self.refresh_tokens[slot]},
+                content_type='application/json',
+            )
+        )
+        self.refresh_tokens[slot] = response.json()['refresh']
+
+    def step_note_list(self, index):
+        self.expect(self.client(index).get('/api/notes/'))
+
+    def step_note_detail(self, index):
+        client = self.client(index)
+        note_id = client.note_ids[index // len(self.clients) % len(client.note_ids)]
+        self.expect(client.get(f'/api/notes/{note_id}/'))
+
+    def step_note_create(self, index):
+        note = {'title': f'Created {index}', 'body': 'Follow-up items.'}
+        self.expect(
+            self.client(index).post('/api/notes/', note, content_type='application/json'), 201
+        )
+
+    def step_note_upload(self, index):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        name, data = make_png()
+        note = {'title': f'Scan {index}', 'image_file': SimpleUploadedFile(name, data, 'image/png')}
+        response = self.expect(self.client(index).post('/api/notes/', note), 201)
+        self.pending.append(response.json()['image']['id'])
+
+    def step_note_changes(self, index):
+        self.expect(self.client(index).get('/api/notes/changes/', {'since': 0}))
+
+    def step_note_search(self, index):
+        self.expect(self.client(index).get('/api/notes/search/', {'q': 'planning'}))
+
+    def prepare_analysis(self, count):
+        # Queue more images if note_upload did not leave enough (or did not run)
+        for index in range(count - len(self.pending)):
+            self.step_note_upload(index)
+
+    def step_analysis(self, index):
+        from apps.notes.tasks import analyze_note_image
+
+        analyze_note_image(self.pending.pop())
+
+
+def git_revision() -> str | None:
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return revision.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict) -> None:
+    print(f'\nChange against {baseline["meta"].get("git_revision") or "baseline"}:')
+    for name, result in report['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            print(f'{name:<13} (new)')
+            continue
+        changes = []
+        for field, higher_is_better in COMPARED.items():
+            before, after = old.get(field), result.get(field)
+            if not before or after is None:
+                continue
+            delta = round((after - before) / before * 100)
+            worse = delta < 0 if higher_is_better else delta > 0
+            note = ' worse' if worse else ''
+            changes.append(f'{field} {before} -> {after} ({delta:+d}%{note})')
+        print(f'{name:<13} ' + ', '.join(changes))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--notes', type=int, default=50, help='notes per user')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument(
+        '--scenario', action='append', choices=SCENARIOS, help='run only these (repeatable)'
+    )
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--compare', help='earlier JSON report to compare against')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(django_env(tmp))
+        logging.disable(logging.INFO)
+
+        import django
+        from django.test.utils import override_settings
+
+        from apps.notes.vision import DummyVisionProvider
+
+        provider = DummyVisionProvider()
+        with (
+            override_settings(MEDIA_ROOT=f'{tmp}/media', ANALYSIS_EAGER=False),
+            mock.patch('apps.notes.tasks.get_vision_provider', return_value=provider),
+            mock.patch('apps.notes.views.get_vision_provider', return_value=provider),
+        ):
+            started = time.perf_counter()
+            runner = Runner(seed(args.users, args.notes))
+            elapsed = time.perf_counter() - started
+            print(f'Seeded {args.users} users x {args.notes} notes in {elapsed:.1f}s')
+
+            scenarios = {}
+            for name in args.scenario or SCENARIOS:
+                result = scenarios[name] = runner.measure(name, args.requests)
+                over = '  OVER BUDGET' if result['max_queries'] > result['query_budget'] else ''
+                print(
+                    f'{name:<13} p50 {result["p50_ms"]:8.2f} ms  p99 {result["p99_ms"]:8.2f} ms'
+                    f'  {result["throughput_rps"]:8.1f} req/s'
+                    f'  queries {result["max_queries"]:>3}/{result["query_budget"]}{over}'
+                )
+
+    report = {
+        'meta': {
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': 'sqlite',
+            'users': args.users,
+            'notes_per_user': args.notes,
+            'requests_per_scenario': args.requests,
+        },
+        'scenarios': scenarios,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+    if any(result['max_queries'] > result['query_budget'] for result in scenarios.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
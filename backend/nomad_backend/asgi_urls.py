@@ -0,0 +1,19 @@
+"""URL configuration for ASGI requests.
+
+Puts the async note views (``apps.notes.async_views``) and sign-in
+(``apps.accounts.async_views``) in front of the regular routes; everything
+else resolves exactly as in ``nomad_backend.urls``.
+"""
+from django.urls import path
+
+from apps.accounts import async_views as accounts_views
+from apps.notes import async_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/auth/signin/', accounts_views.signin),
+    path('api/notes/', async_views.note_list),
+    path('api/notes/<uuid:pk>/', async_views.note_detail),
+    *sync_urlpatterns,
+]
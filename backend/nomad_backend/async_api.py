@@ -0,0 +1,46 @@
+"""Helpers for the async API views served under ASGI (see ``nomad_backend.asgi_urls``)."""
+
+from __future__ import annotations
+
+import functools
+
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.views import exception_handler
+
+from apps.accounts.authentication import CachedJWTAuthentication
+
+from . import metrics
+from .renderers import ORJSONRenderer
+
+_authenticator = CachedJWTAuthentication()
+_renderer = ORJSONRenderer()
+
+
+def render(data, status_code: int = status.HTTP_200_OK) -> HttpResponse:
+    with metrics.phase('render'):
+        body = _renderer.render(data)
+    response = HttpResponse(body, status=status_code, content_type='application/json')
+    response['Vary'] = 'Accept'
+    return response
+
+
+def api_view(view):
+    """Turn DRF exceptions raised by an async view into the usual error responses."""
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            error = exception_handler(exc, {})
+            response = render(error.data, error.status_code)
+            if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+                response['WWW-Authenticate'] = _authenticator.authenticate_header(request)
+            if 'Retry-After' in error:
+                response['Retry-After'] = error['Retry-After']
+            return response
+
+    return csrf_exempt(wrapper)
@@ -0,0 +1,266 @@
+"""Per-request timings, ``Server-Timing`` headers and the Prometheus ``/metrics`` view.
+
+``MetricsMiddleware`` keeps a ``RequestTimings`` in a context variable for the
+duration of each request. Database queries are counted by an execute wrapper
+installed on every connection, views time building the response data in a
+``phase('serialize')`` block, and response rendering (encoding that data as
+JSON) is timed around ``render()``, so the numbers also cover async views whose queries run in
+``sync_to_async`` threads. Histograms are labelled with the URL name of the
+matched route, which keeps their cardinality bounded.
+
+With several server or worker processes, point ``PROMETHEUS_MULTIPROC_DIR``
+at a directory shared by all of them (see the ``prometheus_client`` docs);
+``/metrics`` then aggregates every process. Database pool figures come from
+the pool of the process answering the scrape.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import hmac
+import os
+import time
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+REQUEST_SECONDS = Histogram(
+    'nomad_http_request_duration_seconds',
+    'Time from the request reaching Django to the response leaving it.',
+    ['method', 'route', 'status'],
+)
+REQUEST_DB_QUERIES = Histogram(
+    'nomad_http_request_db_queries',
+    'Database queries run while handling a request.',
+    ['method', 'route'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+REQUEST_DB_SECONDS = Histogram(
+    'nomad_http_request_db_seconds',
+    'Time spent in database queries while handling a request.',
+    ['method', 'route'],
+)
+REQUEST_SERIALIZE_SECONDS = Histogram(
+    'nomad_http_request_serialize_seconds',
+    'Time spent building the response data with serializers.',
+    ['method', 'route'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+REQUEST_RENDER_SECONDS = Histogram(
+    'nomad_http_request_render_seconds',
+    'Time spent encoding the response body.',
+    ['method', 'route'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+# Collectors that read current state (e.g. queue sizes) when scraped
+_collectors = []
+
+
+@dataclass
+class RequestTimings:
+    started: float = field(default_factory=time.perf_counter)
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    phases: dict[str, float] = field(default_factory=dict)
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+_current: contextvars.ContextVar[RequestTimings | None] = contextvars.ContextVar(
+    'request_timings', default=None
+)
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    """Add the time spent in the block to the current request's ``name`` phase."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def _record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_queries += 1
+        timings.db_seconds += time.perf_counter() - started
+
+
+def _instrument(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_instrument)
+
+
+def register_collector(collector) -> None:
+    """Expose a custom collector on ``/metrics`` (in single and multi-process mode)."""
+    _collectors.append(collector)
+    REGISTRY.register(collector)
+
+
+class DatabasePoolCollector:
+    """Size, saturation and wait time of each psycopg connection pool (``pool.get_stats()``)."""
+
+    def describe(self):
+        return [family for family, _, _ in self._families()]
+
+    def collect(self):
+        pools = [
+            (alias, connections[alias].pool.get_stats())
+            for alias in connections
+            if connections[alias].settings_dict.get('OPTIONS', {}).get('pool')
+        ]
+        for family, key, scale in self._families():
+            for alias, stats in pools:
+                family.add_metric([alias], stats.get(key, 0) / scale)
+            yield family
+
+    def _families(self):
+        def gauge(name, documentation):
+            return GaugeMetricFamily(name, documentation, labels=['alias'])
+
+        def counter(name, documentation):
+            return CounterMetricFamily(name, documentation, labels=['alias'])
+
+        # (family, pool stats key, divisor); counters run from the pool's start
+        return [
+            (gauge('nomad_db_pool_max_connections', 'Most connections the pool may open.'),
+             'pool_max', 1),
+            (gauge('nomad_db_pool_connections', 'Open connections, in use or idle.'),
+             'pool_size', 1),
+            (gauge('nomad_db_pool_idle_connections', 'Connections ready to hand out.'),
+             'pool_available', 1),
+            (gauge('nomad_db_pool_waiting_requests',
+                   'Requests waiting for a connection; above zero the pool is saturated.'),
+             'requests_waiting', 1),
+            (counter('nomad_db_pool_requests', 'Connections handed out.'),
+             'requests_num', 1),
+            (counter('nomad_db_pool_wait_seconds', 'Time spent waiting for a connection.'),
+             'requests_wait_ms', 1000),
+            (counter('nomad_db_pool_timeouts', 'Requests that got no connection in time.'),
+             'requests_errors', 1),
+        ]
+
+
+class MetricsMiddleware:
+    """Record per-route timings and report them in a ``Server-Timing`` header."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        # Connections opened before this module was imported have no wrapper yet
+        for connection in connections.all(initialized_only=True):
+            _instrument(connection)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        timings = _current.get()
+        if timings is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timings.add('render', time.perf_counter() - started)
+            )
+        return response
+
+    def finish(self, request, response, timings: RequestTimings):
+        total = time.perf_counter() - timings.started
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match is not None else 'unmatched'
+        method = request.method
+
+        REQUEST_SECONDS.labels(method, route, f'{response.status_code // 100}xx').observe(total)
+        REQUEST_DB_QUERIES.labels(method, route).observe(timings.db_queries)
+        REQUEST_DB_SECONDS.labels(method, route).observe(timings.db_seconds)
+        if 'serialize' in timings.phases:
+            REQUEST_SERIALIZE_SECONDS.labels(method, route).observe(timings.phases['serialize'])
+        if 'render' in timings.phases:
+            REQUEST_RENDER_SECONDS.labels(method, route).observe(timings.phases['render'])
+
+        if settings.METRICS_SERVER_TIMING:
+            entries = [
+                f'db;dur={timings.db_seconds * 1000:.2f};desc="{timings.db_queries} queries"',
+                *(f'{name};dur={seconds * 1000:.2f}' for name, seconds in timings.phases.items()),
+                f'total;dur={total * 1000:.2f}',
+            ]
+            response['Server-Timing'] = ', '.join(entries)
+        return response
+
+
+def metrics_view(request):
+    """Prometheus text exposition of every metric, behind a bearer token.
+
+    Without ``METRICS_TOKEN`` the view only answers when ``DEBUG`` is on: the
+    metrics reveal traffic and table sizes, and scraping runs database queries.
+    """
+    if not settings.METRICS_TOKEN:
+        if not settings.DEBUG:
+            return HttpResponse('Not Found', status=404, content_type='text/plain')
+    else:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+
+    registry = REGISTRY
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        for collector in _collectors:
+            registry.register(collector)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+register_collector(DatabasePoolCollector())
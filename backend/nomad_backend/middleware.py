@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.decorators import sync_and_async_middleware
+
+
+@sync_and_async_middleware
+def asgi_urlconf_middleware(get_response):
+    """Resolve ASGI requests against ``settings.ASGI_URLCONF``.
+
+    Under an ASGI server this routes the hot note endpoints to their async
+    views; WSGI requests keep using ``ROOT_URLCONF`` unchanged.
+    """
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            request.urlconf = settings.ASGI_URLCONF
+            return await get_response(request)
+
+    else:
+
+        def middleware(request):
+            if isinstance(request, ASGIRequest):
+                request.urlconf = settings.ASGI_URLCONF
+            return get_response(request)
+
+    return middleware
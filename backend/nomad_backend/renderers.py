@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` that encodes with orjson when it can.
+
+    Output is byte-identical to ``JSONRenderer`` for strings, integers, lists,
+    dicts and everything its encoder handles (dates, UUIDs, lazy strings...),
+    which covers the notes API. Floats may be spelled differently (``1e16`` vs
+    ``1e+16``), so keep float-heavy views on the stock renderer. Anything
+    orjson rejects, or an indented response, falls back to ``JSONRenderer``.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same JavaScript-compatibility escaping as JSONRenderer
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
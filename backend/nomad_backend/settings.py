@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -44,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'nomad_backend.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -52,9 +54,13 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'nomad_backend.middleware.asgi_urlconf_middleware',
 ]
 
 ROOT_URLCONF = 'nomad_backend.urls'
+# Used for requests served over ASGI (uvicorn); set to ROOT_URLCONF to disable
+# the async note views.
+ASGI_URLCONF = env('ASGI_URLCONF', default='nomad_backend.asgi_urls')
 
 TEMPLATES = [
     {
@@ -81,8 +87,44 @@ DATABASES = {
     'default': env.db(default=f"sqlite:///{(BASE_DIR / 'db.sqlite3').as_posix()}")
 }
 
+# PostgreSQL connections come from a psycopg_pool pool per process (see README). Without it,
+# DB_CONN_MAX_AGE keeps a connection open per thread, checked before reuse.
+if (
+    DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'
+    and env.bool('DB_POOL', default=True)
+):
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': env.int('DB_POOL_MIN_SIZE', default=2),
+        'max_size': env.int('DB_POOL_MAX_SIZE', default=10),
+        # Seconds a request waits for a free connection before failing
+        'timeout': env.float('DB_POOL_TIMEOUT', default=10.0),
+        'max_idle': env.float('DB_POOL_MAX_IDLE', default=300.0),
+        'max_lifetime': env.float('DB_POOL_MAX_LIFETIME', default=3600.0),
+    }
+    # Django passes psycopg_pool's round-trip check as the pool's check callback when set
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = env.bool('DB_POOL_CHECK', default=True)
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = env.int('DB_CONN_MAX_AGE', default=0)
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
 
 AUTH_USER_MODEL = 'accounts.User'
+AUTHENTICATION_BACKENDS = ['apps.accounts.backends.EmailBackend']
+
+# Password hashes run on this many threads per process (0: inline on the request thread);
+# sign-ins beyond PASSWORD_HASHING_QUEUE waiting hashes are answered with 503
+PASSWORD_HASHING_WORKERS = env.int('PASSWORD_HASHING_WORKERS', default=2)
+PASSWORD_HASHING_QUEUE = env.int('PASSWORD_HASHING_QUEUE', default=4)
+
+# Authenticated users are cached for this long (invalidated on save/delete)
+AUTH_USER_CACHE_SECONDS = env.int('AUTH_USER_CACHE_SECONDS', default=60)
+
+
+# Cache
+# Defaults to a per-process memory cache; point CACHE_URL at Redis/Memcached to share it
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
 
 
 # Password validation
@@ -124,11 +166,101 @@ STATIC_URL = 'static/'
 # Media files (user uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Unreferenced image blobs (apps.notes.blobs) are deleted after this long
+MEDIA_BLOB_GRACE_SECONDS = env.int('MEDIA_BLOB_GRACE_SECONDS', default=3600)
+# How apps.notes.media hands files over: '' (Django streams them),
+# 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache, lighttpd)
+MEDIA_SENDFILE = env('MEDIA_SENDFILE', default='')
+# nginx location marked `internal` that aliases MEDIA_ROOT
+MEDIA_ACCEL_REDIRECT_PREFIX = env('MEDIA_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+# Signed image URLs stay valid for one to two of these windows (0: until the note is deleted)
+MEDIA_URL_EXPIRY_SECONDS = env.int('MEDIA_URL_EXPIRY_SECONDS', default=24 * 3600)
+# Image URLs carry the checksum, so their responses can be cached for good
+MEDIA_CACHE_SECONDS = env.int('MEDIA_CACHE_SECONDS', default=365 * 24 * 3600)
+
+# Hash uploads while they stream in so the checksum never needs a second read
+FILE_UPLOAD_HANDLERS = [
+    'apps.notes.uploadhandlers.HashingMemoryFileUploadHandler',
+    'apps.notes.uploadhandlers.HashingTemporaryFileUploadHandler',
+]
+# Resumable upload sessions (/api/notes/uploads/) expire after this long without a chunk
+UPLOAD_SESSION_TTL_SECONDS = env.int('UPLOAD_SESSION_TTL_SECONDS', default=24 * 3600)
+
+
+# Note image renditions (longest edge in pixels)
+RENDITION_THUMBNAIL_SIZE = env.int('RENDITION_THUMBNAIL_SIZE', default=256)
+RENDITION_PREVIEW_SIZE = env.int('RENDITION_PREVIEW_SIZE', default=1024)
+RENDITION_WEBP_QUALITY = env.int('RENDITION_WEBP_QUALITY', default=80)
+
+
+# Text search configuration used for the PostgreSQL full-text index
+SEARCH_LANGUAGE = env('SEARCH_LANGUAGE', default='english')
+
+
+# Image analysis queue, processed by `manage.py run_analysis_workers`
+ANALYSIS_WORKER_CONCURRENCY = env.int('ANALYSIS_WORKER_CONCURRENCY', default=os.cpu_count() or 1)
+ANALYSIS_MAX_ATTEMPTS = env.int('ANALYSIS_MAX_ATTEMPTS', default=3)
+ANALYSIS_RETRY_BACKOFF_SECONDS = env.int('ANALYSIS_RETRY_BACKOFF_SECONDS', default=30)
+ANALYSIS_LEASE_SECONDS = env.int('ANALYSIS_LEASE_SECONDS', default=120)
+ANALYSIS_POLL_SECONDS = env.float('ANALYSIS_POLL_SECONDS', default=1.0)
+# Run analysis in-process right after upload instead of queueing it for workers
+ANALYSIS_EAGER = env.bool('ANALYSIS_EAGER', default=False)
+
+# Vision providers run (concurrently) on every image, built once per process. Each entry
+# takes a BACKEND class, constructor OPTIONS and a TIMEOUT in seconds after which that
+# provider's result is dropped.
+VISION_PROVIDER_TIMEOUT_SECONDS = env.float('VISION_PROVIDER_TIMEOUT_SECONDS', default=60.0)
+# Image preparation before Tesseract (see apps.notes.preprocessing.Preprocessor)
+OCR_PREPROCESSING = {
+    'target_dpi': env.int('OCR_TARGET_DPI', default=300) or None,
+    'binarize': env.bool('OCR_BINARIZE', default=False),
+}
+# Images with at least this many pixels (after preprocessing) are OCR'd in parallel bands.
+# Each analysis worker gets its own band pool, by default an equal share of the CPUs: with
+# ANALYSIS_WORKER_CONCURRENCY at one per CPU that is a single process, which turns tiling off.
+OCR_TILING = {
+    'min_pixels': env.int('OCR_TILE_MIN_PIXELS', default=8_000_000) or None,
+    'band_height': env.int('OCR_TILE_HEIGHT', default=1200),
+    'overlap': env.int('OCR_TILE_OVERLAP', default=160),
+    'workers': (
+        env.int('OCR_TILE_WORKERS', default=0)
+        or max((os.cpu_count() or 1) // ANALYSIS_WORKER_CONCURRENCY, 1)
+    ),
+}
+_TESSERACT = 'apps.notes.vision.TesseractVisionProvider'
+_TESSERACT_OPTIONS = {
+    # Tesseract can stop itself, which frees its engine for the next image
+    'timeout': VISION_PROVIDER_TIMEOUT_SECONDS,
+    'preprocessing': OCR_PREPROCESSING,
+    'tiling': OCR_TILING,
+}
+VISION_PROVIDERS = [
+    {
+        'BACKEND': backend,
+        'OPTIONS': _TESSERACT_OPTIONS if backend == _TESSERACT else {},
+        'TIMEOUT': VISION_PROVIDER_TIMEOUT_SECONDS,
+    }
+    for backend in env.list('VISION_PROVIDERS', default=[_TESSERACT])
+]
+
+# Server-Sent Events stream (/api/notes/events/, see apps.notes.events)
+EVENTS_POLL_SECONDS = env.float('EVENTS_POLL_SECONDS', default=1.0)
+EVENTS_KEEPALIVE_SECONDS = env.float('EVENTS_KEEPALIVE_SECONDS', default=15.0)
+EVENTS_RETENTION_SECONDS = env.int('EVENTS_RETENTION_SECONDS', default=3600)
+# Longest an event row may take to commit after insert; newer rows are rescanned each poll
+EVENTS_SETTLE_SECONDS = env.float('EVENTS_SETTLE_SECONDS', default=5.0)
+# Client reconnect delay; also paces clients of WSGI servers, which cannot hold streams open
+EVENTS_RETRY_MILLISECONDS = env.int('EVENTS_RETRY_MILLISECONDS', default=5000)
+
+# Request metrics (nomad_backend.metrics): Server-Timing header and /metrics scrape token
+# (without a token, /metrics is only served when DEBUG is on)
+METRICS_SERVER_TIMING = env.bool('METRICS_SERVER_TIMING', default=True)
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
 
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -0,0 +1,86 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.notes import analysis_cache
+from apps.notes.models import AnalysisCacheEntry, NoteImage
+from apps.notes.vision import DummyVisionProvider, VisionResult
+
+
+def make_png(color='white') -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32), color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class AnalysisCacheTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root, ANALYSIS_EAGER=True)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        provider = mock.patch(
+            'apps.notes.tasks.get_vision_provider', return_value=DummyVisionProvider()
+        )
+        provider.start()
+        self.addCleanup(provider.stop)
+        upload_provider = mock.patch(
+            'apps.notes.views.get_vision_provider', return_value=DummyVisionProvider()
+        )
+        upload_provider.start()
+        self.addCleanup(upload_provider.stop)
+
+        user = get_user_model().objects.create_user(
+            email='cache@example.com', password='testing123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def upload(self, content: bytes):
+        image = SimpleUploadedFile('scan.png', content, content_type='image/png')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('notes:note-list'), {'title': 'Scan', 'image_file': image}
+            )
+        self.assertEqual(response.status_code, 201)
+        return NoteImage.objects.get(note_id=response.data['id'])
+
+    def test_identical_upload_reuses_completed_analysis(self):
+        content = make_png()
+        first = self.upload(content)
+        self.assertEqual(first.analysis_status, NoteImage.AnalysisStatus.COMPLETED)
+        self.assertEqual(first.analysis_attempts, 1)
+
+        second = self.upload(content)
+        self.assertEqual(second.analysis_status, NoteImage.AnalysisStatus.COMPLETED)
+        self.assertEqual(second.analysis_attempts, 0)
+        self.assertEqual(second.ocr_text, first.ocr_text)
+        self.assertEqual(second.object_labels, first.object_labels)
+
+        stats = analysis_cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_different_bytes_miss_the_cache(self):
+        self.upload(make_png('white'))
+        self.upload(make_png('black'))
+        self.assertEqual(analysis_cache.stats()['hits'], 0)
+
+    def test_partial_result_is_not_cached(self):
+        partial = mock.Mock(identity='dummy')
+        partial.analyze.return_value = VisionResult(ocr_text='some', partial=True)
+        with mock.patch('apps.notes.tasks.get_vision_provider', return_value=partial):
+            image = self.upload(make_png())
+
+        self.assertEqual(image.analysis_status, NoteImage.AnalysisStatus.COMPLETED)
+        self.assertFalse(AnalysisCacheEntry.objects.exists())
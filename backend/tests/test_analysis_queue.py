@@ -0,0 +1,88 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.notes import queue
+from apps.notes.models import Note, NoteEvent, NoteImage
+from apps.notes.tasks import analyze_note_image
+from apps.notes.vision import VisionResult
+
+Status = NoteImage.AnalysisStatus
+
+
+@override_settings(
+    ANALYSIS_MAX_ATTEMPTS=2, ANALYSIS_RETRY_BACKOFF_SECONDS=10, ANALYSIS_LEASE_SECONDS=60
+)
+class AnalysisQueueTests(TestCase):
+    def setUp(self):
+        owner = get_user_model().objects.create_user(
+            email='queue@example.com', password='testing123'
+        )
+        note = Note.objects.create(owner=owner, title='Scan')
+        self.image = NoteImage.objects.create(
+            note=note,
+            image=f'notes/{note.id}/scan.png',
+            file_size=1,
+            checksum='0' * 64,
+        )
+
+    def test_claim_leases_pending_job_once(self):
+        self.assertEqual(queue.claim(5), [str(self.image.id)])
+        self.assertEqual(queue.claim(5), [])
+
+        self.image.refresh_from_db()
+        self.assertEqual(self.image.analysis_status, Status.PROCESSING)
+        self.assertGreater(self.image.analysis_lease_expires_at, timezone.now())
+
+    def test_expired_lease_is_reclaimed(self):
+        NoteImage.objects.filter(pk=self.image.pk).update(
+            analysis_status=Status.PROCESSING,
+            analysis_lease_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(queue.claim(1), [str(self.image.id)])
+
+    def test_heartbeat_keeps_job_leased(self):
+        queue.claim(1)
+        NoteImage.objects.filter(pk=self.image.pk).update(
+            analysis_lease_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(queue.heartbeat([str(self.image.id)]), 1)
+        self.assertEqual(queue.claim(1), [])
+
+    def test_failure_retries_with_backoff_then_fails(self):
+        failing = mock.Mock(identity='failing')
+        failing.analyze.return_value = VisionResult(success=False, error='boom')
+
+        with mock.patch('apps.notes.tasks.get_vision_provider', return_value=failing):
+            analyze_note_image(str(self.image.id))
+            self.image.refresh_from_db()
+            self.assertEqual(self.image.analysis_status, Status.PENDING)
+            self.assertEqual(self.image.analysis_attempts, 1)
+            self.assertGreater(
+                self.image.analysis_available_at, timezone.now() + timedelta(seconds=9)
+            )
+            self.assertEqual(queue.claim(1), [])
+
+            analyze_note_image(str(self.image.id))
+            self.image.refresh_from_db()
+            self.assertEqual(self.image.analysis_status, Status.FAILED)
+            self.assertEqual(self.image.analysis_error, 'boom')
+
+        published = NoteEvent.objects.order_by('id').values_list(
+            'payload__analysis_status', flat=True
+        )
+        self.assertEqual(list(published), [Status.PENDING, Status.FAILED])
+
+    def test_abandoned_job_out_of_attempts_is_failed(self):
+        NoteImage.objects.filter(pk=self.image.pk).update(
+            analysis_status=Status.PROCESSING,
+            analysis_attempts=2,
+            analysis_lease_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(queue.claim(1), [])
+        self.assertEqual(queue.fail_exhausted(), 1)
+        self.image.refresh_from_db()
+        self.assertEqual(self.image.analysis_status, Status.FAILED)
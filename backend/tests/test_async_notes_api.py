@@ -0,0 +1,83 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.notes.models import Note
+
+
+class AsyncNotesApiTests(TestCase):
+    """AsyncClient requests are ASGI requests, so they hit ``apps.notes.async_views``."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='async@example.com', password='testing123'
+        )
+        self.notes = [
+            Note.objects.create(owner=self.user, title=f'Note {index}') for index in range(3)
+        ]
+        self.async_client = AsyncClient()
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.sync_client = APIClient()
+        self.sync_client.force_authenticate(self.user)
+
+    async def test_list_and_retrieve_match_sync_views(self):
+        for url in (
+            reverse('notes:note-list'),
+            reverse('notes:note-list') + '?page_size=2',
+            reverse('notes:note-detail', args=[self.notes[0].id]),
+        ):
+            response = await self.async_client.get(url, headers=self.auth)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('serialize;dur=', response['Server-Timing'])
+            expected = await self.sync_get(url)
+            self.assertEqual(response.json(), expected)
+
+            headers = {**self.auth, 'If-None-Match': response['ETag']}
+            response = await self.async_client.get(url, headers=headers)
+            self.assertEqual(response.status_code, 304)
+
+    async def sync_get(self, url):
+        response = await sync_to_async(self.sync_client.get)(url)
+        return response.json()
+
+    async def test_create(self):
+        response = await self.async_client.post(
+            reverse('notes:note-list'),
+            {'title': 'Async', 'body': 'hello'},
+            content_type='application/json',
+            headers=self.auth,
+        )
+        self.assertEqual(response.status_code, 201)
+        note = await Note.objects.aget(pk=response.json()['id'])
+        self.assertEqual(note.owner_id, self.user.id)
+        self.assertGreater(note.revision, 0)
+
+    async def test_invalid_create(self):
+        response = await self.async_client.post(
+            reverse('notes:note-list'), {}, content_type='application/json', headers=self.auth
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('title', response.json())
+
+    async def test_other_methods_fall_back_to_sync_viewset(self):
+        url = reverse('notes:note-detail', args=[self.notes[0].id])
+        response = await self.async_client.patch(
+            url, {'title': 'Renamed'}, content_type='application/json', headers=self.auth
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], 'Renamed')
+
+    async def test_requires_authentication(self):
+        response = await AsyncClient().get(reverse('notes:note-list'))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+
+        other = await get_user_model().objects.acreate(email='other@example.com')
+        response = await self.async_client.get(
+            reverse('notes:note-detail', args=[self.notes[0].id]),
+            headers={'Authorization': f'Bearer {AccessToken.for_user(other)}'},
+        )
+        self.assertEqual(response.status_code, 404)
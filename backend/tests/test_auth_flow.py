@@ -1,6 +1,17 @@
+import threading
+from datetime import timedelta
+
+from django.contrib.auth import authenticate, get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
 from django.urls import reverse
-from django.test import TestCase
+from django.utils import timezone
+from prometheus_client import REGISTRY
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts import hashing, tokens
 
 
 class AuthFlowTests(TestCase):
@@ -30,3 +41,144 @@ class AuthFlowTests(TestCase):
         me = self.client.get(reverse('accounts:me'))
         self.assertEqual(me.status_code, 200)
         self.assertEqual(me.data['email'], payload['email'])
+
+
+class CachedUserAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='cached@example.com', password='testing123'
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_repeat_requests_skip_the_user_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(reverse('accounts:me')).status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('accounts:me')).status_code, 200)
+
+    def test_saving_the_user_invalidates_the_cache(self):
+        self.client.get(reverse('accounts:me'))
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('accounts:me')).status_code, 401)
+
+
+class RefreshTokenBlacklistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(email='rotate@example.com', password='x')
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post(reverse('accounts:refresh'), {'refresh': token}, format='json')
+
+    def test_rotated_tokens_cannot_be_reused(self):
+        first = str(tokens.RefreshToken.for_user(self.user))
+        response = self.refresh(first)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+
+        # Rejected from the cache without a query, then by the database once the cache is lost
+        with self.assertNumQueries(0):
+            self.assertEqual(self.refresh(first).status_code, 401)
+        cache.clear()
+        self.assertEqual(self.refresh(first).status_code, 401)
+        self.assertEqual(BlacklistedToken.objects.count(), 2)
+
+    def test_signed_out_token_cannot_refresh(self):
+        token = tokens.RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        response = self.client.post(reverse('accounts:signout'), {'refresh': str(token)})
+        self.assertEqual(response.status_code, 204)
+        cache.clear()
+        self.assertEqual(self.refresh(str(token)).status_code, 401)
+
+    def test_prune_deletes_expired_tokens(self):
+        live = tokens.RefreshToken.for_user(self.user)
+        expired = tokens.RefreshToken.for_user(self.user)
+        OutstandingToken.objects.filter(jti=expired['jti']).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        expired.blacklist()
+
+        self.assertEqual(tokens.prune(), 1)
+        remaining = OutstandingToken.objects.values_list('jti', flat=True)
+        self.assertEqual(list(remaining), [live['jti']])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        self.addCleanup(hashing.shutdown)
+        self.user = get_user_model().objects.create_user(
+            email='hash@example.com', password='pw12345678'
+        )
+        self.credentials = {'email': 'hash@example.com', 'password': 'pw12345678'}
+
+    def queued(self):
+        return REGISTRY.get_sample_value('nomad_password_hashing_queue_seconds_count') or 0
+
+    def test_signin_hashes_on_the_pool(self):
+        before = self.queued()
+        response = APIClient().post(reverse('accounts:signin'), self.credentials, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.queued(), before + 1)
+
+    def fill_pool(self):
+        """Occupy the only hashing thread until the test ends."""
+        hashing.shutdown()
+        release = threading.Event()
+        busy = hashing._submit('check', release.wait)
+        self.addCleanup(busy.result)
+        self.addCleanup(release.set)
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE=0)
+    def test_full_queue_is_answered_with_503(self):
+        self.fill_pool()
+        response = APIClient().post(reverse('accounts:signin'), self.credentials, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+        signup = {'email': 'new@example.com', 'password': 'pw12345678'}
+        response = APIClient().post(reverse('accounts:signup'), signup, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(get_user_model().objects.filter(email='new@example.com').exists())
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE=0)
+    def test_model_and_admin_login_hash_inline(self):
+        self.fill_pool()
+        user = get_user_model().objects.create_user(email='cli@example.com', password='pw12345678')
+        self.assertTrue(user.check_password('pw12345678'))
+        self.assertEqual(
+            authenticate(email='hash@example.com', password='pw12345678'), self.user
+        )
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE=0)
+    async def test_async_full_queue_is_answered_with_503(self):
+        self.fill_pool()
+        response = await AsyncClient().post(
+            reverse('accounts:signin'), self.credentials, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    async def test_async_signin(self):
+        client = AsyncClient()
+        url = reverse('accounts:signin')
+        response = await client.post(url, self.credentials, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['email'], 'hash@example.com')
+        self.assertIn('refresh', response.json())
+
+        wrong = {**self.credentials, 'password': 'nope'}
+        response = await client.post(url, wrong, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(
+            response.json(), {'detail': 'No active account found with the given credentials'}
+        )
+        response = await client.post(url, {'email': 'x'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json())
@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+POSTGRES_URL = os.environ.get('POSTGRES_TEST_URL', '')
+
+# Runs in a fresh process: the test settings are already bound to SQLite
+SMOKE_SCRIPT = '''
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+django.setup()
+
+from django.db import connection, connections
+from prometheus_client import generate_latest
+from prometheus_client.registry import CollectorRegistry
+
+from nomad_backend.metrics import DatabasePoolCollector
+
+
+def query(_):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            return cursor.fetchone()[0]
+    finally:
+        connection.close()
+
+
+with ThreadPoolExecutor(max_workers=8) as executor:
+    pids = set(executor.map(query, range(64)))
+
+registry = CollectorRegistry()
+registry.register(DatabasePoolCollector())
+print(json.dumps({
+    'backends': len(pids),
+    'stats': connections['default'].pool.get_stats(),
+    'metrics': generate_latest(registry).decode(),
+}))
+'''
+
+
+@unittest.skipUnless(
+    POSTGRES_URL.startswith(('postgres://', 'postgresql://')),
+    'set POSTGRES_TEST_URL to a PostgreSQL database to run the pool smoke test',
+)
+class PostgresPoolSmokeTests(SimpleTestCase):
+    def run_smoke(self, **settings):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'nomad_backend.settings',
+            'DATABASE_URL': POSTGRES_URL,
+            'DB_POOL_MIN_SIZE': '1',
+            'DB_POOL_MAX_SIZE': '4',
+            **settings,
+        }
+        result = subprocess.run(
+            [sys.executable, '-c', SMOKE_SCRIPT],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout)
+
+    def test_threads_share_the_pool(self):
+        report = self.run_smoke()
+
+        # 64 requests from 8 threads reuse at most DB_POOL_MAX_SIZE server backends
+        self.assertLessEqual(report['backends'], 4)
+        self.assertGreaterEqual(report['stats']['requests_num'], 64)
+        self.assertIn('nomad_db_pool_max_connections{alias="default"} 4.0', report['metrics'])
+        self.assertIn('nomad_db_pool_requests_total{alias="default"}', report['metrics'])
+
+    def test_without_health_check(self):
+        report = self.run_smoke(DB_POOL_CHECK='False')
+
+        self.assertLessEqual(report['backends'], 4)
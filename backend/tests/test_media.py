@@ -0,0 +1,114 @@
+import shutil
+import tempfile
+import time
+from unittest import mock
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.notes.models import Note
+
+from .test_analysis_cache import make_png
+
+
+class ProtectedMediaTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = get_user_model().objects.create_user(
+            email='media@example.com', password='testing123'
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.content = make_png('maroon')
+        response = self.upload()
+        url = urlsplit(response.data['image']['image_url'])
+        self.path, self.query = url.path, url.query
+        self.note_id = response.data['id']
+        self.checksum = response.data['image']['checksum']
+        # Image.network and <img> tags send no Authorization header
+        self.client = APIClient()
+
+    def upload(self):
+        image = SimpleUploadedFile('scan.png', self.content, content_type='image/png')
+        return self.api.post(reverse('notes:note-list'), {'title': 'Scan', 'image_file': image})
+
+    def bearer(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def test_signed_url_serves_the_file_with_long_lived_cache_headers(self):
+        response = self.client.get(f'{self.path}?{self.query}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['ETag'], f'"{self.checksum}"')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        response = self.client.get(f'{self.path}?{self.query}', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_owner_is_checked(self):
+        self.assertEqual(self.client.get(self.path).status_code, 404)
+        self.assertEqual(self.client.get(f'{self.path}?{self.query}x').status_code, 404)
+        stranger = get_user_model().objects.create_user(email='other@example.com', password='x')
+        self.assertEqual(self.client.get(self.path, **self.bearer(stranger)).status_code, 404)
+
+        response = self.client.get(self.path, **self.bearer(self.user))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_signed_url_dies_with_its_note(self):
+        # Same content, so both notes share one blob
+        copy = urlsplit(self.upload().data['image']['image_url'])
+        self.assertEqual(copy.path, self.path)
+
+        Note.objects.filter(pk=self.note_id).delete()
+        self.assertEqual(self.client.get(f'{self.path}?{self.query}').status_code, 404)
+        self.assertEqual(self.client.get(f'{copy.path}?{copy.query}').status_code, 200)
+
+    @override_settings(MEDIA_URL_EXPIRY_SECONDS=3600)
+    def test_signed_url_expires(self):
+        response = self.api.get(reverse('notes:note-detail', args=[self.note_id]))
+        url = urlsplit(response.data['image']['image_url'])
+        url = f'{url.path}?{url.query}'
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        with mock.patch('apps.notes.media.time.time', return_value=time.time() + 2 * 3600 + 1):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_range_requests(self):
+        url = f'{self.path}?{self.query}'
+
+        response = self.client.get(url, HTTP_RANGE='bytes=8-15')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 8-15/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[8:16])
+
+        response = self.client.get(url, HTTP_RANGE='bytes=-4')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-4:])
+
+        response = self.client.get(url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+
+        response = self.client.get(url, HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(MEDIA_SENDFILE='x-accel-redirect')
+    def test_transfer_is_handed_to_the_proxy(self):
+        response = self.client.get(f'{self.path}?{self.query}')
+
+        self.assertEqual(response.status_code, 200)
+        name = self.path.removeprefix('/media/')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{name}')
+        self.assertEqual(response.content, b'')
@@ -0,0 +1,126 @@
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.notes import blobs
+from apps.notes.models import MediaBlob, Note, NoteImage
+from apps.notes.vision import DummyVisionProvider
+
+from .test_analysis_cache import make_png
+
+
+class MediaBlobTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root, ANALYSIS_EAGER=True)
+        media.enable()
+        self.addCleanup(media.disable)
+        for target in ('apps.notes.tasks', 'apps.notes.views'):
+            provider = mock.patch(
+                f'{target}.get_vision_provider', return_value=DummyVisionProvider()
+            )
+            provider.start()
+            self.addCleanup(provider.stop)
+
+        self.user = get_user_model().objects.create_user(
+            email='blobs@example.com', password='testing123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.content = make_png('teal')
+
+    def upload(self, title, client=None):
+        image = SimpleUploadedFile('scan.jpeg', self.content, content_type='image/png')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = (client or self.client).post(
+                reverse('notes:note-list'), {'title': title, 'image_file': image}
+            )
+        self.assertEqual(response.status_code, 201, response.data)
+        return NoteImage.objects.get(note_id=response.data['id'])
+
+    def files(self):
+        return sorted(
+            str(path.relative_to(self.media_root))
+            for path in Path(self.media_root).rglob('*')
+            if path.is_file()
+        )
+
+    def test_duplicate_uploads_share_one_blob(self):
+        stranger = get_user_model().objects.create_user(email='b@example.com', password='x')
+        other = APIClient()
+        other.force_authenticate(stranger)
+
+        first = self.upload('First')
+        second = self.upload('Second', client=other)
+
+        checksum = first.checksum
+        self.assertEqual(first.image.name, f'blobs/{checksum[:2]}/{checksum[2:4]}/{checksum}.jpg')
+        self.assertEqual(
+            (second.image.name, second.thumbnail.name, second.preview.name),
+            (first.image.name, first.thumbnail.name, first.preview.name),
+        )
+        self.assertEqual(len(self.files()), 3)
+        self.assertEqual(MediaBlob.objects.get(checksum=checksum).ref_count, 2)
+        # Either owner may fetch the shared file with their own token
+        token = RefreshToken.for_user(stranger).access_token
+        response = APIClient().get(
+            f'/media/{second.image.name}', HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_unreferenced_blobs_are_pruned_after_the_grace_period(self):
+        note_image = self.upload('First')
+        self.upload('Second')
+        Note.objects.filter(pk=note_image.note_id).delete()
+        blob = MediaBlob.objects.get(checksum=note_image.checksum)
+        self.assertEqual(blob.ref_count, 1)
+
+        Note.objects.all().delete()
+        self.assertEqual(blobs.prune(), 0)
+        self.assertEqual(len(self.files()), 3)
+
+        with override_settings(MEDIA_BLOB_GRACE_SECONDS=0):
+            self.assertEqual(blobs.prune(), 1)
+        self.assertEqual(self.files(), [])
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_command_moves_legacy_files_into_blobs(self):
+        notes = [Note.objects.create(owner=self.user, title=f'Old {i}') for i in range(2)]
+        for note in notes:
+            folder = Path(self.media_root, 'notes', str(note.pk))
+            folder.mkdir(parents=True)
+            (folder / 'scan.png').write_bytes(self.content)
+            (folder / 'scan.thumb.webp').write_bytes(b'thumb')
+            NoteImage.objects.create(
+                note=note,
+                image=f'notes/{note.pk}/scan.png',
+                thumbnail=f'notes/{note.pk}/scan.thumb.webp',
+                file_size=len(self.content),
+            )
+        revision = Note.objects.get(pk=notes[0].pk).revision
+
+        output = StringIO()
+        call_command('migrate_media_to_blobs', '--batch-size', '1', stdout=output)
+
+        self.assertIn('Moved 2 image(s); 1 blob(s) shared', output.getvalue())
+        images = list(NoteImage.objects.all())
+        checksum = images[0].checksum
+        blob = f'blobs/{checksum[:2]}/{checksum[2:4]}/{checksum}'
+        self.assertEqual({image.image.name for image in images}, {f'{blob}.png'})
+        self.assertEqual({image.thumbnail.name for image in images}, {f'{blob}.thumb.webp'})
+        self.assertEqual(self.files(), [f'{blob}.png', f'{blob}.thumb.webp'])
+        self.assertFalse(Path(self.media_root, 'notes', str(notes[0].pk)).exists())
+        self.assertEqual(MediaBlob.objects.get(checksum=checksum).ref_count, 2)
+        self.assertGreater(Note.objects.get(pk=notes[0].pk).revision, revision)
@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from apps.notes.models import Note, NoteImage
+from nomad_backend.metrics import DatabasePoolCollector
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='metrics@example.com', password='testing123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        note = Note.objects.create(owner=self.user, title='Scan')
+        NoteImage.objects.create(
+            note=note, image=f'notes/{note.id}/scan.png', file_size=1, checksum='0' * 64
+        )
+
+    def observed(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('notes:note-list'))
+
+        timing = dict(entry.split(';', 1) for entry in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'db', 'serialize', 'render', 'total'})
+        self.assertRegex(timing['db'], r'^dur=[\d.]+;desc="[1-9]\d* queries"$')
+
+    def test_request_histograms_per_route(self):
+        labels = {'method': 'GET', 'route': 'notes:note-list'}
+        requests = self.observed('nomad_http_request_db_queries_count', **labels)
+        queries = self.observed('nomad_http_request_db_queries_sum', **labels)
+        serialized = self.observed('nomad_http_request_serialize_seconds_count', **labels)
+
+        self.client.get(reverse('notes:note-list'))
+
+        self.assertEqual(
+            self.observed('nomad_http_request_db_queries_count', **labels), requests + 1
+        )
+        self.assertGreater(self.observed('nomad_http_request_db_queries_sum', **labels), queries)
+        self.assertEqual(
+            self.observed('nomad_http_request_serialize_seconds_count', **labels), serialized + 1
+        )
+        self.assertGreater(
+            self.observed('nomad_http_request_duration_seconds_count', status='2xx', **labels), 0
+        )
+
+    @override_settings(DEBUG=True)
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('notes:note-list'))
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('nomad_analysis_images{status="pending"} 1.0', body)
+        self.assertIn('nomad_analysis_images{status="processing"} 0.0', body)
+        self.assertIn('nomad_token_rows{table="outstanding"} 0.0', body)
+        self.assertIn('nomad_http_request_duration_seconds_bucket{', body)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_need_a_token_outside_debug(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+
+
+class DatabasePoolCollectorTests(TestCase):
+    def test_reports_pooled_connections_only(self):
+        stats = {
+            'pool_max': 10, 'pool_size': 4, 'pool_available': 1,
+            'requests_waiting': 2, 'requests_num': 50, 'requests_wait_ms': 1500,
+        }
+        pooled = mock.Mock(settings_dict={'OPTIONS': {'pool': {'max_size': 10}}})
+        pooled.pool.get_stats.return_value = stats
+        direct = mock.Mock(settings_dict={'OPTIONS': {}})
+
+        with mock.patch('nomad_backend.metrics.connections', {'default': pooled, 'other': direct}):
+            families = {family.name: family for family in DatabasePoolCollector().collect()}
+
+        def value(name):
+            (sample,) = families[name].samples
+            self.assertEqual(sample.labels, {'alias': 'default'})
+            return sample.value
+
+        self.assertEqual(value('nomad_db_pool_connections'), 4)
+        self.assertEqual(value('nomad_db_pool_waiting_requests'), 2)
+        self.assertEqual(value('nomad_db_pool_wait_seconds'), 1.5)
+        # Keys psycopg_pool leaves out until they are first counted
+        self.assertEqual(value('nomad_db_pool_timeouts'), 0)
+        direct.pool.get_stats.assert_not_called()
+
+    def test_nothing_without_a_pool(self):
+        direct = mock.Mock(settings_dict={'OPTIONS': {}})
+
+        with mock.patch('nomad_backend.metrics.connections', {'default': direct}):
+            families = list(DatabasePoolCollector().collect())
+
+        self.assertTrue(all(not family.samples for family in families))
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.notes import events
+from apps.notes.models import Note, NoteEvent, NoteImage
+
+
+@override_settings(EVENTS_POLL_SECONDS=0.01, EVENTS_RETRY_MILLISECONDS=2000)
+class NoteEventsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='events@example.com', password='testing123'
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testing123'
+        )
+        self.image = self.make_image(self.user)
+        self.other_image = self.make_image(other)
+
+    def make_image(self, owner):
+        note = Note.objects.create(owner=owner, title='Scan')
+        return NoteImage.objects.create(
+            note=note, image=f'notes/{note.id}/scan.png', file_size=1, checksum='0' * 64
+        )
+
+    def complete(self, image):
+        NoteImage.objects.filter(pk=image.pk).update(
+            analysis_status=NoteImage.AnalysisStatus.COMPLETED
+        )
+        events.publish_analysis([image.pk])
+        return NoteEvent.objects.latest('id')
+
+    def event(self, event_id, age_seconds=0):
+        return NoteEvent.objects.create(
+            id=event_id,
+            owner=self.user,
+            kind=NoteEvent.Kind.ANALYSIS,
+            payload={'event': event_id},
+            created_at=timezone.now() - timedelta(seconds=age_seconds),
+        )
+
+    def snapshot(self, last_event_id):
+        response = self.client.get(reverse('notes:note-events'), HTTP_LAST_EVENT_ID=last_event_id)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_snapshot_replays_missed_events_for_owner_only(self):
+        self.complete(self.other_image)
+        event = self.complete(self.image)
+        NoteEvent.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+
+        response = self.client.get(reverse('notes:note-events'), HTTP_LAST_EVENT_ID='0')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = response.content.decode()
+        self.assertIn(f'id: {event.id}\nevent: analysis\n', body)
+        self.assertIn(f'"note_id": "{self.image.note_id}"', body)
+        self.assertNotIn(str(self.other_image.note_id), body)
+        self.assertTrue(body.endswith(f'retry: 2000\nid: {event.id}\n\n'))
+
+    def test_cursor_waits_for_ids_that_may_commit_late(self):
+        self.event(100, age_seconds=60)
+        self.event(102)
+
+        body = self.snapshot('0')
+        self.assertIn('"event": 102', body)
+        # 102 is too recent to rule out a lower id still committing
+        self.assertTrue(body.endswith('id: 100\n\n'))
+
+        self.event(101)
+        body = self.snapshot('100')
+        self.assertIn('"event": 101', body)
+        self.assertIn('"event": 102', body)
+
+    async def test_stream_pushes_new_events(self):
+        stream = events.stream(self.user.id, None)
+        try:
+            self.assertTrue((await anext(stream)).startswith('retry: 2000\nid: '))
+            await sync_to_async(self.complete)(self.other_image)
+            event = await sync_to_async(self.complete)(self.image)
+
+            frame = await asyncio.wait_for(anext(stream), timeout=5)
+            self.assertIn('event: analysis\n', frame)
+            self.assertIn(f'"image_id": "{event.payload["image_id"]}"', frame)
+            self.assertIn('"analysis_status": "completed"', frame)
+        finally:
+            await stream.aclose()
+        self.assertFalse(events.get_hub().subscribers)
+
+    async def test_stream_delivers_lower_id_committed_late(self):
+        stream = events.stream(self.user.id, None)
+        try:
+            await anext(stream)
+            await sync_to_async(self.event)(1002)
+            self.assertIn('"event": 1002', await asyncio.wait_for(anext(stream), timeout=5))
+
+            # Took its id before 1002 but committed after the hub had read 1002
+            await sync_to_async(self.event)(1001)
+            self.assertIn('"event": 1001', await asyncio.wait_for(anext(stream), timeout=5))
+        finally:
+            await stream.aclose()
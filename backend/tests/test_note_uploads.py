@@ -0,0 +1,108 @@
+import hashlib
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.notes.models import NoteImage
+from apps.notes.vision import DummyVisionProvider
+
+from .test_analysis_cache import make_png
+
+
+class NoteImageUploadTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        user = get_user_model().objects.create_user(
+            email='upload@example.com', password='testing123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def upload(self, content: bytes):
+        image = SimpleUploadedFile('scan.png', content, content_type='image/png')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('notes:note-list'), {'title': 'Scan', 'image_file': image}
+            )
+        self.assertEqual(response.status_code, 201)
+        return NoteImage.objects.get(note_id=response.data['id']), queries
+
+    def assert_single_insert(self, queries):
+        writes = [
+            q['sql']
+            for q in queries
+            if 'notes_noteimage' in q['sql'] and not q['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(len(writes), 1, writes)
+        self.assertTrue(writes[0].startswith('INSERT'))
+
+    def test_checksum_is_computed_while_streaming(self):
+        content = make_png()
+        note_image, queries = self.upload(content)
+        self.assertEqual(note_image.checksum, hashlib.sha256(content).hexdigest())
+        self.assertEqual(note_image.file_size, len(content))
+        self.assert_single_insert(queries)
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=16)
+    def test_checksum_for_uploads_spooled_to_disk(self):
+        content = make_png('navy')
+        note_image, queries = self.upload(content)
+        self.assertEqual(note_image.checksum, hashlib.sha256(content).hexdigest())
+        self.assert_single_insert(queries)
+
+
+class NoteImageRenditionTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root, ANALYSIS_EAGER=True)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        provider = mock.patch(
+            'apps.notes.tasks.get_vision_provider', return_value=DummyVisionProvider()
+        )
+        provider.start()
+        self.addCleanup(provider.stop)
+
+        user = get_user_model().objects.create_user(
+            email='renditions@example.com', password='testing123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_analysis_renders_webp_thumbnail_and_preview(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (2400, 1200), 'teal').save(buffer, format='JPEG')
+        image = SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('notes:note-list'), {'title': 'Photo', 'image_file': image}
+            )
+        self.assertEqual(response.status_code, 201)
+
+        note_image = NoteImage.objects.get(note_id=response.data['id'])
+        for field, edge in (('thumbnail', 256), ('preview', 1024)):
+            with Image.open(getattr(note_image, field).path) as rendition:
+                self.assertEqual(rendition.format, 'WEBP')
+                self.assertEqual(rendition.size, (edge, edge // 2))
+
+        detail = self.client.get(reverse('notes:note-detail', args=[note_image.note_id])).data
+        checksum = note_image.checksum
+        self.assertIn(f'/{checksum}.thumb.webp?v=', detail['image']['thumbnail_url'])
+        self.assertIn(f'/{checksum}.preview.webp?v=', detail['image']['preview_url'])
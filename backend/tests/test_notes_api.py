@@ -0,0 +1,388 @@
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.notes import analysis_cache
+from apps.notes.models import Note, NoteImage, SyncClock
+from apps.notes.serializers import NoteSerializer
+from apps.notes.views import NoteViewSet, attach_image
+from apps.notes.vision import DummyVisionProvider, VisionResult
+
+
+class NotePaginationTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='pages@example.com', password='testing123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        now = timezone.now()
+        for index in range(5):
+            note = Note.objects.create(owner=self.user, title=f'Note {index}')
+            # Two notes share a timestamp to exercise the id tie-breaker
+            updated_at = now - timedelta(minutes=min(index, 3))
+            Note.objects.filter(pk=note.pk).update(updated_at=updated_at)
+
+    def test_unpaginated_list_is_kept_for_existing_clients(self):
+        response = self.client.get(reverse('notes:note-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 5)
+
+    def test_cursor_pages_walk_every_note_once(self):
+        expected = [
+            str(pk)
+            for pk in Note.objects.order_by('-updated_at', '-id').values_list('id', flat=True)
+        ]
+        seen = []
+        url = reverse('notes:note-list') + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(note['id'] for note in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('notes:note-list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+
+class NoteSyncTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='sync@example.com', password='testing123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.notes = [
+            Note.objects.create(owner=self.user, title=f'Note {index}') for index in range(3)
+        ]
+
+    def sync(self, **params):
+        response = self.client.get(reverse('notes:note-changes'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_full_then_delta_sync(self):
+        full = self.sync()
+        self.assertEqual(len(full['notes']), 3)
+        self.assertEqual(full['deleted'], [])
+        self.assertFalse(full['has_more'])
+
+        edited, deleted, _ = self.notes
+        self.client.patch(
+            reverse('notes:note-detail', args=[edited.id]), {'title': 'Edited'}, format='json'
+        )
+        self.client.delete(reverse('notes:note-detail', args=[deleted.id]))
+        Note.objects.filter(pk=self.notes[2].pk).delete()
+
+        delta = self.sync(since=full['cursor'])
+        self.assertEqual([note['title'] for note in delta['notes']], ['Edited'])
+        self.assertEqual(sorted(delta['deleted']), sorted([str(deleted.id), str(self.notes[2].id)]))
+        self.assertGreater(delta['cursor'], full['cursor'])
+
+        self.assertEqual(self.sync(since=delta['cursor'])['notes'], [])
+
+    def test_limit_pages_through_changes(self):
+        first = self.sync(since=0, limit=2)
+        self.assertTrue(first['has_more'])
+        self.assertEqual(len(first['notes']), 2)
+
+        rest = self.sync(since=first['cursor'], limit=2)
+        self.assertFalse(rest['has_more'])
+        self.assertEqual(len(rest['notes']), 1)
+
+    def test_notes_of_other_users_are_not_synced(self):
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testing123'
+        )
+        Note.objects.create(owner=other, title='Private')
+        self.assertEqual(len(self.sync(since=0)['notes']), 3)
+
+
+class NoteSearchTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='search@example.com', password='testing123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, query):
+        response = self.client.get(reverse('notes:note-search'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [note['title'] for note in response.data]
+
+    def test_title_matches_rank_above_body_matches(self):
+        Note.objects.create(owner=self.user, title='Groceries', body='remember the coffee filters')
+        Note.objects.create(owner=self.user, title='Coffee shops', body='a list')
+        Note.objects.create(owner=self.user, title='Unrelated', body='nothing here')
+        self.assertEqual(self.search('coffee'), ['Coffee shops', 'Groceries'])
+
+    def test_index_follows_edits_deletes_and_ocr(self):
+        note = Note.objects.create(owner=self.user, title='Draft', body='alpha')
+        note.body = 'bravo'
+        note.save()
+        self.assertEqual(self.search('alpha'), [])
+        self.assertEqual(self.search('bravo'), ['Draft'])
+
+        # Attached with a cached analysis: no worker runs to index the OCR text
+        analysis_cache.store('0' * 64, 'dummy', VisionResult(ocr_text='whiteboard'), 1.0)
+        with (
+            mock.patch('apps.notes.views.get_vision_provider', return_value=DummyVisionProvider()),
+            mock.patch('apps.notes.views.renditions.ensure_renditions'),
+        ):
+            image = NoteImage(
+                note_id=note.pk, image='notes/x/a.png', file_size=1, checksum='0' * 64
+            )
+            attach_image(note, image)
+        self.assertEqual(self.search('whiteboard'), ['Draft'])
+
+        Note.objects.filter(pk=note.pk).delete()
+        self.assertEqual(self.search('bravo'), [])
+
+    def test_other_users_notes_and_fts_syntax(self):
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testing123'
+        )
+        Note.objects.create(owner=other, title='Secret plans')
+        Note.objects.create(owner=self.user, title='My plans')
+        self.assertEqual(self.search('plans'), ['My plans'])
+        self.assertEqual(self.search('"plans('), ['My plans'])
+
+
+class NoteBatchTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='batch@example.com', password='testing123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def batch(self, operations):
+        response = self.client.post(
+            reverse('notes:note-batch'), {'operations': operations}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_mixed_operations_report_per_item_results(self):
+        existing = [
+            Note.objects.create(owner=self.user, title=f'Note {index}') for index in range(3)
+        ]
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testing123'
+        )
+        foreign = Note.objects.create(owner=other, title='Not yours')
+        cursor = self.client.get(reverse('notes:note-changes')).data['cursor']
+
+        results = self.batch([
+            {'op': 'create', 'data': {'title': 'New', 'body': 'from offline'}},
+            {'op': 'update', 'id': str(existing[0].id), 'data': {'title': 'Renamed'}},
+            {'op': 'delete', 'id': str(existing[1].id)},
+            {'op': 'create', 'data': {'title': ''}},
+            {'op': 'delete', 'id': str(foreign.id)},
+            {'op': 'delete', 'id': str(existing[0].id)},
+        ])
+
+        self.assertEqual([result['status'] for result in results], [201, 200, 204, 400, 404, 400])
+        self.assertEqual(results[0]['note']['title'], 'New')
+        self.assertEqual(results[1]['note']['title'], 'Renamed')
+        self.assertIn('title', results[3]['errors'])
+
+        titles = set(Note.objects.filter(owner=self.user).values_list('title', flat=True))
+        self.assertEqual(titles, {'New', 'Renamed', 'Note 2'})
+        self.assertTrue(Note.objects.filter(pk=foreign.pk).exists())
+
+        changes = self.client.get(reverse('notes:note-changes'), {'since': cursor}).data
+        self.assertEqual({note['title'] for note in changes['notes']}, {'New', 'Renamed'})
+        self.assertEqual(changes['deleted'], [str(existing[1].id)])
+
+        search_hits = self.client.get(reverse('notes:note-search'), {'q': 'offline'}).data
+        self.assertEqual([note['title'] for note in search_hits], ['New'])
+
+    def batch_queries(self, size: int) -> int:
+        """Queries run by a batch of ``size`` updates, deletes and creates each."""
+        notes = [
+            Note.objects.create(owner=self.user, title=f'Note {index}') for index in range(2 * size)
+        ]
+        operations = [
+            {'op': 'update', 'id': str(note.id), 'data': {'body': 'edited'}}
+            for note in notes[:size]
+        ]
+        operations += [{'op': 'delete', 'id': str(note.id)} for note in notes[size:]]
+        operations += [{'op': 'create', 'data': {'title': f'New {index}'}} for index in range(size)]
+
+        with CaptureQueriesContext(connection) as queries:
+            results = self.batch(operations)
+        self.assertEqual(len(results), 3 * size)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        # Counted against a one-item batch, as the fixed number differs between databases
+        self.assertEqual(self.batch_queries(10), self.batch_queries(1))
+
+    def test_image_fields_are_rejected_not_dropped(self):
+        note = Note.objects.create(owner=self.user, title='Kept')
+        upload_id = str(uuid.uuid4())
+
+        results = self.batch([
+            {'op': 'create', 'data': {'title': 'With image', 'upload_id': upload_id}},
+            {'op': 'update', 'id': str(note.id), 'data': {'title': 'x', 'upload_id': upload_id}},
+            {'op': 'create', 'data': {'title': 'Plain'}},
+        ])
+
+        self.assertEqual([result['status'] for result in results], [400, 400, 201])
+        self.assertIn('upload_id', results[0]['errors'])
+        self.assertIn('upload_id', results[1]['errors'])
+        titles = set(Note.objects.filter(owner=self.user).values_list('title', flat=True))
+        self.assertEqual(titles, {'Kept', 'Plain'})
+
+    def test_update_requires_id(self):
+        response = self.client.post(
+            reverse('notes:note-batch'),
+            {'operations': [{'op': 'update', 'data': {'title': 'x'}}]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class NoteConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='etag@example.com', password='testing123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.note = Note.objects.create(owner=self.user, title='Cached')
+        # Last-Modified is only sent once the second of the last change is over
+        SyncClock.objects.filter(owner=self.user).update(
+            updated_at=timezone.now() - timedelta(minutes=1)
+        )
+
+    def test_unchanged_list_is_not_modified(self):
+        url = reverse('notes:note-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        # Only the sync clock is read; no notes are loaded or serialized
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        # Other query parameters are a different representation
+        response = self.client.get(url + '?page_size=1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_change_in_the_same_second_is_not_hidden(self):
+        url = reverse('notes:note-list')
+        Note.objects.create(owner=self.user, title='First')
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+
+        # A client guessing a date in the same second still gets the new note
+        since = http_date(time.time())
+        Note.objects.create(owner=self.user, title='Second')
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+
+    def test_changes_invalidate_the_etag(self):
+        list_url = reverse('notes:note-list')
+        detail_url = reverse('notes:note-detail', args=[self.note.id])
+        list_etag = self.client.get(list_url)['ETag']
+        detail_etag = self.client.get(detail_url)['ETag']
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, 304)
+
+        Note.bump_revision(self.note.id)  # e.g. analysis finished
+
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], detail_etag)
+        self.assertEqual(self.client.get(list_url, HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+
+    @override_settings(MEDIA_URL_EXPIRY_SECONDS=3600)
+    def test_fresh_image_urls_invalidate_the_etag(self):
+        url = reverse('notes:note-list')
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        # The next window's responses carry image URLs with a later expiry
+        with mock.patch('apps.notes.media.time.time', return_value=time.time() + 3600):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, 200)
+
+
+class NoteFastListingTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='fast@example.com', password='testing123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        Note.objects.create(owner=self.user, title='Plain', body='')
+        Note.objects.create(
+            owner=self.user, title='Ünïcode \u2028 "quoted" \\ 😀', body='line\nbreak\t\x01'
+        )
+        for index, name in enumerate(['scan.png', 'with space ünï.jpg']):
+            note = Note.objects.create(owner=self.user, title=f'Image {index}')
+            NoteImage.objects.create(
+                note=note,
+                image=f'notes/{note.id}/{name}',
+                thumbnail=f'notes/{note.id}/thumb.webp' if index else '',
+                file_size=1234,
+                checksum='a' * 64,
+                analysis_status=NoteImage.AnalysisStatus.COMPLETED,
+                ocr_text='Hello\nworld',
+                object_labels=['document', 'text'],
+            )
+
+    def assert_matches_serializer(self, params):
+        response = self.client.get(reverse('notes:note-list'), params)
+        self.assertEqual(response.status_code, 200)
+
+        with mock.patch.object(NoteViewSet, 'fast_list', False):
+            slow = self.client.get(reverse('notes:note-list'), params)
+        self.assertEqual(response.content, slow.content)
+
+        # ...and byte-identical to the stock serializer + renderer
+        paginated = 'page_size' in params
+        count = len(response.data['results']) if paginated else len(response.data)
+        notes = (
+            Note.objects.filter(owner=self.user)
+            .select_related('image')
+            .order_by('-updated_at', '-id')[:count]
+        )
+        expected = NoteSerializer(notes, many=True, context={'request': response.wsgi_request}).data
+        if paginated:
+            expected = {'next': response.data['next'], 'results': expected}
+        self.assertEqual(response.content, JSONRenderer().render(expected))
+
+    def test_list_is_byte_identical_to_serializer(self):
+        self.assert_matches_serializer({})
+
+    def test_paginated_list_is_byte_identical_to_serializer(self):
+        self.assert_matches_serializer({'page_size': 3})
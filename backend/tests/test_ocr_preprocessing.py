@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+from PIL import Image
+
+from apps.notes.metrics import OCR_STAGE_SECONDS
+from apps.notes.preprocessing import Preprocessor, binarize, otsu_threshold
+
+
+def stage_count(stage):
+    for metric in OCR_STAGE_SECONDS.collect():
+        for sample in metric.samples:
+            if sample.name.endswith('_count') and sample.labels == {'stage': stage}:
+                return sample.value
+    return 0
+
+
+class PreprocessorTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def save(self, image, name, **params):
+        path = self.directory / name
+        image.save(path, **params)
+        return path
+
+    def test_phone_photo_is_rotated_shrunk_and_grayscale(self):
+        photo = Image.new('RGB', (6000, 4000), 'white')
+        exif = photo.getexif()
+        exif[0x0112] = 6  # stored sideways: rotate 90 degrees clockwise to display
+        path = self.save(photo, 'photo.jpg', exif=exif, dpi=(72, 72))
+        decodes = stage_count('decode')
+
+        image, dpi = Preprocessor().run(path)
+
+        self.assertEqual(image.mode, 'L')
+        self.assertLess(image.width, image.height)
+        self.assertLessEqual(image.height, round(11.7 * 300))
+        self.assertEqual(dpi, round(image.height / 11.7))
+        self.assertEqual(stage_count('decode'), decodes + 1)
+
+    def test_scan_resolution_is_scaled_to_target(self):
+        path = self.save(Image.new('L', (2400, 1200), 'white'), 'scan.png', dpi=(600, 600))
+
+        image, dpi = Preprocessor(target_dpi=300).run(path)
+
+        self.assertEqual(image.size, (1200, 600))
+        self.assertEqual(dpi, 300)
+
+    def test_stages_can_be_disabled(self):
+        path = self.save(Image.new('RGB', (4000, 100), 'white'), 'wide.png')
+
+        image, dpi = Preprocessor(grayscale=False, target_dpi=None).run(path)
+
+        self.assertEqual((image.mode, image.size, dpi), ('RGB', (4000, 100), None))
+
+    def test_transparent_background_becomes_white(self):
+        path = self.save(Image.new('RGBA', (50, 50), (0, 0, 0, 0)), 'clear.png')
+
+        image, _ = Preprocessor().run(path)
+
+        self.assertEqual(image.getextrema(), (255, 255))
+
+    def test_binarize_splits_ink_from_paper(self):
+        histogram = [0] * 256
+        histogram[40], histogram[200] = 100, 900
+        self.assertTrue(40 <= otsu_threshold(histogram) < 200)
+
+        page = Image.new('L', (10, 10), 190)
+        page.paste(60, (0, 0, 5, 10))
+        self.assertEqual(sorted(color for _, color in binarize(page).getcolors()), [0, 255])
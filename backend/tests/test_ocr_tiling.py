@@ -0,0 +1,91 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.test import SimpleTestCase
+from PIL import Image, ImageDraw
+
+from apps.notes.tiling import TiledOcr, split_bands
+
+
+def fake_recognize_band(mode, size, pixels, dpi):
+    """Reports each run of non-white rows as a line named after its gray level."""
+    image = Image.frombytes(mode, size, pixels)
+    lines, start = [], None
+    for y in range(image.height + 1):
+        value = image.getpixel((0, y)) if y < image.height else 255
+        if value != 255 and start is None:
+            start = y
+        elif value == 255 and start is not None:
+            lines.append((start, y, f'line {image.getpixel((0, start))}'))
+            start = None
+    return lines
+
+
+class TiledOcrTests(SimpleTestCase):
+    def test_bands_cover_the_page_and_own_every_row_once(self):
+        for height in (1000, 1200, 1201, 3508, 5000):
+            bands = split_bands(height, band_height=1200, overlap=160)
+
+            self.assertEqual(bands[0].top, 0)
+            self.assertEqual(bands[-1].bottom, height)
+            self.assertEqual(bands[0].own_top, 0)
+            self.assertEqual(bands[-1].own_bottom, height)
+            for band, following in zip(bands, bands[1:], strict=False):
+                self.assertEqual(band.bottom - following.top, 160)
+                self.assertEqual(band.own_bottom, following.own_top)
+                # Owned rows keep half an overlap away from the band's cut edges
+                self.assertGreaterEqual(band.own_bottom, following.top + 80)
+                self.assertLessEqual(band.own_bottom, band.bottom - 80)
+
+    def test_small_images_keep_the_single_call_path(self):
+        tiler = TiledOcr(min_pixels=8_000_000, workers=4)
+
+        self.assertFalse(tiler.wants(Image.new('L', (2480, 3000))))
+        self.assertTrue(tiler.wants(Image.new('L', (2480, 3508))))
+        self.assertFalse(TiledOcr(min_pixels=None, workers=4).wants(Image.new('L', (5000, 5000))))
+        self.assertFalse(TiledOcr(workers=1).wants(Image.new('L', (5000, 5000))))
+
+    def test_lines_are_merged_in_reading_order_without_overlap_duplicates(self):
+        page = Image.new('L', (200, 1000), 255)
+        draw = ImageDraw.Draw(page)
+        # 20 px lines every 35 px; several straddle band edges and overlaps
+        for index, top in enumerate(range(10, 980, 35)):
+            draw.rectangle((0, top, 199, top + 19), fill=index)
+        tiler = TiledOcr(min_pixels=1, band_height=300, overlap=60, workers=2)
+        tiler._pool = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(tiler.close)
+
+        with mock.patch('apps.notes.tiling._recognize_band', fake_recognize_band):
+            text = tiler.recognize(page, dpi=300)
+
+        self.assertEqual(text.splitlines(), [f'line {index}' for index in range(28)])
+
+    def test_failed_band_cancels_the_others(self):
+        tiler = TiledOcr(min_pixels=1, band_height=300, overlap=60, workers=2)
+        tiler._pool = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(tiler.close)
+        release = threading.Event()
+        calls = []
+
+        def recognize_band(mode, size, pixels, dpi):
+            calls.append(size)
+            if len(calls) == 1:
+                raise RuntimeError('band failed')
+            release.wait(5)
+            return []
+
+        with mock.patch('apps.notes.tiling._recognize_band', recognize_band):
+            with self.assertRaises(RuntimeError):
+                tiler.recognize(Image.new('L', (200, 2000), 255))
+            release.set()
+            tiler.close()
+
+        # 9 bands: the failed one and at most the one already running
+        self.assertLessEqual(len(calls), 2)
+
+    def test_pool_processes_are_spawned(self):
+        tiler = TiledOcr(workers=2)
+        self.addCleanup(tiler.close)
+
+        self.assertEqual(tiler._get_pool()._mp_context.get_start_method(), 'spawn')
@@ -0,0 +1,149 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.tokens import RefreshToken
+from apps.notes.models import Note, NoteImage
+from apps.notes.tasks import analyze_note_image
+from apps.notes.vision import DummyVisionProvider
+from benchmarks.budgets import QUERY_BUDGETS, count_queries
+from tests.test_analysis_cache import make_png
+
+
+class QueryBudgetTests(TestCase):
+    """Steady-state query counts per endpoint (see ``benchmarks.budgets``).
+
+    Each endpoint is measured with a small and a larger data set so that a
+    count growing with the number of notes (an N+1) fails even while it is
+    still under budget.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        for module in ('tasks', 'views'):
+            provider = mock.patch(
+                f'apps.notes.{module}.get_vision_provider', return_value=DummyVisionProvider()
+            )
+            provider.start()
+            self.addCleanup(provider.stop)
+
+        self.user = get_user_model().objects.create_user(
+            email='budget@example.com', password='testing123'
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.client.get(reverse('accounts:me'))  # warm the user cache
+
+    def add_notes(self, count):
+        for index in range(count):
+            note = Note.objects.create(owner=self.user, title=f'Budget note {index}', body='words')
+            image = NoteImage.objects.create(
+                note=note,
+                image=SimpleUploadedFile(f'scan{index}.png', make_png()),
+                file_size=1,
+                checksum=f'{index:064d}',
+            )
+            analyze_note_image(str(image.id))
+
+    def measure(self, request):
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        self.assertLess(response.status_code, 300, response.content[:200])
+        return count_queries(queries.captured_queries)
+
+    def assert_budget(self, name, request, sizes=(2, 6)):
+        counts = []
+        for size in sizes:
+            self.add_notes(size - Note.objects.filter(owner=self.user).count())
+            counts.append(self.measure(request))
+        self.assertLessEqual(max(counts), QUERY_BUDGETS[name], f'{name} used {counts} queries')
+        self.assertEqual(len(set(counts)), 1, f'{name} query count grows with the data: {counts}')
+
+    def test_signin(self):
+        credentials = {'email': 'budget@example.com', 'password': 'testing123'}
+        self.assert_budget('signin', lambda: APIClient().post(
+            reverse('accounts:signin'), credentials, format='json'
+        ))
+
+    def test_token_refresh(self):
+        token = str(RefreshToken.for_user(self.user))
+
+        def refresh():
+            nonlocal token
+            response = APIClient().post(
+                reverse('accounts:refresh'), {'refresh': token}, format='json'
+            )
+            token = response.data.get('refresh', token)
+            return response
+
+        self.assert_budget('token_refresh', refresh)
+
+    def test_note_list(self):
+        url = reverse('notes:note-list')
+        self.assert_budget('note_list', lambda: self.client.get(url))
+        self.assert_budget('note_list', lambda: self.client.get(url, {'page_size': 50}))
+
+    def test_note_detail(self):
+        self.add_notes(1)
+        note = Note.objects.get(owner=self.user)
+        url = reverse('notes:note-detail', args=[note.id])
+        self.assert_budget('note_detail', lambda: self.client.get(url))
+
+    def test_note_create(self):
+        self.assert_budget('note_create', lambda: self.client.post(
+            reverse('notes:note-list'), {'title': 'New', 'body': 'text'}, format='json'
+        ))
+
+    def test_note_upload(self):
+        # New content each time; a duplicate saves the blob insert
+        colors = iter(['black', 'gray'])
+        self.assert_budget('note_upload', lambda: self.client.post(
+            reverse('notes:note-list'),
+            {
+                'title': 'Scan',
+                'image_file': SimpleUploadedFile('scan.png', make_png(next(colors)), 'image/png'),
+            },
+        ))
+
+    def test_note_changes(self):
+        url = reverse('notes:note-changes')
+        self.assert_budget('note_changes', lambda: self.client.get(url, {'since': 0}))
+
+    def test_note_search(self):
+        url = reverse('notes:note-search')
+        self.assert_budget('note_search', lambda: self.client.get(url, {'q': 'budget'}))
+
+    def test_analysis(self):
+        def analyze():
+            note = Note.objects.create(owner=self.user, title='Queued')
+            image = NoteImage.objects.create(
+                note=note,
+                image=SimpleUploadedFile('queued.png', make_png('red')),
+                file_size=1,
+                checksum='f' * 64,
+            )
+            with CaptureQueriesContext(connection) as queries:
+                analyze_note_image(str(image.id))
+            image.refresh_from_db()
+            self.assertEqual(image.analysis_status, NoteImage.AnalysisStatus.COMPLETED)
+            return count_queries(queries.captured_queries)
+
+        counts = [analyze(), analyze()]  # the second one is an analysis cache hit
+        self.assertLessEqual(
+            max(counts), QUERY_BUDGETS['analysis'], f'analysis used {counts} queries'
+        )
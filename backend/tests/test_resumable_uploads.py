@@ -0,0 +1,142 @@
+import hashlib
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.notes import uploads
+from apps.notes.models import ImageUpload, NoteImage
+
+from .test_analysis_cache import make_png
+
+CHUNK_TYPE = 'application/offset+octet-stream'
+
+
+class ResumableUploadTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(uploads._hashers.clear)
+
+        self.user = get_user_model().objects.create_user(
+            email='chunks@example.com', password='testing123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.content = make_png('olive')
+
+    def start(self, length=None, content_type='image/png'):
+        response = self.client.post(
+            reverse('notes:image-upload-list'),
+            {
+                'filename': 'scan.png',
+                'content_type': content_type,
+                'length': length or len(self.content),
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertTrue(response['Location'].endswith(f'/api/notes/uploads/{response.data["id"]}/'))
+        return response.data['id']
+
+    def send(self, upload_id, offset, data):
+        return self.client.patch(
+            reverse('notes:image-upload-detail', args=[upload_id]),
+            data,
+            content_type=CHUNK_TYPE,
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_chunks_are_assembled_hashed_and_attached(self):
+        upload_id = self.start()
+        middle = len(self.content) // 2
+        response = self.send(upload_id, 0, self.content[:middle])
+        self.assertEqual(response['Upload-Offset'], str(middle))
+        # The next chunk lands on a process that never saw the first one
+        uploads._hashers.clear()
+        response = self.send(upload_id, middle, self.content[middle:])
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response['Upload-Offset'], str(len(self.content)))
+
+        response = self.client.post(
+            reverse('notes:note-list'), {'title': 'Chunked', 'upload_id': upload_id}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 201, response.data)
+        note_image = NoteImage.objects.get(note_id=response.data['id'])
+        self.assertEqual(note_image.checksum, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(note_image.file_size, len(self.content))
+        checksum = note_image.checksum
+        self.assertEqual(
+            note_image.image.name, f'blobs/{checksum[:2]}/{checksum[2:4]}/{checksum}.png'
+        )
+        self.assertEqual(Path(note_image.image.path).read_bytes(), self.content)
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertEqual(list(Path(self.media_root, 'uploads').iterdir()), [])
+
+    def test_wrong_offset_reports_where_to_resume(self):
+        upload_id = self.start()
+        self.send(upload_id, 0, self.content[:10])
+
+        response = self.send(upload_id, 0, self.content)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '10')
+        status = self.client.head(reverse('notes:image-upload-detail', args=[upload_id]))
+        self.assertEqual(status['Upload-Offset'], '10')
+        self.assertEqual(status['Upload-Length'], str(len(self.content)))
+
+    def test_existing_validation_applies(self):
+        response = self.client.post(
+            reverse('notes:image-upload-list'),
+            {'filename': 'huge.png', 'content_type': 'image/png', 'length': 11 * 1024 * 1024},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('length', response.data)
+        response = self.client.post(
+            reverse('notes:image-upload-list'),
+            {'filename': 'notes.pdf', 'content_type': 'application/pdf', 'length': 10},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('content_type', response.data)
+
+        upload_id = self.start(length=len(self.content) + 1)
+        self.assertEqual(self.send(upload_id, 0, self.content + b'\0\0').status_code, 400)
+
+        self.send(upload_id, 0, self.content[:20])
+        response = self.client.post(
+            reverse('notes:note-list'), {'title': 'Early', 'upload_id': upload_id}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('incomplete', response.data['upload_id'])
+
+    def test_attach_rejects_non_images_and_foreign_uploads(self):
+        upload_id = self.start(length=64)
+        self.send(upload_id, 0, b'x' * 64)
+        response = self.client.post(
+            reverse('notes:note-list'), {'title': 'Junk', 'upload_id': upload_id}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('upload_id', response.data)
+
+        other = APIClient()
+        stranger = get_user_model().objects.create_user(email='x@example.com', password='x')
+        other.force_authenticate(stranger)
+        upload_id = self.start()
+        self.send(upload_id, 0, self.content)
+        response = other.post(
+            reverse('notes:note-list'), {'title': 'Stolen', 'upload_id': upload_id}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            other.get(reverse('notes:image-upload-detail', args=[upload_id])).status_code, 404
+        )
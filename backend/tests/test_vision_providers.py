@@ -0,0 +1,117 @@
+import threading
+import time
+import types
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from prometheus_client import REGISTRY
+
+from apps.notes.vision import (
+    CompositeVisionProvider,
+    DummyVisionProvider,
+    TesseractVisionProvider,
+    VisionResult,
+)
+
+
+class SlowProvider:
+    def __init__(self, identity, seconds, text):
+        self.identity = identity
+        self.seconds = seconds
+        self.text = text
+        self.release = threading.Event()
+
+    def analyze(self, image_path):
+        self.release.wait(self.seconds)
+        return VisionResult(ocr_text=self.text, object_labels=[self.identity])
+
+
+class CompositeVisionProviderTests(TestCase):
+    def composite(self, providers, timeouts=None):
+        composite = CompositeVisionProvider(providers, timeouts)
+        self.addCleanup(composite.close)
+        return composite
+
+    def test_providers_run_concurrently(self):
+        composite = self.composite([SlowProvider('a', 0.3, 'one'), SlowProvider('b', 0.3, 'two')])
+
+        started = time.monotonic()
+        result = composite.analyze('scan.png')
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(result.ocr_text, 'one\n\ntwo')
+        self.assertEqual(result.object_labels, ['a', 'b'])
+        self.assertFalse(result.partial)
+
+    def test_timed_out_provider_is_dropped(self):
+        hung = SlowProvider('hung', 30, 'late')
+        self.addCleanup(hung.release.set)
+        composite = self.composite([SlowProvider('fast', 0, 'early'), hung], [None, 0.2])
+        timeouts = REGISTRY.get_sample_value(
+            'nomad_analysis_provider_failures_total', {'provider': 'hung'}
+        ) or 0
+
+        started = time.monotonic()
+        result = composite.analyze('scan.png')
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertTrue(result.success)
+        self.assertTrue(result.partial)
+        self.assertEqual(result.ocr_text, 'early')
+        self.assertIn('timed out after 0.2s', result.error)
+        self.assertEqual(
+            REGISTRY.get_sample_value(
+                'nomad_analysis_provider_failures_total', {'provider': 'hung'}
+            ),
+            timeouts + 1,
+        )
+
+    def test_raising_provider_is_a_failure(self):
+        broken = SlowProvider('broken', 0, '')
+        broken.analyze = lambda image_path: 1 / 0
+        result = self.composite([broken]).analyze('scan.png')
+
+        self.assertFalse(result.success)
+        self.assertIn('division by zero', result.error)
+
+    @override_settings(VISION_PROVIDERS=[
+        {'BACKEND': 'apps.notes.vision.DummyVisionProvider', 'TIMEOUT': 5},
+        {'BACKEND': 'tests.test_vision_providers.SlowProvider', 'OPTIONS': {
+            'identity': 'slow', 'seconds': 0, 'text': 'configured',
+        }},
+    ])
+    def test_from_settings(self):
+        composite = CompositeVisionProvider.from_settings()
+        self.addCleanup(composite.close)
+
+        self.assertIsInstance(composite.providers[0], DummyVisionProvider)
+        self.assertEqual(composite.timeouts, [5, None])
+        self.assertEqual(composite.identity, 'dummy+slow')
+
+
+class TesseractEngineStartupTests(SimpleTestCase):
+    def provider(self):
+        engine = mock.Mock()
+        tesserocr = types.SimpleNamespace(
+            tesseract_version=lambda: 'tesseract 5.3.0\n leptonica-1.82.0',
+            PyTessBaseAPI=mock.Mock(return_value=engine),
+        )
+        with mock.patch.dict('sys.modules', {'tesserocr': tesserocr}):
+            provider = TesseractVisionProvider()
+        self.addCleanup(provider.close)
+        return provider, tesserocr.PyTessBaseAPI
+
+    def test_identity_does_not_start_the_engine(self):
+        provider, start = self.provider()
+
+        self.assertEqual(provider.identity, 'tesseract:5.3.0:eng')
+        self.assertTrue(provider.persistent)
+        start.assert_not_called()
+
+    def test_engine_starts_once_on_first_analysis(self):
+        provider, start = self.provider()
+
+        provider.analyze('missing.png')
+        provider.analyze('missing.png')
+
+        start.assert_called_once_with(lang='eng')